@@ -0,0 +1,23 @@
+"""
+Gunicorn 配置
+主进程预加载应用并执行启动预热（src/warmup.py），工作进程通过 fork 继承编译好的模板、
+翻译目录和已填充的进程内缓存，不必各自冷启动
+启动: gunicorn -c gunicorn.conf.py run:app
+"""
+
+import os
+
+bind = os.getenv('GUNICORN_BIND', '127.0.0.1:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+
+# 在主进程中创建应用（create_app 根据 WARMUP_ON_STARTUP 执行预热），
+# PRELOAD_APP 使主进程不启动后台线程，fork 前主进程中只有一个线程
+preload_app = True
+os.environ.setdefault('WARMUP_ON_STARTUP', 'True')
+os.environ['PRELOAD_APP'] = str(preload_app)
+
+
+def post_fork(server, worker):
+    """工作进程中重建数据库和缓存连接，启动后台线程"""
+    from src.warmup import init_worker_process
+    init_worker_process(worker.app.wsgi())
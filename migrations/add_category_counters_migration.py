@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+分类产品计数迁移脚本
+为 categories 表添加 available_product_count 列，并用一次分组查询回填
+之后由产品变更事件在同一事务中维护，批量导入数据后可再次执行以重建计数
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import inspect
+from src import create_app
+from src.models import db, rebuild_category_product_counts
+
+
+def add_category_counters():
+    """添加计数列（已存在时跳过）并重建全部分类的计数"""
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    with app.app_context():
+        columns = [column['name'] for column in inspect(db.engine).get_columns('categories')]
+        if 'available_product_count' not in columns:
+            db.session.execute(db.text(
+                "ALTER TABLE categories ADD COLUMN available_product_count INTEGER NOT NULL DEFAULT 0"
+            ))
+            db.session.commit()
+            print("已添加 available_product_count 列")
+        else:
+            print("available_product_count 列已存在，跳过")
+
+        count = rebuild_category_product_counts()
+        print(f"已重建 {count} 个分类的可用产品计数")
+    return True
+
+
+if __name__ == "__main__":
+    success = add_category_counters()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+商品列表索引迁移脚本
+为已有数据库补建游标分页使用的组合索引（库存状态 + 排序键 + ID）
+新建的数据库由 db.create_all() 自动创建，无需执行
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src import create_app
+from src.models import db, Product
+
+
+def add_listing_indexes():
+    """创建缺失的组合索引（已存在则跳过）"""
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    with app.app_context():
+        for index in Product.__table__.indexes:
+            if not index.name.startswith('idx_products_status_'):
+                continue
+            index.create(db.engine, checkfirst=True)
+            print(f"索引已就绪: {index.name}")
+    return True
+
+
+if __name__ == "__main__":
+    success = add_listing_indexes()
+    sys.exit(0 if success else 1)
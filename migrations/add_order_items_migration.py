@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+订单商品表迁移脚本
+创建 order_items 表，并从历史订单的 items JSON 分批补写规范化的订单商品行
+新订单由 Order.set_items 同步写入，无需执行
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src import create_app
+from src.models import db, OrderItem, backfill_order_items
+
+
+def add_order_items(batch_size=1000):
+    """创建表并补写历史订单商品（可重复执行，已有商品行的订单会跳过）"""
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    with app.app_context():
+        OrderItem.__table__.create(db.engine, checkfirst=True)
+        print("order_items 表已就绪")
+
+        count = backfill_order_items(batch_size=batch_size)
+        print(f"已补写 {count} 条订单商品")
+    return True
+
+
+if __name__ == "__main__":
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    success = add_order_items(batch_size)
+    sys.exit(0 if success else 1)
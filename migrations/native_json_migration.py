@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+原生JSON列迁移脚本
+把 products.images / products.specifications / orders.items / site_info_*.content
+从TEXT转换为 PostgreSQL JSONB，并创建GIN和表达式索引；
+SQLite 保持TEXT（由JSON1函数计算），只需创建表达式索引
+转换前会把无法解析的JSON值修正为空值，避免类型转换或JSON函数报错
+"""
+
+import os
+import sys
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src import create_app
+from src.models import db
+from src.db_types import install_json_indexes
+from src.fulltext import PostgresFTSBackend
+
+# (表, 列, 无效值的替换值)
+JSON_COLUMNS = [
+    ('products', 'images', '[]'),
+    ('products', 'specifications', '{}'),
+    ('orders', 'items', '[]'),
+    ('site_info_items', 'content', '{}'),
+    ('site_info_translations', 'content', '{}')
+]
+
+
+def fix_invalid_json(table, column, replacement):
+    """修正无法解析的JSON值，返回修正的行数"""
+    rows = db.session.execute(db.text(
+        f"SELECT id, {column} FROM {table} WHERE {column} IS NOT NULL"
+    )).all()
+
+    fixed = 0
+    for row_id, value in rows:
+        if not isinstance(value, str):
+            continue
+        try:
+            json.loads(value)
+        except ValueError:
+            db.session.execute(
+                db.text(f"UPDATE {table} SET {column} = :value WHERE id = :id"),
+                {'value': replacement, 'id': row_id}
+            )
+            fixed += 1
+    db.session.commit()
+    return fixed
+
+
+def convert_postgresql_columns():
+    """把JSON文本列转换为JSONB（search_vector 生成列依赖 specifications，需先删除再重建）"""
+    db.session.execute(db.text("ALTER TABLE products DROP COLUMN IF EXISTS search_vector"))
+    for table, column, _ in JSON_COLUMNS:
+        db.session.execute(db.text(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE JSONB USING {column}::jsonb"
+        ))
+        print(f"已转换为JSONB: {table}.{column}")
+    db.session.commit()
+
+    if PostgresFTSBackend().install():
+        print("全文搜索生成列已重建")
+
+
+def migrate_native_json():
+    """执行迁移"""
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    with app.app_context():
+        for table, column, replacement in JSON_COLUMNS:
+            fixed = fix_invalid_json(table, column, replacement)
+            if fixed:
+                print(f"已修正无效JSON: {table}.{column} {fixed} 行")
+
+        if db.engine.dialect.name == 'postgresql':
+            convert_postgresql_columns()
+
+        count = install_json_indexes(db)
+        print(f"JSON索引已就绪: {count} 个")
+    return True
+
+
+if __name__ == "__main__":
+    success = migrate_native_json()
+    sys.exit(0 if success else 1)
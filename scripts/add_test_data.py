@@ -9,7 +9,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src import create_app
 from src.models import (
-    db, Category, Product, Order, Message, Admin, SiteSettings,
+    db, Category, Product, Order, OrderItem, Message, Admin, SiteSettings,
     init_default_categories
 )
 from datetime import datetime, timedelta
@@ -21,6 +21,7 @@ def clear_all_data():
     print("清空现有数据...")
     
     # 按照外键依赖关系的顺序删除数据
+    OrderItem.query.delete()
     Order.query.delete()
     Message.query.delete()
     Product.query.delete()
@@ -0,0 +1,206 @@
+"""
+Sara二手售卖网站 - 搜索和商品列表性能基准测试
+按指定规模生成合成目录，测量 search_products、商品列表页（每种排序）、
+搜索建议接口和 get_sales_stats 的吞吐量与 p50/p95/p99 延迟，结果以JSON输出便于比较
+
+用法:
+    python scripts/benchmark.py --sizes 10000,100000 --output benchmark.json
+    python scripts/benchmark.py --sizes 1000000 --iterations 20 --warm
+（使用 BENCHMARK_DATABASE_URL 指定的数据库，默认 instance/benchmark.db，每个规模会清空重建）
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import argparse
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime
+
+from generate_catalog import generate_catalog
+
+# 测试查询：中英文、常见词、多词和拼写错误
+SEARCH_QUERIES = ['iphone', 'macbook', 'switch', '手机', '笔记本电脑', '电脑', 'sony camera', '小米 吸尘器', 'nike', 'iphnoe']
+SUGGESTION_QUERIES = ['ip', 'mac', 'sw', '手机', '笔记', 'dys', 'nik', '宜家']
+SORTS = ['newest', 'oldest', 'price_asc', 'price_desc', 'name']
+
+# 深翻页测试：先沿游标翻过的页数
+DEEP_PAGE = 20
+
+
+def percentile(sorted_values, fraction):
+    """最近秩法百分位数"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies):
+    """汇总延迟（毫秒）和吞吐量"""
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    return {
+        'runs': len(ordered),
+        'throughput_per_second': round(len(ordered) / total, 2) if total else None,
+        'mean_ms': round(total / len(ordered) * 1000, 3),
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3)
+    }
+
+
+def measure(operation, arguments, iterations, reset=None):
+    """对每个参数重复执行 iterations 次并记录耗时；reset 在每次执行前调用（冷缓存）"""
+    latencies = []
+    for _ in range(iterations):
+        for argument in arguments:
+            if reset:
+                reset()
+            start_time = time.perf_counter()
+            operation(argument)
+            latencies.append(time.perf_counter() - start_time)
+    return summarize(latencies)
+
+
+def log(message):
+    """进度信息输出到标准错误，标准输出只保留JSON结果"""
+    print(message, file=sys.stderr, flush=True)
+
+
+def git_revision():
+    """当前代码版本（非git目录时返回None）"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_size(create_app, size, args):
+    """生成指定规模的目录并运行全部基准测试"""
+    from src.models import db, search_products, get_sales_stats
+    from src.search_cache import search_cache
+    from src.facets import facet_engine
+    from src.autocomplete import autocomplete_index
+    from src.cache import cache
+
+    order_count = int(size * args.order_ratio)
+    log(f'== {size} 个产品 / {order_count} 个订单 ==')
+
+    app = create_app('benchmark')
+    with app.app_context():
+        setup = generate_catalog(size, order_count, seed=args.seed)
+    log(f"写入完成: 产品 {setup['product_insert_seconds']}s, 订单 {setup['order_insert_seconds']}s")
+
+    # 重新创建应用，使进程内索引从新数据全量构建
+    start_time = time.perf_counter()
+    app = create_app('benchmark')
+    setup['startup_seconds'] = round(time.perf_counter() - start_time, 3)
+    log(f"应用启动（含索引构建）: {setup['startup_seconds']}s")
+
+    def reset_caches():
+        search_cache.clear()
+        facet_engine.clear()
+        autocomplete_index.clear_cache()
+        # 整页缓存和模板片段缓存存储在应用缓存中
+        cache.clear()
+
+    reset = None if args.warm else reset_caches
+    client = app.test_client()
+    results = {}
+
+    def get(url):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} 返回 {response.status_code}')
+        return response
+
+    with app.app_context():
+        log('search_products')
+        results['search_products'] = measure(search_products, SEARCH_QUERIES, args.iterations, reset)
+        results['search_products_top20'] = measure(
+            lambda query: search_products(query, limit=20), SEARCH_QUERIES, args.iterations, reset
+        )
+
+    for sort_by in SORTS:
+        log(f'main.products sort={sort_by}')
+        results[f'products_page_{sort_by}'] = measure(
+            lambda url: get(url), [f'/en/products?sort={sort_by}'], args.iterations, reset
+        )
+
+        # 沿游标翻到较深的页再测量
+        url = f'/en/products/feed?sort={sort_by}'
+        for _ in range(DEEP_PAGE):
+            next_cursor = get(url).get_json()['next_cursor']
+            if not next_cursor:
+                break
+            url = f'/en/products/feed?sort={sort_by}&cursor={next_cursor}'
+        results[f'products_feed_page{DEEP_PAGE}_{sort_by}'] = measure(lambda u: get(u), [url], args.iterations, reset)
+
+    log('main.products search')
+    results['products_page_search'] = measure(
+        lambda query: get(f'/en/products?search={query}'), SEARCH_QUERIES, args.iterations, reset
+    )
+
+    log('search_suggestions')
+    results['search_suggestions'] = measure(
+        lambda query: get(f'/api/search/suggestions?q={query}'), SUGGESTION_QUERIES, args.iterations, reset
+    )
+
+    with app.app_context():
+        log('get_sales_stats')
+        results['get_sales_stats'] = measure(lambda _: get_sales_stats(), [None], args.stats_iterations)
+        db.session.remove()
+
+    return {'size': size, 'orders': order_count, 'setup': setup, 'benchmarks': results}
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='搜索和商品列表性能基准测试')
+    parser.add_argument('--sizes', default='10000', help='产品规模，逗号分隔（如 10000,100000,1000000）')
+    parser.add_argument('--order-ratio', type=float, default=0.2, help='订单数量与产品数量之比')
+    parser.add_argument('--iterations', type=int, default=5, help='每个查询的重复次数')
+    parser.add_argument('--stats-iterations', type=int, default=3, help='get_sales_stats 的重复次数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--warm', action='store_true', help='保留缓存（默认每次执行前清空缓存）')
+    parser.add_argument('--output', help='结果JSON文件路径（默认输出到标准输出）')
+    args = parser.parse_args()
+
+    from src import create_app
+    from src.config import BenchmarkConfig
+    import sqlalchemy
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'sqlalchemy': sqlalchemy.__version__,
+            'platform': platform.platform(),
+            'database': BenchmarkConfig().SQLALCHEMY_DATABASE_URI.split('://')[0],
+            'iterations': args.iterations,
+            'cache': 'warm' if args.warm else 'cold'
+        },
+        'results': [run_size(create_app, size, args) for size in sizes]
+    }
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+        log(f'结果已写入 {args.output}')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""
+Sara二手售卖网站 - 合成商品目录生成脚本
+批量生成大规模的商品和订单数据（中英文混合名称和描述、JSON规格、图片列表），
+用于性能基准测试；数据通过批量INSERT写入，不经过ORM逐条提交
+
+用法:
+    python scripts/generate_catalog.py --products 100000 --orders 20000
+    （写入 BENCHMARK_DATABASE_URL 指定的数据库，默认 instance/benchmark.db）
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+# 品牌、品类和描述词库 (分类, 英文品类, 中文品类, 品牌列表)
+ITEM_TYPES = [
+    ('electronics', 'iPhone', '手机', ['Apple']),
+    ('electronics', 'Phone', '手机', ['Samsung', 'Xiaomi', '华为', 'OPPO']),
+    ('electronics', 'Laptop', '笔记本电脑', ['Apple MacBook', 'Lenovo', '联想', 'Dell', 'ASUS']),
+    ('electronics', 'Tablet', '平板电脑', ['Apple iPad', 'Samsung Galaxy Tab', '华为']),
+    ('electronics', 'Camera', '相机', ['Canon', 'Sony', 'Nikon', 'Fujifilm']),
+    ('electronics', 'Headphones', '耳机', ['Sony', 'Bose', 'AirPods', '漫步者']),
+    ('electronics', 'Switch', '游戏机', ['Nintendo']),
+    ('electronics', 'PlayStation', '游戏机', ['Sony']),
+    ('electronics', 'Monitor', '显示器', ['Dell', 'LG', 'Samsung']),
+    ('clothing', 'Jacket', '外套', ['Uniqlo', 'Zara', 'The North Face', '优衣库']),
+    ('clothing', 'Sneakers', '运动鞋', ['Nike', 'Adidas', 'New Balance', '李宁']),
+    ('clothing', 'Dress', '连衣裙', ['Zara', 'H&M', 'Mango']),
+    ('clothing', 'Backpack', '双肩包', ['Herschel', 'Fjallraven', 'Nike']),
+    ('anime', 'Figure', '手办', ['Good Smile', 'Bandai', '万代']),
+    ('anime', 'Plush', '毛绒公仔', ['Pokemon', 'Sanrio', '宝可梦']),
+    ('anime', 'Cosplay Costume', 'cos服', ['原神', 'Genshin', 'Naruto']),
+    ('appliances', 'Vacuum', '吸尘器', ['Dyson', 'Xiaomi', '小米']),
+    ('appliances', 'Rice Cooker', '电饭煲', ['Panasonic', '美的', 'Zojirushi']),
+    ('appliances', 'Air Fryer', '空气炸锅', ['Philips', 'Ninja', '美的']),
+    ('appliances', 'Coffee Machine', '咖啡机', ["De'Longhi", 'Breville', 'Nespresso']),
+    ('other', 'Desk Lamp', '台灯', ['IKEA', '宜家', 'Xiaomi']),
+    ('other', 'Bookshelf', '书架', ['IKEA', '宜家']),
+    ('other', 'Guitar', '吉他', ['Yamaha', 'Fender']),
+    ('other', 'Bicycle', '自行车', ['Giant', '捷安特', 'Trek'])
+]
+
+CONDITIONS = ['全新', '9成新', '8成新', '7成新', '6成新及以下']
+COLORS = ['black', 'white', 'silver', 'blue', 'red', '黑色', '白色', '粉色', '深空灰']
+SIZES = ['S', 'M', 'L', 'XL', '38', '40', '42', '13寸', '15寸']
+ADJECTIVES_EN = ['lightly used', 'great condition', 'barely used', 'works perfectly', 'with box', 'minor scratches']
+PHRASES_ZH = [
+    '自用闲置，功能完好', '搬家急出', '留学生回国转让', '成色很新，无磕碰', '配件齐全，带原装盒子',
+    '可以在奥克兰市中心当面交易', '支持邮寄到新西兰各地', '价格可小刀', '电池健康度良好', '只用过几次'
+]
+STATUSES = [('available', 85), ('sold', 12), ('reserved', 3)]
+ORDER_STATUSES = [('completed', 40), ('paid', 25), ('shipped', 15), ('pending', 15), ('cancelled', 5)]
+
+# 批量写入的每批行数
+BATCH_SIZE = 5000
+
+
+def _weighted_choice(rng, choices):
+    """按权重随机选择"""
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights)[0]
+
+
+def generate_products(count, seed=42, start_id=1):
+    """生成产品行（字典），按 start_id 连续编号"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    for offset in range(count):
+        category, item_en, item_zh, brands = rng.choice(ITEM_TYPES)
+        brand = rng.choice(brands)
+        model = f'{rng.choice("ABCDEFGHJKLMNPRSTXZ")}{rng.randint(1, 99)}'
+        name_style = rng.random()
+        if name_style < 0.4:
+            name = f'{brand} {item_en} {model}'
+        elif name_style < 0.7:
+            name = f'{brand}{item_zh} {model}'
+        else:
+            name = f'{brand} {item_en} {item_zh}'
+
+        description = '<p>' + '，'.join(rng.sample(PHRASES_ZH, 2)) + '。' + \
+            f' {item_en} in {rng.choice(ADJECTIVES_EN)}, {rng.choice(ADJECTIVES_EN)}.</p>'
+        specifications = json.dumps({
+            'brand': brand,
+            'model': model,
+            'color': rng.choice(COLORS),
+            'size': rng.choice(SIZES)
+        }, ensure_ascii=False)
+        images = [
+            f'https://images.example.com/products/{start_id + offset}/{index}.jpg'
+            for index in range(rng.randint(1, 4))
+        ]
+        created_at = now - timedelta(minutes=rng.randint(0, 2 * 365 * 24 * 60))
+        status = _weighted_choice(rng, STATUSES)
+
+        yield {
+            'id': start_id + offset,
+            'name': name[:200],
+            'description': description,
+            'price': round(rng.lognormvariate(4.0, 1.0), 2) + 1,
+            'category': category,
+            'condition': rng.choice(CONDITIONS),
+            'stock_status': status,
+            'face_to_face_only': rng.random() < 0.2,
+            'quantity': 0 if status == 'sold' else 1,
+            'low_stock_threshold': 1,
+            'track_inventory': True,
+            'images': json.dumps(images),
+            'cover_image': images[0],
+            'specifications': specifications,
+            'created_at': created_at,
+            'updated_at': created_at
+        }
+
+
+def generate_orders(count, product_count, seed=7):
+    """生成订单行（字典），商品引用 1..product_count 范围内的产品ID"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    for index in range(count):
+        items = []
+        for _ in range(rng.randint(1, 3)):
+            category, item_en, item_zh, brands = rng.choice(ITEM_TYPES)
+            items.append({
+                'id': rng.randint(1, product_count),
+                'name': f'{rng.choice(brands)} {item_en}',
+                'price': round(rng.lognormvariate(4.0, 1.0), 2) + 1,
+                'quantity': rng.randint(1, 2),
+                'condition': rng.choice(CONDITIONS),
+                'image': ''
+            })
+        delivery_method = rng.choice(['pickup', 'shipping'])
+        total = sum(item['price'] * item['quantity'] for item in items) + (15 if delivery_method == 'shipping' else 0)
+        created_at = now - timedelta(minutes=rng.randint(0, 2 * 365 * 24 * 60))
+
+        yield {
+            'order_number': f'SB{index:012d}',
+            'customer_name': rng.choice(['张小明', '李美丽', 'John Smith', 'Aroha Ngata', '王强', 'Emily Chen']),
+            'customer_email': f'customer{index}@example.com',
+            'customer_phone': f'022{rng.randint(1000000, 9999999)}',
+            'items': json.dumps(items, ensure_ascii=False),
+            'total_amount': round(total, 2),
+            'delivery_method': delivery_method,
+            'payment_method': rng.choice(['anz_transfer', 'bank_transfer', 'cash', 'wechat_alipay']),
+            'status': _weighted_choice(rng, ORDER_STATUSES),
+            'customer_address': '123 Queen Street, Auckland' if delivery_method == 'shipping' else None,
+            'notes': None,
+            'created_at': created_at,
+            'updated_at': created_at
+        }
+
+
+def bulk_insert(table, rows, batch_size=BATCH_SIZE):
+    """按批执行 INSERT（executemany），返回写入行数"""
+    from src.models import db
+
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.session.execute(table.insert(), batch)
+            db.session.commit()
+            total += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+        db.session.commit()
+        total += len(batch)
+    return total
+
+
+def generate_catalog(product_count, order_count, seed=42):
+    """清空并生成商品和订单数据（需在应用上下文中调用），返回耗时统计"""
+    from src.models import (
+        db, Product, Order, OrderItem, Category, init_default_categories, backfill_order_items,
+        rebuild_category_product_counts
+    )
+
+    OrderItem.query.delete()
+    Order.query.delete()
+    Product.query.delete()
+    db.session.commit()
+
+    if Category.query.count() == 0:
+        init_default_categories()
+    category_ids = {name: category_id for category_id, name in db.session.query(Category.id, Category.name)}
+
+    def products():
+        for row in generate_products(product_count, seed=seed):
+            row['category_id'] = category_ids.get(row['category'])
+            yield row
+
+    start_time = time.perf_counter()
+    inserted_products = bulk_insert(Product.__table__, products())
+    # 批量写入绕过了ORM事件，分类计数用一次分组查询重建
+    rebuild_category_product_counts()
+    product_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    inserted_orders = bulk_insert(Order.__table__, generate_orders(order_count, max(product_count, 1), seed=seed + 1))
+    # 批量写入绕过了 set_items，订单商品行按批补写
+    backfill_order_items(batch_size=BATCH_SIZE)
+    order_seconds = time.perf_counter() - start_time
+
+    # PostgreSQL 显式写入主键后需要同步序列
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text(
+            "SELECT setval(pg_get_serial_sequence('products', 'id'), COALESCE(MAX(id), 1)) FROM products"
+        ))
+        db.session.commit()
+
+    return {
+        'products': inserted_products,
+        'orders': inserted_orders,
+        'product_insert_seconds': round(product_seconds, 3),
+        'order_insert_seconds': round(order_seconds, 3),
+        'products_per_second': round(inserted_products / product_seconds) if product_seconds else None
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='生成合成商品目录')
+    parser.add_argument('--products', type=int, default=10000, help='产品数量')
+    parser.add_argument('--orders', type=int, default=None, help='订单数量（默认为产品数量的20%%）')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    from src import create_app
+
+    order_count = args.orders if args.orders is not None else args.products // 5
+    app = create_app('benchmark')
+    with app.app_context():
+        print(f"生成 {args.products} 个产品、{order_count} 个订单 -> {app.config['SQLALCHEMY_DATABASE_URI']}")
+        stats = generate_catalog(args.products, order_count, seed=args.seed)
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
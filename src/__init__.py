@@ -2,7 +2,19 @@ from flask import Flask
 from flask_wtf.csrf import CSRFProtect
 from flask_login import LoginManager
 from .models import db, Admin
+from .db_types import install_json_indexes
 from .email_queue import email_queue
+from .search import search_engine
+from .autocomplete import autocomplete_index
+from .facets import facet_engine
+from .search_cache import search_cache
+from .catalog_version import catalog_version
+from .compression import compressor
+from .cache import cache
+from .page_cache import page_cache
+from .fragment_cache import fragment_cache
+from .site_settings import site_settings
+from .warmup import warm_up, freeze_startup_objects
 from .config import config
 from .i18n import init_babel
 import os
@@ -52,6 +64,7 @@ def create_app(config_name=None):
     def inject_locale():
         from flask_babel import get_locale, get_timezone
         from .i18n import localized_url, get_supported_languages
+        from .page_cache import canonical_url
         
         def current_lang():
             """Get current language for URL building"""
@@ -62,7 +75,8 @@ def create_app(config_name=None):
             get_timezone=get_timezone,
             localized_url=localized_url,
             supported_languages=get_supported_languages(),
-            current_lang=current_lang
+            current_lang=current_lang,
+            canonical_url=canonical_url
         )
     
     # Language redirect handler
@@ -96,7 +110,27 @@ def create_app(config_name=None):
 
     with app.app_context():
         db.create_all()
+        install_json_indexes(db)
     
-    email_queue.start_worker()
+    # 初始化商品搜索后端
+    search_engine.init_app(app)
+    autocomplete_index.init_app(app)
+    facet_engine.init_app(app)
+    search_cache.init_app(app)
+    catalog_version.init_app(app)
+    compressor.init_app(app)
+    cache.init_app(app)
+    page_cache.init_app(app)
+    fragment_cache.init_app(app)
+    site_settings.init_app(app)
+
+    # 启动预热：编译模板、加载翻译和常用数据，避免首批请求承担冷启动开销
+    if app.config.get('WARMUP_ON_STARTUP'):
+        warm_up(app)
+        freeze_startup_objects()
+    
+    # 在 gunicorn 主进程中预加载时，邮件队列线程由 fork 后的工作进程启动（src/warmup.py）
+    if not app.config.get('PRELOAD_APP'):
+        email_queue.start_worker()
 
     return app
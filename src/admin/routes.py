@@ -17,6 +17,9 @@ from ..models import get_site_info_sections, get_site_info_section_by_key, get_a
 from ..utils import sanitize_user_input, sanitize_rich_text, validate_form_data, validate_email_address
 from ..file_upload import upload_image, delete_image, get_image_url
 from ..api_auth import APIKeyManager
+from ..search_cache import search_cache
+from ..cache import cache
+from ..site_info import invalidate_site_info
 import logging
 logger = logging.getLogger(__name__)
 from . import admin
@@ -980,6 +983,26 @@ def analytics_api_trend():
         })
 
 
+@admin.route('/analytics/api/search-cache')
+@login_required
+def analytics_api_search_cache():
+    """搜索结果缓存统计API"""
+    return jsonify({
+        'success': True,
+        'data': search_cache.get_stats()
+    })
+
+
+@admin.route('/analytics/api/cache')
+@login_required
+def analytics_api_cache():
+    """应用缓存统计API"""
+    return jsonify({
+        'success': True,
+        'data': cache.get_stats()
+    })
+
+
 # =================
 # 分类管理路由
 # =================
@@ -1451,6 +1474,7 @@ def edit_item(item_id):
                     db.session.delete(en_translation)
             
             db.session.commit()
+            invalidate_site_info()
             logger.info(f'站点信息项更新成功: {item.key} - 管理员: {current_user.username}')
             flash('信息项更新成功', 'success')
             return redirect(url_for('admin.edit_section', section_id=item.section_id))
@@ -1528,6 +1552,7 @@ def add_item(section_id):
             item.set_content(content)
             db.session.add(item)
             db.session.commit()
+            invalidate_site_info()
             
             logger.info(f'站点信息项添加成功: {item.key} - 管理员: {current_user.username}')
             flash('信息项添加成功', 'success')
@@ -1556,6 +1581,7 @@ def delete_item(item_id):
         # 删除项目（包括相关翻译，由于cascade设置会自动删除）
         db.session.delete(item)
         db.session.commit()
+        invalidate_site_info()
         
         logger.info(f'站点信息项删除成功: {item.key} - 管理员: {current_user.username}')
         flash('信息项删除成功', 'success')
@@ -3,7 +3,17 @@ from functools import wraps
 import time
 import sys
 from . import api
-from ..models import Product, Category, APIUsageLog, get_all_categories, get_product_by_id, get_products_by_category
+from ..models import (
+    Product, Category, APIUsageLog, get_categories_query, get_products_by_category_query,
+    filter_products_by_specifications
+)
+from ..autocomplete import autocomplete_index
+from ..cache import cache
+from ..catalog_version import conditional_catalog
+from ..serializers import (
+    NDJSON_MIMETYPE, InvalidFields, ProductSerializer, CategorySerializer, parse_fields,
+    json_response, ndjson_response, serialize_products, serialize_categories, iter_serialized_products
+)
 
 
 def log_api_usage(f):
@@ -107,31 +117,91 @@ def index():
         }
     })
 
+def fields_param(serializer_class):
+    """读取 ?fields= 稀疏字段参数"""
+    return parse_fields(request.args.get('fields', ''), serializer_class.FIELDS)
+
+def invalid_fields_response(error):
+    return jsonify({'error': str(error), 'allowed_fields': list(error.allowed)}), 400
+
+# 规格筛选参数前缀：?spec.brand=Apple&spec.ram=8GB
+SPEC_PARAM_PREFIX = 'spec.'
+
+def spec_params():
+    """读取 ?spec.<规格键>=<值> 规格筛选参数"""
+    return {
+        key[len(SPEC_PARAM_PREFIX):]: value
+        for key, value in request.args.items()
+        if key.startswith(SPEC_PARAM_PREFIX)
+    }
+
 @api.route('/products', methods=['GET'])
 @log_api_usage
+@conditional_catalog
 def get_products():
-    products = Product.query.filter(Product.stock_status == Product.STATUS_AVAILABLE).all()
-    return jsonify([product.to_dict() for product in products])
+    try:
+        fields = fields_param(ProductSerializer)
+    except InvalidFields as e:
+        return invalid_fields_response(e)
+
+    query = Product.query.filter(Product.stock_status == Product.STATUS_AVAILABLE)
+    try:
+        query = filter_products_by_specifications(query, spec_params())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if _wants_stream():
+        # 流式模式：逐行输出NDJSON，不在内存中构建完整列表
+        return ndjson_response(iter_serialized_products(query.order_by(Product.id), fields))
+    return json_response(serialize_products(query, fields))
+
+def _wants_stream():
+    """请求是否要求流式NDJSON（?stream=1 或 Accept: application/x-ndjson）"""
+    if request.args.get('stream') in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
 
 @api.route('/products/<int:product_id>', methods=['GET'])
 @log_api_usage
+@conditional_catalog
 def get_product(product_id):
-    product = get_product_by_id(product_id)
-    if product:
-        return jsonify(product.to_dict())
+    try:
+        fields = fields_param(ProductSerializer)
+    except InvalidFields as e:
+        return invalid_fields_response(e)
+
+    products = serialize_products(Product.query.filter(Product.id == product_id), fields)
+    if products:
+        return json_response(products[0])
     return jsonify({'error': 'Product not found'}), 404
 
 @api.route('/categories', methods=['GET'])
 @log_api_usage
+@conditional_catalog
 def get_categories():
-    categories = get_all_categories()
-    return jsonify([category.to_dict() for category in categories])
+    try:
+        fields = fields_param(CategorySerializer)
+    except InvalidFields as e:
+        return invalid_fields_response(e)
+
+    return json_response(serialized_categories(fields))
+
+
+@cache.memoize(('categories', 'products'), timeout=cache.capped_timeout)
+def serialized_categories(fields):
+    """序列化的分类列表（商品数量依赖产品，产品或分类变更后失效；进程内缓存后端上按较短时间过期）"""
+    return serialize_categories(get_categories_query(), fields)
 
 @api.route('/categories/<int:category_id>/products', methods=['GET'])
 @log_api_usage
+@conditional_catalog
 def get_products_in_category(category_id):
-    products = get_products_by_category(category_id)
-    return jsonify([product.to_dict() for product in products])
+    try:
+        fields = fields_param(ProductSerializer)
+    except InvalidFields as e:
+        return invalid_fields_response(e)
+
+    return json_response(serialize_products(get_products_by_category_query(category_id), fields))
 
 @api.route('/search/suggestions', methods=['GET'])
 @log_api_usage
@@ -142,62 +212,9 @@ def search_suggestions():
     if len(query) < 2:
         return jsonify([])
     
-    suggestions = []
-    seen_texts = set()  # 避免重复建议
-    
-    # 搜索商品名称（优先匹配）
-    products = Product.query.filter(
-        Product.name.ilike(f'%{query}%'),
-        Product.stock_status == Product.STATUS_AVAILABLE
-    ).order_by(Product.name.desc()).limit(5).all()
-    
-    for product in products:
-        if product.name not in seen_texts:
-            suggestions.append({
-                'text': product.name,
-                'type': 'product',
-                'category': product.get_category_display(),
-                'price': f"${product.price}",
-                'condition': product.condition
-            })
-            seen_texts.add(product.name)
-    
-    # 搜索商品描述（如果名称匹配不够）
-    if len(suggestions) < 5:
-        desc_products = Product.query.filter(
-            Product.description.ilike(f'%{query}%'),
-            Product.stock_status == Product.STATUS_AVAILABLE,
-            ~Product.name.ilike(f'%{query}%')  # 排除已经通过名称匹配的
-        ).order_by(Product.created_at.desc()).limit(3).all()
-        
-        for product in desc_products:
-            if product.name not in seen_texts:
-                suggestions.append({
-                    'text': product.name,
-                    'type': 'product',
-                    'category': product.get_category_display(),
-                    'price': f"${product.price}",
-                    'condition': product.condition
-                })
-                seen_texts.add(product.name)
-    
-    # 搜索分类
-    from ..models import Product
-    for category_code, category_name in Product.CATEGORIES:
-        if query.lower() in category_name.lower() and category_name not in seen_texts:
-            # 获取该分类的商品数量
-            count = Product.query.filter(
-                Product.category == category_code,
-                Product.stock_status == Product.STATUS_AVAILABLE
-            ).count()
-            
-            suggestions.append({
-                'text': category_name,
-                'type': 'category',
-                'category': None,
-                'count': count
-            })
-            seen_texts.add(category_name)
+    # 商品名称、描述和分类建议均来自内存索引，不访问数据库
+    suggestions = autocomplete_index.suggest(query)
+    seen_texts = {suggestion['text'] for suggestion in suggestions}  # 避免重复建议
     
     # 智能建议：如果查询包含价格相关词汇
     price_keywords = ['便宜', '贵', '价格', '多少钱', '优惠']
@@ -0,0 +1,375 @@
+"""
+搜索建议索引
+商品名称二元组(bigram)索引 + 描述词元前缀索引 + 分类商品计数，
+全部驻留内存并随产品变更增量刷新；
+多进程部署时每 SEARCH_INDEX_SYNC_INTERVAL 秒检查一次目录版本戳，发现其他进程的写入后重建
+"""
+
+import bisect
+import heapq
+import threading
+import time
+import logging
+from collections import Counter
+from .models import db, Product, Category
+from .search import tokenize, strip_tags, advance_stamp
+from .signals import product_changed, category_changed, snapshot_product, init_model_signals
+
+logger = logging.getLogger(__name__)
+
+
+def name_grams(text):
+    """切分名称为二元组（单字符名称返回自身）"""
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class AutocompleteIndex:
+    """搜索建议索引"""
+
+    # 各类建议的数量上限（与原有行为保持一致）
+    NAME_LIMIT = 5
+    DESCRIPTION_LIMIT = 3
+
+    # 候选集超过该大小时改为按名称顺序扫描，命中足够数量即停止
+    SCAN_THRESHOLD = 256
+
+    # 查询结果缓存上限（索引变化时清空）
+    RESULT_CACHE_SIZE = 1024
+
+    def __init__(self):
+        self.app = None
+        self.ready = False
+        self.sync_interval = 30
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()  # 同一时间只有一个线程检查/重建
+        self._stamp = None
+        self._last_sync = 0.0
+        self._entries = {}  # product_id -> 建议条目
+        self._name_grams = {}  # 名称二元组 -> 产品ID集合
+        self._desc_terms = {}  # 描述词元 -> 产品ID集合
+        self._desc_vocab = []  # 已排序的描述词元，用于前缀查找
+        self._names_sorted = []  # 按名称排序的 (名称, 产品ID)
+        self._result_cache = {}  # 查询文本 -> 建议列表
+        self._category_counts = Counter()  # 分类代码 -> 可用商品数量
+        self._category_names = {}  # 分类ID -> 显示名称
+        self._category_updated = {}  # 分类ID -> 更新时间（推算目录戳）
+
+    def init_app(self, app):
+        """绑定应用、注册变更监听并构建索引"""
+        self.app = app
+        self.sync_interval = app.config.get('SEARCH_INDEX_SYNC_INTERVAL', 30)
+
+        init_model_signals()
+        product_changed.connect(self._on_product_changed)
+        category_changed.connect(self._on_category_changed)
+
+        with app.app_context():
+            self.rebuild()
+
+    def rebuild(self):
+        """从数据库全量重建索引（在新实例中构建，完成后整体替换）"""
+        start_time = time.time()
+        # 先取目录戳再读取数据，读取期间其他进程的写入会在下次同步时发现
+        stamp = self._catalog_stamp()
+        category_rows = db.session.query(Category.id, Category.display_name, Category.updated_at).all()
+        category_names = {category_id: display_name for category_id, display_name, _ in category_rows}
+        rows = db.session.query(
+            Product.id, Product.name, Product.description, Product.category,
+            Product.category_id, Product.condition, Product.specifications,
+            Product.stock_status, Product.price, Product.face_to_face_only,
+            Product.created_at, Product.updated_at
+        ).filter(Product.stock_status == Product.STATUS_AVAILABLE).yield_per(1000)
+
+        fresh = AutocompleteIndex()
+        fresh._category_names = category_names
+        for row in rows:
+            fresh._add(snapshot_product(row), keep_sorted=False)
+
+        with self._lock:
+            self._entries = fresh._entries
+            self._name_grams = fresh._name_grams
+            self._desc_terms = fresh._desc_terms
+            self._desc_vocab = sorted(fresh._desc_terms)
+            self._names_sorted = sorted((entry['name'], pid) for pid, entry in fresh._entries.items())
+            self._category_counts = fresh._category_counts
+            self._category_names = category_names
+            self._category_updated = {category_id: updated_at for category_id, _, updated_at in category_rows}
+            self._result_cache = {}
+            self._stamp = stamp
+            self._last_sync = time.monotonic()
+            self.ready = True
+
+        logger.info(f'搜索建议索引构建完成: {len(fresh._entries)}个商品, 耗时{(time.time() - start_time) * 1000:.1f}ms')
+
+    def _add(self, snapshot, keep_sorted=True):
+        """添加单个产品（调用方持有锁）"""
+        if snapshot['stock_status'] != Product.STATUS_AVAILABLE:
+            return
+
+        name_lower = snapshot['name'].lower()
+        entry = {
+            'id': snapshot['id'],
+            'name': snapshot['name'],
+            'name_lower': name_lower,
+            'category': snapshot['category'],
+            'category_id': snapshot['category_id'],
+            'condition': snapshot['condition'],
+            'price': snapshot['price'],
+            'created_at': snapshot['created_at'],
+            'updated_at': snapshot['updated_at'],
+            'grams': name_grams(name_lower),
+            'desc_terms': set(tokenize(strip_tags(snapshot['description'])))
+        }
+        self._entries[entry['id']] = entry
+        self._category_counts[entry['category']] += 1
+        if keep_sorted:
+            bisect.insort(self._names_sorted, (entry['name'], entry['id']))
+
+        for gram in entry['grams']:
+            self._name_grams.setdefault(gram, set()).add(entry['id'])
+        for term in entry['desc_terms']:
+            if term not in self._desc_terms:
+                self._desc_terms[term] = set()
+                if keep_sorted:
+                    bisect.insort(self._desc_vocab, term)
+            self._desc_terms[term].add(entry['id'])
+
+    def _remove(self, product_id):
+        """移除单个产品（调用方持有锁）"""
+        entry = self._entries.pop(product_id, None)
+        if not entry:
+            return
+
+        self._category_counts[entry['category']] -= 1
+        if self._category_counts[entry['category']] <= 0:
+            del self._category_counts[entry['category']]
+
+        position = bisect.bisect_left(self._names_sorted, (entry['name'], product_id))
+        if position < len(self._names_sorted) and self._names_sorted[position] == (entry['name'], product_id):
+            del self._names_sorted[position]
+
+        for gram in entry['grams']:
+            ids = self._name_grams.get(gram)
+            if ids is not None:
+                ids.discard(product_id)
+                if not ids:
+                    del self._name_grams[gram]
+        for term in entry['desc_terms']:
+            ids = self._desc_terms.get(term)
+            if ids is not None:
+                ids.discard(product_id)
+                if not ids:
+                    del self._desc_terms[term]
+                    position = bisect.bisect_left(self._desc_vocab, term)
+                    if position < len(self._desc_vocab) and self._desc_vocab[position] == term:
+                        del self._desc_vocab[position]
+
+    def _on_product_changed(self, sender, upserts=None, deleted=None, **extra):
+        """产品变更提交后增量刷新"""
+        if not self.ready:
+            return
+
+        upserts = upserts or {}
+        with self._lock:
+            count = len(self._entries)
+            previous = {product_id: self._entries[product_id]
+                        for product_id in set(deleted or ()) | set(upserts) if product_id in self._entries}
+            for product_id in deleted or ():
+                self._remove(product_id)
+            for snapshot in upserts.values():
+                self._remove(snapshot['id'])
+                self._add(snapshot)
+            self._result_cache = {}
+            # 按本进程的变更推算目录戳，同步时仍能发现同一期间其他进程的写入
+            self._advance_stamp(
+                0, len(self._entries) - count,
+                [snapshot['updated_at'] for product_id, snapshot in upserts.items() if product_id in self._entries],
+                [entry['updated_at'] for product_id, entry in previous.items() if product_id not in self._entries]
+            )
+
+    def _on_category_changed(self, sender, upserts=None, deleted=None, **extra):
+        """分类变更提交后刷新显示名称"""
+        upserts = upserts or {}
+        with self._lock:
+            count = len(self._category_names)
+            removed = [self._category_updated.pop(category_id, None) for category_id in deleted or ()]
+            for category_id in deleted or ():
+                self._category_names.pop(category_id, None)
+            for snapshot in upserts.values():
+                self._category_names[snapshot['id']] = snapshot['display_name']
+                self._category_updated[snapshot['id']] = snapshot['updated_at']
+            self._result_cache = {}
+            self._advance_stamp(2, len(self._category_names) - count,
+                                [snapshot['updated_at'] for snapshot in upserts.values()], removed)
+
+    def _advance_stamp(self, offset, count_delta, upserted, removed):
+        """按本进程的变更推算目录戳的商品部分（offset=0）或分类部分（offset=2），调用方持有锁"""
+        if self._stamp is None:
+            return
+        part = advance_stamp(self._stamp[offset:offset + 2], count_delta, upserted, removed)
+        if part is None:
+            self._stamp = None
+        else:
+            self._stamp = self._stamp[:offset] + part + self._stamp[offset + 2:]
+
+    @staticmethod
+    def _catalog_stamp():
+        """获取目录版本戳（可用商品数量和最近更新时间 + 分类数量和最近更新时间）"""
+        product_count, product_updated = db.session.query(
+            db.func.count(Product.id),
+            db.func.max(Product.updated_at)
+        ).filter(Product.stock_status == Product.STATUS_AVAILABLE).one()
+        category_count, category_updated = db.session.query(
+            db.func.count(Category.id),
+            db.func.max(Category.updated_at)
+        ).one()
+        return product_count, product_updated, category_count, category_updated
+
+    def _sync_if_stale(self):
+        """
+        定期检查其他进程写入的变更，必要时重建索引；
+        不持有索引锁调用，其他线程正在检查或重建时直接返回，继续使用当前索引
+        """
+        if not self.sync_interval or time.monotonic() - self._last_sync < self.sync_interval:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return
+
+        try:
+            stamp = self._catalog_stamp()
+            self._last_sync = time.monotonic()
+            with self._lock:
+                stale = stamp != self._stamp
+            if stale:
+                logger.info('检测到商品目录变化，重建搜索建议索引')
+                self.rebuild()
+        finally:
+            self._sync_lock.release()
+
+    def clear_cache(self):
+        """清空查询结果缓存"""
+        with self._lock:
+            self._result_cache = {}
+
+    def _category_display(self, entry):
+        """获取分类显示名称（与 Product.get_category_display 一致）"""
+        display_name = self._category_names.get(entry['category_id'])
+        if display_name:
+            return display_name
+        return dict(Product.CATEGORIES).get(entry['category'], entry['category'])
+
+    def _product_suggestion(self, entry):
+        """生成商品建议条目"""
+        return {
+            'text': entry['name'],
+            'type': 'product',
+            'category': self._category_display(entry),
+            'price': f"${entry['price']:.2f}",
+            'condition': entry['condition']
+        }
+
+    def _match_names(self, query_lower):
+        """查找名称包含查询文本的商品，返回 (按名称倒序的前N个条目, 全部命中ID或None)"""
+        grams = name_grams(query_lower)
+        postings = [self._name_grams.get(gram) for gram in grams]
+        if not postings or any(ids is None for ids in postings):
+            return [], set()
+        postings.sort(key=len)
+
+        # 从最小的集合开始求交集
+        candidates = postings[0].intersection(*postings[1:])
+        if not candidates:
+            return [], set()
+
+        if len(candidates) > self.SCAN_THRESHOLD:
+            # 高频查询：按名称倒序扫描，命中足够数量即停止
+            top = []
+            for name, pid in reversed(self._names_sorted):
+                if pid in candidates and query_lower in self._entries[pid]['name_lower']:
+                    top.append(self._entries[pid])
+                    if len(top) >= self.NAME_LIMIT:
+                        return top, None
+            return top, {entry['id'] for entry in top}
+
+        # 低频查询：校验子串后取名称倒序前N个
+        matched = {pid for pid in candidates if query_lower in self._entries[pid]['name_lower']}
+        top = heapq.nlargest(
+            self.NAME_LIMIT, (self._entries[pid] for pid in matched),
+            key=lambda entry: (entry['name'], entry['id'])
+        )
+        return top, matched
+
+    def _match_descriptions(self, query_lower):
+        """查找描述中有词元以查询词元开头的商品ID"""
+        matched = None
+        for token in tokenize(query_lower):
+            ids = set()
+            position = bisect.bisect_left(self._desc_vocab, token)
+            while position < len(self._desc_vocab) and self._desc_vocab[position].startswith(token):
+                ids |= self._desc_terms[self._desc_vocab[position]]
+                position += 1
+            matched = ids if matched is None else matched & ids
+            if not matched:
+                return set()
+        return matched or set()
+
+    def suggest(self, query):
+        """获取商品和分类建议"""
+        query_lower = query.lower()
+        self._sync_if_stale()
+
+        with self._lock:
+            cached = self._result_cache.get(query_lower)
+            if cached is not None:
+                return list(cached)
+
+            suggestions = []
+            seen_texts = set()  # 避免重复建议
+
+            # 搜索商品名称（优先匹配）
+            top_names, name_ids = self._match_names(query_lower)
+            for entry in top_names:
+                if entry['name'] not in seen_texts:
+                    suggestions.append(self._product_suggestion(entry))
+                    seen_texts.add(entry['name'])
+
+            # 搜索商品描述（如果名称匹配不够）
+            if len(suggestions) < self.NAME_LIMIT:
+                desc_ids = self._match_descriptions(query_lower) - (name_ids or set())
+                newest = heapq.nlargest(
+                    self.DESCRIPTION_LIMIT, (self._entries[pid] for pid in desc_ids),
+                    key=lambda entry: (entry['created_at'] is not None, entry['created_at'] or 0, entry['id'])
+                )
+                for entry in newest:
+                    if entry['name'] not in seen_texts:
+                        suggestions.append(self._product_suggestion(entry))
+                        seen_texts.add(entry['name'])
+
+            # 搜索分类
+            for category_code, category_name in Product.CATEGORIES:
+                if query_lower in category_name.lower() and category_name not in seen_texts:
+                    suggestions.append({
+                        'text': category_name,
+                        'type': 'category',
+                        'category': None,
+                        'count': self._category_counts.get(category_code, 0)
+                    })
+                    seen_texts.add(category_name)
+
+            if len(self._result_cache) >= self.RESULT_CACHE_SIZE:
+                self._result_cache = {}
+            self._result_cache[query_lower] = suggestions
+
+        return list(suggestions)
+
+    def get_category_count(self, category_code):
+        """获取分类下的可用商品数量"""
+        self._sync_if_stale()
+        with self._lock:
+            return self._category_counts.get(category_code, 0)
+
+
+# 全局搜索建议索引实例
+autocomplete_index = AutocompleteIndex()
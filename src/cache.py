@@ -0,0 +1,462 @@
+"""
+应用缓存
+统一的缓存接口和可替换的后端：
+- memory: 进程内 LRU + TTL
+- sqlite: 本机磁盘上的 SQLite 文件，同一台机器上的多个 gunicorn 进程共享
+- redis: Redis 协议客户端（redis-py 兼容接口，测试中可用本地替身对象代替）
+缓存键按命名空间组织，命名空间失效时只更新其版本号，旧条目不再可达并由TTL/LRU回收；
+产品和分类变更提交后自动使对应命名空间失效。
+memory 后端的失效只作用于本进程，依赖失效的条目用 capped_timeout() 限制过期时间，
+其他工作进程的写入最迟在 CACHE_LOCAL_TIMEOUT 秒后可见。
+后端出错（Redis 不可达、SQLite 文件被锁等）时记录日志并按未命中/不缓存处理，不影响请求
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from .signals import product_changed, category_changed, init_model_signals
+
+logger = logging.getLogger(__name__)
+
+# 缓存未命中标记（允许缓存 None）
+MISSING = object()
+
+
+def _new_version():
+    """命名空间版本号：随机值，版本记录丢失后重建也不会与旧条目冲突"""
+    return uuid.uuid4().hex[:12]
+
+
+class NullBackend:
+    """不缓存任何内容（CACHE_BACKEND=null）"""
+
+    name = 'null'
+    shared = False
+
+    def get(self, key):
+        return MISSING
+
+    def set(self, key, value, timeout):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def get_version(self, key):
+        return '0'
+
+    def bump_version(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+    def get_stats(self):
+        return {}
+
+    def reset_connections(self):
+        pass
+
+
+class MemoryBackend:
+    """进程内 LRU + TTL 后端"""
+
+    name = 'memory'
+    # 每个进程各有一份，失效只作用于本进程
+    shared = False
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # 键 -> (过期时间, 值)
+        self._versions = {}  # 命名空间版本不参与LRU淘汰
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_version(self, key):
+        with self._lock:
+            return self._versions.setdefault(key, _new_version())
+
+    def bump_version(self, key):
+        with self._lock:
+            self._versions[key] = _new_version()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def get_stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries, 'evictions': self.evictions}
+
+    def reset_connections(self):
+        # fork 时锁可能正被主进程的其他线程持有，子进程中换用新锁
+        self._lock = threading.Lock()
+
+
+class SQLiteBackend:
+    """SQLite 文件后端：每个线程一个连接，WAL 模式允许多个进程并发读写"""
+
+    name = 'sqlite'
+    shared = True
+
+    def __init__(self, path, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._inherited_locals = []
+        self.evictions = 0
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS cache_entries '
+            '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS idx_cache_entries_expires ON cache_entries (expires_at)')
+        connection.execute('CREATE TABLE IF NOT EXISTS cache_versions (key TEXT PRIMARY KEY, version TEXT NOT NULL)')
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # 自动提交模式，每条语句单独成为一个事务
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            self._local.connection = connection
+        return connection
+
+    def reset_connections(self):
+        """
+        fork 后在子进程中调用：丢弃从父进程继承的连接，之后各线程重新连接。
+        SQLite 连接不能跨 fork 使用，也不能在子进程中关闭，继承的连接只保留引用
+        """
+        self._inherited_locals.append(self._local)
+        self._local = threading.local()
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        if row is None:
+            return MISSING
+        return pickle.loads(row[0])
+
+    def set(self, key, value, timeout):
+        connection = self._connection()
+        connection.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), time.time() + timeout)
+        )
+        # 每100次写入检查一次容量：先删除过期条目，仍超出时删除最早过期的条目
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._prune(connection)
+
+    def _prune(self, connection):
+        connection.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (time.time(),))
+        count = connection.execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+        if count > self.max_entries:
+            excess = count - self.max_entries
+            connection.execute(
+                'DELETE FROM cache_entries WHERE key IN '
+                '(SELECT key FROM cache_entries ORDER BY expires_at LIMIT ?)', (excess,)
+            )
+            self.evictions += excess
+
+    def delete(self, key):
+        self._connection().execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+
+    def get_version(self, key):
+        connection = self._connection()
+        row = connection.execute('SELECT version FROM cache_versions WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            return row[0]
+        connection.execute('INSERT OR IGNORE INTO cache_versions (key, version) VALUES (?, ?)', (key, _new_version()))
+        return connection.execute('SELECT version FROM cache_versions WHERE key = ?', (key,)).fetchone()[0]
+
+    def bump_version(self, key):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO cache_versions (key, version) VALUES (?, ?)', (key, _new_version())
+        )
+
+    def clear(self):
+        connection = self._connection()
+        connection.execute('DELETE FROM cache_entries')
+        connection.execute('DELETE FROM cache_versions')
+
+    def get_stats(self):
+        count = self._connection().execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+        return {'entries': count, 'max_entries': self.max_entries, 'evictions': self.evictions, 'path': self.path}
+
+
+class RedisBackend:
+    """
+    Redis 协议后端
+    client 需要提供 get / set(ex=) / delete / scan_iter 方法（redis-py 的 Redis 对象即可），
+    容量和淘汰由 Redis 的 maxmemory 策略负责
+    """
+
+    name = 'redis'
+    shared = True
+
+    def __init__(self, client, prefix=''):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, prefix=''):
+        import redis  # 可选依赖，只在使用 redis 后端时需要
+        return cls(redis.Redis.from_url(url), prefix)
+
+    def get(self, key):
+        data = self.client.get(self.prefix + key)
+        if data is None:
+            return MISSING
+        return pickle.loads(data)
+
+    def set(self, key, value, timeout):
+        self.client.set(self.prefix + key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ex=max(1, int(timeout)))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def get_version(self, key):
+        full_key = self.prefix + 'version:' + key
+        version = self.client.get(full_key)
+        if version is None:
+            # 只在版本记录不存在时写入，并发写入时以先写入的为准
+            self.client.set(full_key, _new_version(), nx=True)
+            version = self.client.get(full_key)
+        return version.decode('utf-8') if isinstance(version, bytes) else version
+
+    def bump_version(self, key):
+        self.client.set(self.prefix + 'version:' + key, _new_version())
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def get_stats(self):
+        return {}
+
+    def reset_connections(self):
+        # redis-py 的连接池按进程号检测 fork，自动为子进程建立新连接
+        pass
+
+
+class Cache:
+    """应用缓存：命名空间、装饰器和命中统计"""
+
+    def __init__(self):
+        self.backend = MemoryBackend()
+        self.default_timeout = 300
+        self.local_timeout = 10
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {'hits': 0, 'misses': 0, 'invalidations': 0, 'errors': 0})
+
+    def init_app(self, app):
+        """根据配置创建后端并注册产品/分类变更监听"""
+        self.default_timeout = app.config.get('CACHE_DEFAULT_TIMEOUT', self.default_timeout)
+        self.local_timeout = app.config.get('CACHE_LOCAL_TIMEOUT', self.local_timeout)
+        self.backend = self._create_backend(app)
+        self.reset_stats()
+        if self.backend.name == 'memory':
+            self.backend.clear()
+
+        init_model_signals()
+        product_changed.connect(self._on_product_changed)
+        category_changed.connect(self._on_category_changed)
+        logger.info(f'应用缓存后端: {self.backend.name}')
+
+    def _create_backend(self, app):
+        backend_name = app.config.get('CACHE_BACKEND', 'memory')
+        max_entries = app.config.get('CACHE_MAX_ENTRIES', 2048)
+        prefix = app.config.get('CACHE_KEY_PREFIX', 'sara:')
+
+        try:
+            if backend_name == 'null':
+                return NullBackend()
+            if backend_name == 'sqlite':
+                path = app.config.get('CACHE_SQLITE_PATH') or os.path.join(app.instance_path, 'cache.db')
+                return SQLiteBackend(path, max_entries)
+            if backend_name == 'redis':
+                return RedisBackend.from_url(app.config.get('CACHE_REDIS_URL', 'redis://localhost:6379/0'), prefix)
+        except ImportError:
+            logger.error(f'缓存后端 {backend_name} 缺少依赖包，应用缓存回退到进程内缓存')
+        except Exception as e:
+            logger.error(f'缓存后端 {backend_name} 初始化失败，应用缓存回退到进程内缓存: {str(e)}')
+        return MemoryBackend(max_entries)
+
+    def _full_key(self, namespaces, key):
+        """缓存键包含各命名空间的当前版本"""
+        versions = ','.join(f'{namespace}@{self.backend.get_version(namespace)}' for namespace in namespaces)
+        return f'{versions}|{key}'
+
+    @staticmethod
+    def _namespaces(namespace):
+        return (namespace,) if isinstance(namespace, str) else tuple(namespace)
+
+    def _record(self, namespace, result):
+        with self._lock:
+            self._stats[namespace][result] += 1
+
+    def get(self, namespace, key):
+        """
+        读取缓存，未命中返回 MISSING；namespace 可以是多个命名空间，任一失效即失效
+        后端出错时记录日志并按未命中处理
+        """
+        namespaces = self._namespaces(namespace)
+        try:
+            value = self.backend.get(self._full_key(namespaces, key))
+        except Exception as e:
+            logger.warning(f'缓存读取失败({self.backend.name}): {str(e)}')
+            self._record(namespaces[0], 'errors')
+            value = MISSING
+        self._record(namespaces[0], 'misses' if value is MISSING else 'hits')
+        return value
+
+    def set(self, namespace, key, value, timeout=None):
+        """写入缓存，后端出错时记录日志后跳过"""
+        timeout = self.default_timeout if timeout is None else timeout
+        namespaces = self._namespaces(namespace)
+        try:
+            self.backend.set(self._full_key(namespaces, key), value, timeout)
+        except Exception as e:
+            logger.warning(f'缓存写入失败({self.backend.name}): {str(e)}')
+            self._record(namespaces[0], 'errors')
+
+    def delete(self, namespace, key):
+        """删除单个条目，后端出错时记录日志后跳过"""
+        namespaces = self._namespaces(namespace)
+        try:
+            self.backend.delete(self._full_key(namespaces, key))
+        except Exception as e:
+            logger.warning(f'缓存删除失败({self.backend.name}): {str(e)}')
+            self._record(namespaces[0], 'errors')
+
+    def capped_timeout(self, timeout=None):
+        """依赖失效的条目的过期时间：后端不跨进程共享时不超过 local_timeout（其他进程的失效到达不了本进程）"""
+        timeout = self.default_timeout if timeout is None else timeout
+        return timeout if self.backend.shared else min(timeout, self.local_timeout)
+
+    def get_or_set(self, namespace, key, compute, timeout=None):
+        """读取缓存，未命中时调用 compute() 计算并写入"""
+        value = self.get(namespace, key)
+        if value is MISSING:
+            value = compute()
+            self.set(namespace, key, value, timeout)
+        return value
+
+    def invalidate(self, *namespaces):
+        """使命名空间下的全部条目失效（所有共享该后端的进程同时生效）"""
+        for namespace in namespaces:
+            try:
+                self.backend.bump_version(namespace)
+            except Exception as e:
+                logger.error(f'缓存命名空间 {namespace} 失效失败({self.backend.name}): {str(e)}')
+                self._record(namespace, 'errors')
+                continue
+            self._record(namespace, 'invalidations')
+
+    def memoize(self, namespace, timeout=None):
+        """
+        缓存函数返回值的装饰器，缓存键由函数名和参数生成
+        被装饰函数应返回可序列化的纯数据（不要返回ORM实例），可用 func.uncached 绕过缓存；
+        timeout 可以是可调用对象，写入时求值（例如 cache.capped_timeout，后端在 init_app 时才确定）
+        """
+        def decorator(func):
+            qualified_name = f'{func.__module__}.{func.__qualname__}'
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                key = f'{qualified_name}:{args!r}:{sorted(kwargs.items())!r}'
+                return self.get_or_set(namespace, key, lambda: func(*args, **kwargs),
+                                       timeout() if callable(timeout) else timeout)
+
+            wrapper.uncached = func
+            return wrapper
+        return decorator
+
+    def clear(self):
+        """清空后端全部条目"""
+        try:
+            self.backend.clear()
+        except Exception as e:
+            logger.error(f'清空缓存失败({self.backend.name}): {str(e)}')
+
+    def reset_after_fork(self):
+        """fork 后在工作进程中调用：重建后端连接"""
+        self.backend.reset_connections()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+    def _on_product_changed(self, sender, **extra):
+        self.invalidate('products')
+
+    def _on_category_changed(self, sender, **extra):
+        self.invalidate('categories')
+
+    def get_stats(self):
+        """命中统计（当前进程）和后端状态"""
+        with self._lock:
+            namespaces = {namespace: dict(stats) for namespace, stats in self._stats.items()}
+        hits = sum(stats['hits'] for stats in namespaces.values())
+        misses = sum(stats['misses'] for stats in namespaces.values())
+        for stats in namespaces.values():
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+
+        try:
+            backend_stats = self.backend.get_stats()
+        except Exception as e:
+            logger.warning(f'读取缓存后端状态失败({self.backend.name}): {str(e)}')
+            backend_stats = {}
+
+        return {
+            'backend': self.backend.name,
+            'default_timeout': self.default_timeout,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            'namespaces': namespaces,
+            **backend_stats
+        }
+
+
+# 全局应用缓存实例
+cache = Cache()
@@ -0,0 +1,114 @@
+"""
+商品目录版本
+由产品和分类的行数与最后更新时间计算出目录版本，用于 API 的 ETag / Last-Modified 条件请求；
+版本在进程内缓存，产品或分类变更提交后失效，TTL 用于兜底其他进程的写入
+"""
+
+import hashlib
+import threading
+import time
+import logging
+from functools import wraps
+from flask import request, make_response
+from .models import db, Product, Category
+from .signals import product_changed, category_changed, init_model_signals
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogVersion:
+    """商品目录版本"""
+
+    def __init__(self, ttl=5):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cached = None  # (过期时间, 版本号, 最后修改时间)
+
+    def init_app(self, app):
+        """读取配置并注册变更监听"""
+        self.ttl = app.config.get('CATALOG_VERSION_TTL', self.ttl)
+        self.invalidate()
+
+        init_model_signals()
+        product_changed.connect(self._on_changed)
+        category_changed.connect(self._on_changed)
+
+    def invalidate(self):
+        with self._lock:
+            self._cached = None
+
+    def _on_changed(self, sender, **extra):
+        self.invalidate()
+
+    def _compute(self):
+        """两条聚合查询：行数反映新增和删除，最后更新时间反映修改"""
+        product_count, product_updated = db.session.query(
+            db.func.count(Product.id), db.func.max(Product.updated_at)
+        ).one()
+        category_count, category_updated = db.session.query(
+            db.func.count(Category.id), db.func.max(Category.updated_at)
+        ).one()
+
+        raw = f'{product_count}:{product_updated}:{category_count}:{category_updated}'
+        version = hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+        timestamps = [value for value in (product_updated, category_updated) if value is not None]
+        last_modified = max(timestamps).replace(microsecond=0) if timestamps else None
+        return version, last_modified
+
+    def get(self):
+        """返回 (版本号, 最后修改时间)"""
+        with self._lock:
+            cached = self._cached
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1], cached[2]
+
+        version, last_modified = self._compute()
+        if self.ttl > 0:
+            with self._lock:
+                self._cached = (time.monotonic() + self.ttl, version, last_modified)
+        return version, last_modified
+
+    def etag_for_request(self):
+        """当前请求的ETag：目录版本 + 路径和查询参数 + 响应格式"""
+        version, last_modified = self.get()
+        variant = f'{request.full_path}|{request.accept_mimetypes.best}'
+        digest = hashlib.sha1(variant.encode('utf-8')).hexdigest()[:8]
+        return f'{version}-{digest}', last_modified
+
+
+def _not_modified(etag, last_modified):
+    """判断客户端缓存是否仍然有效（If-None-Match 优先于 If-Modified-Since）"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
+def conditional_catalog(f):
+    """
+    目录接口条件请求装饰器
+    客户端缓存有效时直接返回304，不执行查询和序列化；成功响应附加 ETag 和 Last-Modified
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        etag, last_modified = catalog_version.etag_for_request()
+        if _not_modified(etag, last_modified):
+            response = make_response('', 304)
+        else:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag, weak=True)
+        if last_modified:
+            response.last_modified = last_modified
+        # 客户端可以缓存，但每次使用前需要重新验证
+        response.cache_control.no_cache = True
+        return response
+
+    return decorated_function
+
+
+# 全局目录版本实例
+catalog_version = CatalogVersion()
@@ -0,0 +1,196 @@
+"""
+响应压缩
+按 Accept-Encoding 协商 brotli / gzip（brotli 为可选依赖，未安装时只使用 gzip），
+小于阈值的响应不压缩；流式响应逐块压缩并及时刷新，不等待完整响应体；
+相同响应体的压缩结果按内容摘要缓存，热门接口不会每次重新压缩。
+整页缓存的页面含有每个会话不同的 CSRF 令牌，无法按摘要复用，改为分段预压缩：
+令牌前后的内容各自压缩为字节对齐的 deflate 块随页面缓存，输出时只压缩令牌并拼接成 gzip 响应体
+"""
+
+import gzip
+import hashlib
+import struct
+import threading
+import zlib
+import logging
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# gzip 头部：无文件名、mtime 为0、操作系统未知
+_GZIP_HEADER = b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+
+# 默认压缩的响应类型
+DEFAULT_MIMETYPES = (
+    'text/html', 'text/css', 'text/plain', 'text/xml', 'application/json',
+    'application/javascript', 'application/x-ndjson', 'application/xml', 'image/svg+xml'
+)
+
+
+class _CompressedBodyCache:
+    """压缩结果缓存：(编码, 响应体摘要) -> 压缩后的字节，按总字节数LRU淘汰"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def get_stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._size, 'hits': self.hits, 'misses': self.misses}
+
+
+class Compressor:
+    """响应压缩（after_request 钩子）"""
+
+    def __init__(self):
+        self.enabled = False
+        self.min_size = 500
+        self.level = 6
+        self.brotli_quality = 5
+        self.mimetypes = DEFAULT_MIMETYPES
+        self.cache = _CompressedBodyCache(16 * 1024 * 1024)
+
+    def init_app(self, app):
+        """读取配置并注册响应钩子，COMPRESS_ENABLED 为假时不压缩"""
+        self.enabled = app.config.get('COMPRESS_ENABLED', True)
+        if not self.enabled:
+            return
+
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', self.min_size)
+        self.level = app.config.get('COMPRESS_LEVEL', self.level)
+        self.brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', self.brotli_quality)
+        self.cache = _CompressedBodyCache(app.config.get('COMPRESS_CACHE_BYTES', 16 * 1024 * 1024))
+        app.after_request(self.after_request)
+
+    def should_compress(self, data, mimetype):
+        """响应体是否需要压缩（类型和大小）"""
+        return self.enabled and mimetype in self.mimetypes and len(data) >= self.min_size
+
+    def choose_encoding(self, accept_encodings):
+        """选择客户端接受的编码：优先 brotli，其次 gzip"""
+        if brotli is not None and accept_encodings['br'] > 0:
+            return 'br'
+        if accept_encodings['gzip'] > 0:
+            return 'gzip'
+        return None
+
+    def compress(self, data, encoding):
+        """压缩完整响应体"""
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def compress_cached(self, data, encoding):
+        """压缩响应体，相同内容复用缓存的压缩结果"""
+        key = (encoding, hashlib.blake2b(data, digest_size=16).digest())
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = self.compress(data, encoding)
+            self.cache.set(key, compressed)
+        return compressed
+
+    def deflate_segment(self, data):
+        """
+        将一段内容独立压缩为字节对齐、非结束的 deflate 块（不引用之前的内容），
+        多段按顺序拼接后由 join_gzip_segments 组成完整的 gzip 响应体
+        """
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+        return compressor.compress(data) + compressor.flush(zlib.Z_FULL_FLUSH)
+
+    @staticmethod
+    def join_gzip_segments(segments, compressed_segments):
+        """拼接各段的 deflate 块，补上结束块和 gzip 尾部（原文的 CRC32 和长度）"""
+        crc = 0
+        size = 0
+        for segment in segments:
+            crc = zlib.crc32(segment, crc)
+            size += len(segment)
+        # 空的结束块（固定哈夫曼编码）
+        return b''.join((_GZIP_HEADER, *compressed_segments, b'\x03\x00',
+                         struct.pack('<II', crc, size & 0xffffffff)))
+
+    def compress_stream(self, chunks, encoding):
+        """逐块压缩流式响应，每块之后刷新以保证客户端及时收到数据"""
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            for chunk in chunks:
+                data = compressor.process(chunk) + compressor.flush()
+                if data:
+                    yield data
+            yield compressor.finish()
+        else:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)  # wbits=31 输出gzip格式
+            for chunk in chunks:
+                data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                if data:
+                    yield data
+            yield compressor.flush()
+
+    def after_request(self, response):
+        from flask import request
+
+        if (response.status_code < 200 or response.status_code in (204, 304)
+                or response.mimetype not in self.mimetypes
+                or 'Content-Encoding' in response.headers
+                or response.direct_passthrough):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self.choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            chunks = (chunk.encode('utf-8') if isinstance(chunk, str) else chunk for chunk in response.response)
+            response.response = self.compress_stream(chunks, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(self.compress_cached(data, encoding))
+
+        # 弱ETag表示语义等价，压缩前后保持不变，条件请求仍可命中
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+# 全局响应压缩实例
+compressor = Compressor()
@@ -17,7 +17,56 @@ class Config:
     
     # SQLAlchemy配置
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    
+
+    # 搜索后端配置 - memory（进程内倒排索引）或 database（PostgreSQL tsvector / SQLite FTS5）
+    SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'memory').lower()
+
+    # 搜索索引和搜索建议索引配置 - 多进程部署时定期检查其他进程的写入（秒，0表示不检查）
+    SEARCH_INDEX_SYNC_INTERVAL = int(os.getenv('SEARCH_INDEX_SYNC_INTERVAL', '30'))
+
+    # 搜索结果缓存配置 - 缓存条目上限和过期时间（秒），任一为0表示禁用
+    SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', '512'))
+    SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', '60'))
+
+    # 商品目录版本（API ETag）缓存时间（秒），用于兜底其他进程的写入，0表示每次请求都重新计算
+    CATALOG_VERSION_TTL = int(os.getenv('CATALOG_VERSION_TTL', '5'))
+
+    # 响应压缩配置 - gzip/brotli（brotli 需要安装可选依赖），小于阈值（字节）的响应不压缩
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'True').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '500'))
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', '6'))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', '5'))
+    COMPRESS_CACHE_BYTES = int(os.getenv('COMPRESS_CACHE_BYTES', str(16 * 1024 * 1024)))
+
+    # 应用缓存配置 - 后端可选 memory（进程内）/ sqlite（本机多进程共享）/ redis / null（禁用）
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory').lower()
+    CACHE_DEFAULT_TIMEOUT = int(os.getenv('CACHE_DEFAULT_TIMEOUT', '300'))
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '2048'))
+    CACHE_SQLITE_PATH = os.getenv('CACHE_SQLITE_PATH', '')  # 为空时使用 instance/cache.db
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_KEY_PREFIX = os.getenv('CACHE_KEY_PREFIX', 'sara:')
+    # 后端不跨进程共享（memory）时依赖失效的条目的过期时间上限（秒），其他工作进程的写入最迟在此时间后可见
+    CACHE_LOCAL_TIMEOUT = int(os.getenv('CACHE_LOCAL_TIMEOUT', '10'))
+
+    # 网站设置快照 - 从数据库检查其他进程修改的间隔（秒），本进程的修改立即生效
+    SITE_SETTINGS_CHECK_INTERVAL = float(os.getenv('SITE_SETTINGS_CHECK_INTERVAL', '1'))
+
+    # 模板片段缓存配置 - {% cache %} 标签（存储在应用缓存中），默认过期时间（秒）
+    FRAGMENT_CACHE_ENABLED = os.getenv('FRAGMENT_CACHE_ENABLED', 'True').lower() == 'true'
+    FRAGMENT_CACHE_TIMEOUT = int(os.getenv('FRAGMENT_CACHE_TIMEOUT', '3600'))
+
+    # 启动预热 - 创建应用时预先编译模板、加载翻译和常用数据并记录各步骤耗时
+    WARMUP_ON_STARTUP = os.getenv('WARMUP_ON_STARTUP', 'False').lower() == 'true'
+
+    # 应用在 gunicorn 主进程中预加载（gunicorn.conf.py 设置），后台线程推迟到 fork 后的工作进程中启动
+    PRELOAD_APP = os.getenv('PRELOAD_APP', 'False').lower() == 'true'
+
+    # 整页缓存配置 - 匿名访客的店铺页面（存储在应用缓存中），过期时间（秒）
+    PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', 'True').lower() == 'true'
+    PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', '300'))
+    # 缓存后端不跨进程共享（memory）时的过期时间上限（秒），其他工作进程的商品变更最迟在此时间后可见
+    PAGE_CACHE_LOCAL_TIMEOUT = int(os.getenv('PAGE_CACHE_LOCAL_TIMEOUT', '10'))
+
     def __init__(self):
         """初始化配置时设置数据库URI和连接池"""
         if self.DATABASE_TYPE == 'postgresql':
@@ -155,10 +204,37 @@ class TestConfig(Config):
             }
         }
 
+class BenchmarkConfig(Config):
+    """性能基准测试配置"""
+    TESTING = True
+    
+    def __init__(self):
+        """基准测试使用独立数据库（BENCHMARK_DATABASE_URL），避免污染开发数据"""
+        basedir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+        instance_dir = os.path.join(basedir, 'instance')
+        if not os.path.exists(instance_dir):
+            os.makedirs(instance_dir)
+        default_path = os.path.join(instance_dir, 'benchmark.db')
+        self.SQLALCHEMY_DATABASE_URI = os.getenv('BENCHMARK_DATABASE_URL', f'sqlite:///{default_path}')
+        
+        if self.SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+            self.SQLALCHEMY_ENGINE_OPTIONS = {
+                'connect_args': {
+                    'timeout': 30,
+                    'check_same_thread': False
+                }
+            }
+        else:
+            self.SQLALCHEMY_ENGINE_OPTIONS = {
+                'pool_size': 5,
+                'pool_pre_ping': True
+            }
+
 # 配置映射
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
     'testing': TestConfig,
+    'benchmark': BenchmarkConfig,
     'default': DevelopmentConfig
 }
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""
+原生JSON列类型和跨数据库JSON函数
+Python侧仍是JSON文本（与模型 get_xxx/set_xxx 方法的约定一致），
+数据库侧在 PostgreSQL 上使用 JSONB，在 SQLite 上保持TEXT并通过 JSON1 函数计算，
+使数组长度、字段取值等可以在SQL中计算并建立索引
+"""
+
+import re
+import json
+import logging
+from sqlalchemy import Text, Integer, Boolean, bindparam
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+logger = logging.getLogger(__name__)
+
+# 只含字母、数字和下划线的JSON键名直接写入SQL中的路径（与表达式索引的定义一致，可以命中索引），
+# 其他键名（中文、标点等）作为参数绑定
+_SIMPLE_JSON_KEY_RE = re.compile(r'^[A-Za-z0-9_]+$')
+
+
+class JSONText(TypeDecorator):
+    """数据库侧为原生JSON类型、Python侧为JSON文本的列类型"""
+
+    impl = Text
+    cache_ok = True
+
+    def bind_expression(self, bindvalue):
+        # PostgreSQL 需要把文本参数显式转换为 JSONB
+        return _json_bind(bindvalue)
+
+    def column_expression(self, column):
+        # 读取时转换为文本，避免驱动把 JSONB 解析为Python对象
+        return json_text(column)
+
+
+@compiles(JSONText)
+def _compile_json_text_type(type_, compiler, **kw):
+    # SQLite 的 JSON 声明类型会得到 NUMERIC 亲和性（纯数字文本会被转换），因此保持TEXT
+    return 'TEXT'
+
+
+@compiles(JSONText, 'postgresql')
+def _compile_json_text_type_postgresql(type_, compiler, **kw):
+    return 'JSONB'
+
+
+class _json_bind(FunctionElement):
+    """JSON列的写入参数"""
+    type = Text()
+    name = 'json_bind'
+    inherit_cache = True
+
+
+@compiles(_json_bind)
+def _compile_json_bind(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(_json_bind, 'postgresql')
+def _compile_json_bind_postgresql(element, compiler, **kw):
+    return f'CAST({compiler.process(element.clauses, **kw)} AS JSONB)'
+
+
+class json_text(FunctionElement):
+    """JSON列的文本形式（用于 lower/LIKE 等文本运算）"""
+    type = Text()
+    name = 'json_text'
+    inherit_cache = True
+
+
+@compiles(json_text)
+def _compile_json_text(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(json_text, 'postgresql')
+def _compile_json_text_postgresql(element, compiler, **kw):
+    return f'CAST({compiler.process(element.clauses, **kw)} AS TEXT)'
+
+
+class json_array_length(FunctionElement):
+    """JSON数组长度"""
+    type = Integer()
+    name = 'json_array_length'
+    inherit_cache = True
+
+
+@compiles(json_array_length)
+def _compile_json_array_length(element, compiler, **kw):
+    return f'json_array_length({compiler.process(element.clauses, **kw)})'
+
+
+@compiles(json_array_length, 'postgresql')
+def _compile_json_array_length_postgresql(element, compiler, **kw):
+    return f'jsonb_array_length({compiler.process(element.clauses, **kw)})'
+
+
+class json_field(FunctionElement):
+    """JSON对象中某个键的值；SQLite 上列内容不是合法JSON时为 NULL"""
+    type = Text()
+    name = 'json_field'
+    inherit_cache = True
+
+    # 键名参与语句缓存键（简单键名直接写入SQL）
+    _traverse_internals = FunctionElement._traverse_internals + [
+        ('json_key', InternalTraversal.dp_string)
+    ]
+
+    def __init__(self, column, key):
+        if not key:
+            raise ValueError('JSON键名不能为空')
+        self.json_key = key
+        super().__init__(column, bindparam(None, key, type_=Text()))
+
+
+@compiles(json_field)
+def _compile_json_field(element, compiler, **kw):
+    column_clause, key_clause = element.clauses
+    column = compiler.process(column_clause, **kw)
+    if _SIMPLE_JSON_KEY_RE.match(element.json_key):
+        # 与 JSON_INDEX_STATEMENTS 中的索引表达式一致
+        return f"CASE WHEN json_valid({column}) THEN json_extract({column}, '$.{element.json_key}') END"
+    # 任意键名：按 json_each 的 key 列比较，不需要在JSON路径中转义
+    return (f"(SELECT value FROM json_each(CASE WHEN json_valid({column}) THEN {column} END) "
+            f"WHERE key = {compiler.process(key_clause, **kw)})")
+
+
+@compiles(json_field, 'postgresql')
+def _compile_json_field_postgresql(element, compiler, **kw):
+    column, key = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f"({column} ->> {key})"
+
+
+class in_json_list(FunctionElement):
+    """
+    列值属于给定的值列表：列表作为一个JSON数组参数绑定，
+    SQL文本和参数个数与列表长度无关（代替上万个元素的 IN (...)，SQLite 对参数个数有上限）
+    """
+    type = Boolean()
+    name = 'in_json_list'
+    inherit_cache = True
+
+    def __init__(self, column, values):
+        super().__init__(column, bindparam(None, json.dumps(list(values)), type_=Text()))
+
+
+@compiles(in_json_list)
+def _compile_in_json_list(element, compiler, **kw):
+    column, values = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f'{column} IN (SELECT value FROM json_each({values}))'
+
+
+@compiles(in_json_list, 'postgresql')
+def _compile_in_json_list_postgresql(element, compiler, **kw):
+    column, values = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f'{column} IN (SELECT CAST(jsonb_array_elements_text(CAST({values} AS JSONB)) AS INTEGER))'
+
+
+# 各数据库的JSON索引（幂等DDL）
+JSON_INDEX_STATEMENTS = {
+    'sqlite': [
+        "CREATE INDEX IF NOT EXISTS idx_products_spec_brand ON products "
+        "(CASE WHEN json_valid(specifications) THEN json_extract(specifications, '$.brand') END)"
+    ],
+    'postgresql': [
+        "CREATE INDEX IF NOT EXISTS idx_products_specifications ON products USING GIN (specifications jsonb_path_ops)",
+        "CREATE INDEX IF NOT EXISTS idx_products_spec_brand ON products ((specifications ->> 'brand'))"
+    ]
+}
+
+
+def install_json_indexes(db):
+    """
+    创建当前数据库的JSON索引，返回执行的语句数量
+    PostgreSQL 上列尚未迁移为 JSONB 时（见 migrations/native_json_migration.py）跳过并返回0
+    """
+    statements = JSON_INDEX_STATEMENTS.get(db.engine.dialect.name, [])
+    try:
+        for statement in statements:
+            db.session.execute(db.text(statement))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f'JSON索引未创建: {str(e)}')
+        return 0
+    return len(statements)
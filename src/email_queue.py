@@ -121,6 +121,12 @@ class EmailQueue:
         self._worker_thread.start()
         logger.info("邮件队列工作线程已启动")
     
+    def restart_after_fork(self):
+        """在 fork 出的子进程中重新启动工作线程（线程不会被 fork 复制）"""
+        self._running = False
+        self._worker_thread = None
+        self.start_worker()
+    
     def stop_worker(self):
         """停止邮件队列工作线程"""
         self._running = False
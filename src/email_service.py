@@ -6,7 +6,6 @@ import os
 import resend
 from datetime import datetime
 from typing import Dict, Any, Optional
-import json
 import logging
 
 # 配置Resend API密钥
@@ -26,7 +25,7 @@ class EmailService:
         """发送订单确认邮件"""
         try:
             # 解析订单商品信息
-            items = json.loads(order.items) if order.items else []
+            items = order.get_items()
             
             # 生成邮件内容
             html_content = self._generate_order_confirmation_html(order, items)
@@ -53,7 +52,7 @@ class EmailService:
         """发送新订单通知给管理员"""
         try:
             # 解析订单商品信息
-            items = json.loads(order.items) if order.items else []
+            items = order.get_items()
             
             html_content = self._generate_admin_notification_html(order, items)
             plain_content = self._generate_admin_notification_text(order, items)
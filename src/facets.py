@@ -0,0 +1,162 @@
+"""
+商品筛选计数（分面统计）
+一次分组查询得到 (分类, 成色, 价格区间, 仅见面交易, 是否在价格范围内) 的组合计数，
+再在内存中汇总出各筛选项的数量；结果缓存到下一次产品变更，
+并与搜索结果缓存使用相同的过期时间（SEARCH_CACHE_TTL），兜底多进程部署下其他进程的写入
+"""
+
+import threading
+import time
+import logging
+from collections import Counter
+from .models import db, Product
+from .signals import product_changed, init_model_signals
+
+logger = logging.getLogger(__name__)
+
+# 价格区间 (键, 下限, 上限)，上限为 None 表示不封顶
+PRICE_BUCKETS = [
+    ('0-50', 0, 50),
+    ('50-100', 50, 100),
+    ('100-200', 100, 200),
+    ('200-500', 200, 500),
+    ('500+', 500, None)
+]
+
+
+class FacetEngine:
+    """分面统计引擎"""
+
+    # 缓存的筛选组合数量上限（超出时清空）
+    CACHE_SIZE = 512
+
+    def __init__(self):
+        self.app = None
+        self.ttl = 60
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._hits = 0
+        self._misses = 0
+
+    def init_app(self, app):
+        """绑定应用并注册产品变更监听"""
+        self.app = app
+        # 与商品列表的搜索结果缓存同时过期，筛选计数与列表保持一致；为0时不缓存
+        self.ttl = app.config.get('SEARCH_CACHE_TTL', self.ttl)
+        self.clear()
+
+        init_model_signals()
+        product_changed.connect(self._on_product_changed)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._cache = {}
+
+    def _on_product_changed(self, sender, **extra):
+        """产品变更后缓存失效"""
+        self.clear()
+
+    @staticmethod
+    def _price_bucket_expression():
+        """价格区间 CASE 表达式"""
+        whens = []
+        for key, low, high in PRICE_BUCKETS:
+            if high is None:
+                whens.append((Product.price >= low, key))
+            else:
+                whens.append((db.and_(Product.price >= low, Product.price < high), key))
+        return db.case(*whens, else_=PRICE_BUCKETS[0][0])
+
+    @staticmethod
+    def _cache_key(filters):
+        return (
+            filters.get('search') or '',
+            filters.get('category') or '',
+            filters.get('condition') or '',
+            filters.get('min_price'),
+            filters.get('max_price'),
+            filters.get('face_to_face') or ''
+        )
+
+    def _aggregate(self, base_query, filters):
+        """执行分组查询，返回 [(分类, 成色, 价格区间, 仅见面交易, 在价格范围内, 数量), ...]"""
+        min_price = filters.get('min_price')
+        max_price = filters.get('max_price')
+
+        price_conditions = []
+        if min_price is not None:
+            price_conditions.append(Product.price >= min_price)
+        if max_price is not None:
+            price_conditions.append(Product.price <= max_price)
+        in_price_range = (
+            db.case((db.and_(*price_conditions), 1), else_=0) if price_conditions else db.literal(1)
+        )
+
+        bucket = self._price_bucket_expression()
+        query = base_query.with_entities(
+            Product.category, Product.condition, bucket, Product.face_to_face_only,
+            in_price_range, db.func.count(Product.id)
+        ).group_by(
+            Product.category, Product.condition, bucket, Product.face_to_face_only, in_price_range
+        ).order_by(None)
+        return query.all()
+
+    def get_facets(self, base_query, filters):
+        """
+        获取当前筛选条件下的各筛选项数量
+        base_query 只包含搜索和库存条件；每个分面的数量应用除自身以外的其他筛选条件，
+        这样切换同一分面内的选项时数量仍有意义
+        """
+        key = self._cache_key(filters)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._hits += 1
+                return entry[1]
+            self._misses += 1
+
+        category = filters.get('category') or None
+        condition = filters.get('condition') or None
+        face_to_face = filters.get('face_to_face') or None
+
+        facets = {
+            'category': Counter(),
+            'condition': Counter(),
+            'price': Counter(),
+            'face_to_face_only': Counter()
+        }
+        for row_category, row_condition, row_bucket, row_face_to_face, row_in_price, count in self._aggregate(base_query, filters):
+            row_face_to_face = '1' if row_face_to_face else '0'
+            matches = {
+                'category': category is None or row_category == category,
+                'condition': condition is None or row_condition == condition,
+                'price': bool(row_in_price),
+                'face_to_face_only': face_to_face is None or row_face_to_face == face_to_face
+            }
+            values = {
+                'category': row_category,
+                'condition': row_condition,
+                'price': row_bucket,
+                'face_to_face_only': row_face_to_face
+            }
+            for facet, value in values.items():
+                if all(matched for other, matched in matches.items() if other != facet):
+                    facets[facet][value] += count
+
+        result = {facet: dict(counts) for facet, counts in facets.items()}
+        if self.ttl > 0:
+            with self._lock:
+                if len(self._cache) >= self.CACHE_SIZE:
+                    self._cache = {}
+                self._cache[key] = (time.monotonic() + self.ttl, result)
+        return result
+
+    def get_stats(self):
+        """获取缓存统计"""
+        with self._lock:
+            return {'entries': len(self._cache), 'hits': self._hits, 'misses': self._misses}
+
+
+# 全局分面统计实例
+facet_engine = FacetEngine()
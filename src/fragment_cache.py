@@ -0,0 +1,80 @@
+"""
+模板片段缓存
+Jinja 扩展，提供 {% cache key, timeout %} ... {% endcache %} 标签：
+片段渲染结果存入应用缓存的 fragments 命名空间，缓存键由 模板名 + 当前语言 + key 组成。
+key 应包含决定片段内容的版本信息（如商品ID和 updated_at），内容变化后自然换用新键；
+分类显示名称变更时整个命名空间失效
+"""
+
+import logging
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from .cache import cache
+from .signals import category_changed, init_model_signals
+
+logger = logging.getLogger(__name__)
+
+FRAGMENTS_NAMESPACE = 'fragments'
+
+
+class FragmentCacheExtension(Extension):
+    """{% cache key[, timeout] %} 标签"""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [nodes.Const(parser.name), parser.parse_expression()]
+        if parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', args), [], [], body).set_lineno(lineno)
+
+    def _render(self, template_name, key, timeout, caller):
+        return fragment_cache.render(template_name, key, timeout, caller)
+
+
+class FragmentCache:
+    """模板片段缓存"""
+
+    def __init__(self):
+        self.enabled = True
+        self.timeout = 3600
+
+    def init_app(self, app):
+        """注册 Jinja 扩展并读取配置"""
+        self.enabled = app.config.get('FRAGMENT_CACHE_ENABLED', self.enabled)
+        self.timeout = app.config.get('FRAGMENT_CACHE_TIMEOUT', self.timeout)
+        app.jinja_env.add_extension(FragmentCacheExtension)
+
+        init_model_signals()
+        category_changed.connect(self._on_category_changed)
+
+    def _on_category_changed(self, sender, **extra):
+        # 片段中显示分类名称
+        cache.invalidate(FRAGMENTS_NAMESPACE)
+
+    @staticmethod
+    def _language():
+        from flask_babel import get_locale
+
+        locale = get_locale()
+        return str(locale) if locale else ''
+
+    def render(self, template_name, key, timeout, caller):
+        """返回缓存的片段，未命中时渲染并写入"""
+        if not self.enabled:
+            return caller()
+
+        cache_key = f'{template_name}|{self._language()}|{key!r}'
+        html = cache.get_or_set(FRAGMENTS_NAMESPACE, cache_key, lambda: str(caller()),
+                                self.timeout if timeout is None else timeout)
+        return Markup(html)
+
+
+# 全局模板片段缓存实例
+fragment_cache = FragmentCache()
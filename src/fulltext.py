@@ -0,0 +1,238 @@
+"""
+数据库原生全文搜索后端
+PostgreSQL 使用 tsvector 生成列 + GIN 索引，SQLite 使用 FTS5 影子表 + 触发器同步，
+相关性排序在SQL中完成（ts_rank / bm25）。
+查询按完整片段（拉丁单词、中文连续片段）构造，不使用进程内索引的中文二元组：
+SQLite 使用 trigram 分词器做子串匹配，PostgreSQL 的中文片段按子串匹配
+"""
+
+import sqlite3
+from sqlalchemy import text
+from .models import db, Product
+from .search import tokenize_segments, is_cjk
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseFullTextBackend:
+    """数据库全文搜索后端基类"""
+
+    name = 'database'
+
+    def __init__(self):
+        self.ready = False
+
+    def install(self):
+        """创建全文索引结构（幂等）"""
+        try:
+            for statement in self.get_install_statements():
+                db.session.execute(text(statement))
+            db.session.commit()
+            self.ready = True
+            logger.info(f'全文搜索后端已就绪: {self.name}')
+        except Exception as e:
+            db.session.rollback()
+            self.ready = False
+            logger.error(f'全文搜索后端初始化失败({self.name}): {str(e)}')
+        return self.ready
+
+    def get_install_statements(self):
+        """返回建立索引所需的DDL语句"""
+        raise NotImplementedError
+
+    def build_search(self, terms, ranked=True):
+        """将查询片段转换为搜索SQL（ranked 为假时不排序），返回 (sql, 参数)"""
+        raise NotImplementedError
+
+    def _execute(self, keyword, ranked):
+        """执行搜索SQL，返回产品ID列表；后端不可用时返回None"""
+        if not self.ready:
+            return None
+
+        terms = list(dict.fromkeys(tokenize_segments(keyword)))
+        if not terms:
+            return []
+
+        sql, params = self.build_search(terms, ranked)
+        params['status'] = Product.STATUS_AVAILABLE
+        rows = db.session.execute(text(sql), params)
+        return [row[0] for row in rows]
+
+    def search(self, keyword):
+        """搜索产品，返回按相关性排序的产品ID列表；后端不可用时返回None"""
+        return self._execute(keyword, ranked=True)
+
+    def match(self, keyword):
+        """匹配产品（不计算相关性、不排序），返回产品ID列表；后端不可用时返回None"""
+        return self._execute(keyword, ranked=False)
+
+
+def like_pattern(term):
+    """构造子串匹配的 LIKE 模式（转义通配符，配合 ESCAPE '\\'）"""
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+class SQLiteFTSBackend(DatabaseFullTextBackend):
+    """SQLite FTS5 全文搜索后端"""
+
+    name = 'sqlite_fts5'
+
+    # bm25 字段权重：name, description, category, condition, specifications
+    BM25_WEIGHTS = (10.0, 2.0, 3.0, 1.0, 1.5)
+
+    _COLUMN_NAMES = ('name', 'description', 'category', 'condition', 'specifications')
+    _COLUMNS = ', '.join(_COLUMN_NAMES)
+    _NEW_VALUES = ', '.join(f'new.{column}' for column in _COLUMN_NAMES)
+
+    # trigram 分词器（SQLite 3.34+）按三字符子串建立索引，中文连续片段也能匹配任意位置；
+    # 更早的版本退回 unicode61，中文片段只能前缀匹配
+    TRIGRAM_TOKENIZER = 'trigram'
+    UNICODE_TOKENIZER = 'unicode61 remove_diacritics 2'
+
+    # trigram 能匹配的最短片段长度，更短的片段用 LIKE 扫描影子表
+    TRIGRAM_MIN_LENGTH = 3
+
+    def __init__(self):
+        super().__init__()
+        self.tokenizer = (self.TRIGRAM_TOKENIZER if sqlite3.sqlite_version_info >= (3, 34, 0)
+                          else self.UNICODE_TOKENIZER)
+
+    def _drop_outdated_table(self):
+        """影子表使用的分词器与当前不同时删除重建（触发器按表名引用，随后回填）"""
+        table_sql = db.session.execute(text(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+        )).scalar()
+        if table_sql and f"tokenize='{self.tokenizer}'" not in table_sql:
+            return ['DROP TABLE products_fts']
+        return []
+
+    def get_install_statements(self):
+        return self._drop_outdated_table() + [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+            f"{self._COLUMNS}, tokenize='{self.tokenizer}')",
+            # 触发器保证任何写入路径都同步到影子表
+            f"CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN "
+            f"INSERT INTO products_fts(rowid, {self._COLUMNS}) VALUES (new.id, {self._NEW_VALUES}); END",
+            f"CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE ON products BEGIN "
+            f"DELETE FROM products_fts WHERE rowid = old.id; "
+            f"INSERT INTO products_fts(rowid, {self._COLUMNS}) VALUES (new.id, {self._NEW_VALUES}); END",
+            "CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN "
+            "DELETE FROM products_fts WHERE rowid = old.id; END",
+            # 回填已有数据
+            f"INSERT INTO products_fts(rowid, {self._COLUMNS}) "
+            f"SELECT id, {self._COLUMNS} FROM products "
+            f"WHERE id NOT IN (SELECT rowid FROM products_fts)"
+        ]
+
+    def build_search(self, terms, ranked=True):
+        if self.tokenizer == self.TRIGRAM_TOKENIZER:
+            # 短语在 trigram 索引中做子串匹配，空格表示AND
+            phrases = [term for term in terms if len(term) >= self.TRIGRAM_MIN_LENGTH]
+            short_terms = [term for term in terms if len(term) < self.TRIGRAM_MIN_LENGTH]
+            match = ' '.join('"{}"'.format(term.replace('"', '""')) for term in phrases)
+        else:
+            # 每个片段做前缀匹配
+            short_terms = []
+            match = ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+        conditions = ['p.stock_status = :status']
+        params = {}
+        if match:
+            conditions.append('products_fts MATCH :query')
+            params['query'] = match
+        for i, term in enumerate(short_terms):
+            params[f'like_{i}'] = like_pattern(term)
+            conditions.append('(' + ' OR '.join(
+                f"products_fts.{column} LIKE :like_{i} ESCAPE '\\'" for column in self._COLUMN_NAMES
+            ) + ')')
+
+        # bm25 只能在 MATCH 查询中使用
+        order_by = 'p.id DESC'
+        if match:
+            weights = ', '.join(str(weight) for weight in self.BM25_WEIGHTS)
+            order_by = f'bm25(products_fts, {weights}), {order_by}'
+
+        sql = (
+            "SELECT p.id FROM products_fts "
+            "JOIN products p ON p.id = products_fts.rowid "
+            f"WHERE {' AND '.join(conditions)}"
+        )
+        if ranked:
+            sql += f" ORDER BY {order_by}"
+        return sql, params
+
+
+class PostgresFTSBackend(DatabaseFullTextBackend):
+    """PostgreSQL tsvector 全文搜索后端"""
+
+    name = 'postgresql_tsvector'
+
+    # 使用simple配置，不做词干化，适合中英文混合的商品标题
+    TS_CONFIG = 'simple'
+
+    def get_install_statements(self):
+        config = self.TS_CONFIG
+        return [
+            # 生成列由数据库在每次写入时自动维护
+            "ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            "GENERATED ALWAYS AS ("
+            f"setweight(to_tsvector('{config}', coalesce(name, '')), 'A') || "
+            f"setweight(to_tsvector('{config}', coalesce(category, '')), 'B') || "
+            f"setweight(to_tsvector('{config}', coalesce(description, '')), 'C') || "
+            f"setweight(to_tsvector('{config}', coalesce(condition, '') || ' ' || coalesce(specifications::text, '')), 'D')"
+            ") STORED",
+            "CREATE INDEX IF NOT EXISTS idx_products_search_vector ON products USING GIN (search_vector)"
+        ]
+
+    # simple 配置把中文连续片段整体作为一个词，中文片段改为在这些字段中做子串匹配
+    CJK_MATCH_COLUMNS = ('p.name', 'p.category', 'p.description', 'p.specifications::text')
+
+    def build_search(self, terms, ranked=True):
+        # 拉丁单词做前缀匹配，&表示AND
+        words = [term for term in terms if not is_cjk(term)]
+        cjk_terms = [term for term in terms if is_cjk(term)]
+
+        conditions = ['p.stock_status = :status']
+        params = {}
+        order_by = []
+        source = 'products p'
+        if words:
+            source += f", to_tsquery('{self.TS_CONFIG}', :query) AS q"
+            conditions.append('p.search_vector @@ q')
+            params['query'] = ' & '.join(f'{word}:*' for word in words)
+            order_by.append('ts_rank(p.search_vector, q) DESC')
+        for i, term in enumerate(cjk_terms):
+            params[f'like_{i}'] = like_pattern(term)
+            conditions.append('(' + ' OR '.join(
+                f"{column} LIKE :like_{i} ESCAPE '\\'" for column in self.CJK_MATCH_COLUMNS
+            ) + ')')
+        if cjk_terms:
+            # 名称命中中文片段的排在前面
+            order_by.append('(p.name LIKE :like_0) DESC')
+        order_by.append('p.id DESC')
+
+        sql = (
+            f"SELECT p.id FROM {source} "
+            f"WHERE {' AND '.join(conditions)}"
+        )
+        if ranked:
+            sql += f" ORDER BY {', '.join(order_by)}"
+        return sql, params
+
+
+# 数据库方言与全文后端的对应关系
+FULLTEXT_BACKENDS = {
+    'sqlite': SQLiteFTSBackend,
+    'postgresql': PostgresFTSBackend
+}
+
+
+def create_fulltext_backend(engine):
+    """根据数据库方言创建全文搜索后端"""
+    backend_class = FULLTEXT_BACKENDS.get(engine.dialect.name)
+    if backend_class is None:
+        logger.warning(f'数据库 {engine.dialect.name} 不支持全文搜索后端')
+        return None
+    return backend_class()
@@ -0,0 +1,115 @@
+"""
+拼写容错匹配
+基于三元组(trigram)的词表索引：先用共享三元组数量筛出少量候选词，
+再只对候选词计算编辑距离，查询耗时与目录规模无关
+"""
+
+import heapq
+from collections import Counter
+
+
+def trigrams(term):
+    """切分词元为带边界的三元组"""
+    padded = f' {term} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, max_distance):
+    """计算编辑距离（相邻换位计为一次编辑），超过上限时提前返回 max_distance + 1"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(
+                previous[j] + 1,  # 删除
+                current[j - 1] + 1,  # 插入
+                previous[j - 1] + cost  # 替换
+            )
+            # 相邻字符换位
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+
+    return previous[len(b)]
+
+
+class TrigramIndex:
+    """词表三元组索引（调用方负责加锁）"""
+
+    # 参与容错匹配的最短词元长度
+    MIN_TERM_LENGTH = 3
+
+    # 每次查询最多计算编辑距离的候选词数量
+    MAX_CANDIDATES = 50
+
+    def __init__(self):
+        self._term_counts = Counter()  # 词元 -> 引用次数
+        self._grams = {}  # 三元组 -> 词元集合
+
+    def clear(self):
+        """清空索引"""
+        self._term_counts = Counter()
+        self._grams = {}
+
+    def add_terms(self, terms):
+        """增加词元引用"""
+        for term in terms:
+            if len(term) < self.MIN_TERM_LENGTH:
+                continue
+            self._term_counts[term] += 1
+            if self._term_counts[term] == 1:
+                for gram in trigrams(term):
+                    self._grams.setdefault(gram, set()).add(term)
+
+    def remove_terms(self, terms):
+        """减少词元引用，引用归零时移出索引"""
+        for term in terms:
+            if self._term_counts.get(term, 0) <= 0:
+                continue
+            self._term_counts[term] -= 1
+            if self._term_counts[term] == 0:
+                del self._term_counts[term]
+                for gram in trigrams(term):
+                    bucket = self._grams.get(gram)
+                    if bucket is not None:
+                        bucket.discard(term)
+                        if not bucket:
+                            del self._grams[gram]
+
+    @staticmethod
+    def max_distance_for(term):
+        """根据词长决定允许的编辑距离"""
+        return 1 if len(term) <= 4 else 2
+
+    def lookup(self, term, limit=3):
+        """查找与 term 相近的词元，返回 [(词元, 编辑距离), ...]，按距离和词频排序"""
+        if len(term) < self.MIN_TERM_LENGTH:
+            return []
+
+        max_distance = self.max_distance_for(term)
+
+        # 统计共享三元组数量，只保留重叠最多的少量候选
+        overlap = Counter()
+        for gram in trigrams(term):
+            overlap.update(self._grams.get(gram, ()))
+        candidates = heapq.nlargest(self.MAX_CANDIDATES, overlap.items(), key=lambda item: item[1])
+
+        matches = []
+        for candidate, shared in candidates:
+            if candidate == term:
+                continue
+            distance = edit_distance(term, candidate, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, -self._term_counts[candidate], candidate))
+
+        matches.sort()
+        return [(candidate, distance) for distance, _, candidate in matches[:limit]]
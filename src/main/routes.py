@@ -1,8 +1,15 @@
 from flask import render_template, request, redirect, url_for, flash, jsonify
 from flask_babel import _, get_locale
 from . import main
-from ..models import Product, Order, Message, db, get_all_site_info_data
+from ..models import Product, Order, Message, db
+from ..db_types import in_json_list
 from ..i18n import set_language, LANGUAGES
+from ..search import search_engine
+from ..facets import facet_engine, PRICE_BUCKETS
+from ..pagination import paginate_keyset, normalize_sort, clamp_per_page, InvalidCursor, DEFAULT_SORT, DEFAULT_PER_PAGE
+from ..search_cache import search_cache, match_key, normalize_query
+from ..site_info import get_site_info_data, render_site_info_sections
+from ..page_cache import page_cache, LISTINGS_NAMESPACE, INFO_NAMESPACE, PRODUCT_NAMESPACE
 
 def validate_and_set_language(lang):
     """验证并设置语言"""
@@ -17,6 +24,7 @@ def validate_and_set_language(lang):
     return None
 
 @main.route('/<lang>/')
+@page_cache.cached(LISTINGS_NAMESPACE)
 def index(lang):
     # 验证并设置语言
     redirect_response = validate_and_set_language(lang)
@@ -28,82 +36,154 @@ def index(lang):
     return render_template('index.html', products=products)
 
 @main.route('/<lang>/products')
+@page_cache.cached(LISTINGS_NAMESPACE)
 def products(lang):
     # 验证并设置语言
     redirect_response = validate_and_set_language(lang)
     if redirect_response:
         return redirect_response
     
-    # 获取搜索参数
-    search_term = request.args.get('search', '').strip()
-    category = request.args.get('category', '')
-    condition = request.args.get('condition', '')
-    min_price = request.args.get('min_price', type=float)
-    max_price = request.args.get('max_price', type=float)
-    sort_by = request.args.get('sort', 'newest')  # newest, oldest, price_asc, price_desc, name
+    filters = _get_product_filters()
+    per_page = request.args.get('per_page', DEFAULT_PER_PAGE, type=int)
+
+    # 游标分页：无效游标回到第一页
+    try:
+        products, next_cursor, total_count = _get_product_page(filters, request.args.get('cursor'), per_page)
+    except InvalidCursor:
+        products, next_cursor, total_count = _get_product_page(filters, None, per_page)
+
+    # 获取分类列表用于筛选
+    categories = Product.CATEGORIES
     
-    # 开始构建查询
-    query = Product.query
+    # 获取成色选项
+    conditions = ['全新', '9成新', '8成新', '7成新', '6成新及以下']
+    
+    return render_template('products.html', 
+                         products=products,
+                         total_count=total_count,
+                         facets=facet_engine.get_facets(_build_base_query(filters), filters),
+                         price_buckets=PRICE_BUCKETS,
+                         next_cursor=next_cursor,
+                         categories=categories,
+                         conditions=conditions,
+                         search_term=filters['search'],
+                         current_category=filters['category'],
+                         current_condition=filters['condition'],
+                         current_min_price=filters['min_price'],
+                         current_max_price=filters['max_price'],
+                         current_face_to_face=filters['face_to_face'],
+                         current_sort=filters['sort'])
+
+@main.route('/<lang>/products/feed')
+def products_feed(lang):
+    """商品列表JSON接口（无限滚动加载下一页）"""
+    # 验证并设置语言
+    redirect_response = validate_and_set_language(lang)
+    if redirect_response:
+        return redirect_response
     
-    # 搜索条件
+    filters = _get_product_filters()
+
+    try:
+        products, next_cursor, _total_count = _get_product_page(
+            filters, request.args.get('cursor'), request.args.get('per_page', DEFAULT_PER_PAGE, type=int))
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'products': [{
+            'id': product.id,
+            'name': product.name,
+            'price': float(product.price),
+            'category': product.category,
+            'condition': product.condition,
+            'cover_image': product.get_cover_image()
+        } for product in products],
+        'html': render_template('_product_card.html', products=products),
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    })
+
+def _get_product_filters():
+    """读取商品列表的搜索、筛选和排序参数"""
+    return {
+        'search': request.args.get('search', '').strip(),
+        'category': request.args.get('category', ''),
+        'condition': request.args.get('condition', ''),
+        'min_price': request.args.get('min_price', type=float),
+        'max_price': request.args.get('max_price', type=float),
+        'face_to_face': request.args.get('face_to_face', '') if request.args.get('face_to_face') in ('0', '1') else '',
+        'sort': normalize_sort(request.args.get('sort', DEFAULT_SORT))  # newest, oldest, price_asc, price_desc, name
+    }
+
+def _get_product_page(filters, cursor, per_page):
+    """获取一页商品、下一页游标和总数（按筛选条件、排序和游标缓存产品ID）"""
+    cache_key = (
+        'products_page', normalize_query(filters['search']), filters['category'], filters['condition'],
+        filters['min_price'], filters['max_price'], filters['face_to_face'], filters['sort'],
+        cursor or '', clamp_per_page(per_page)
+    )
+    cached = search_cache.get(cache_key)
+    if cached is None:
+        query = _build_product_query(filters)
+        page = paginate_keyset(query, filters['sort'], cursor, per_page)
+        total_count = query.count()
+        search_cache.set(cache_key, (tuple(product.id for product in page.items), page.next_cursor, total_count))
+        return page.items, page.next_cursor, total_count
+    
+    product_ids, next_cursor, total_count = cached
+    products = Product.query.filter(Product.id.in_(product_ids)).all() if product_ids else []
+    position = {product_id: index for index, product_id in enumerate(product_ids)}
+    products.sort(key=lambda product: position[product.id])
+    return products, next_cursor, total_count
+
+def _build_base_query(filters):
+    """构建只包含搜索条件的可用商品查询（分面统计在此基础上计数）"""
+    query = Product.query.filter(Product.stock_status == Product.STATUS_AVAILABLE)
+    search_term = filters['search']
+    
+    # 搜索条件：列表按所选方式排序，只需要匹配集合（不计算相关性），
+    # 集合作为一个JSON数组参数传给页面查询、计数和分面统计
     if search_term:
-        search_filter = db.or_(
-            Product.name.ilike(f'%{search_term}%'),
-            Product.description.ilike(f'%{search_term}%'),
-            Product.category.ilike(f'%{search_term}%')
-        )
-        query = query.filter(search_filter)
+        matched_ids = search_cache.get_or_compute(match_key(search_term), lambda: search_engine.match(search_term))
+        if matched_ids is not None:
+            query = query.filter(in_json_list(Product.id, matched_ids))
+        else:
+            search_filter = db.or_(
+                Product.name.ilike(f'%{search_term}%'),
+                Product.description.ilike(f'%{search_term}%'),
+                Product.category.ilike(f'%{search_term}%')
+            )
+            query = query.filter(search_filter)
+    return query
+
+def _build_product_query(filters, query=None):
+    """根据筛选条件构建可用商品查询（不含排序）"""
+    if query is None:
+        query = _build_base_query(filters)
     
     # 分类筛选
-    if category:
-        query = query.filter(Product.category == category)
+    if filters['category']:
+        query = query.filter(Product.category == filters['category'])
     
     # 成色筛选
-    if condition:
-        query = query.filter(Product.condition == condition)
+    if filters['condition']:
+        query = query.filter(Product.condition == filters['condition'])
     
     # 价格筛选
-    if min_price is not None:
-        query = query.filter(Product.price >= min_price)
-    if max_price is not None:
-        query = query.filter(Product.price <= max_price)
-    
-    # 只显示可用商品
-    query = query.filter(Product.stock_status == Product.STATUS_AVAILABLE)
+    if filters['min_price'] is not None:
+        query = query.filter(Product.price >= filters['min_price'])
+    if filters['max_price'] is not None:
+        query = query.filter(Product.price <= filters['max_price'])
     
-    # 排序
-    if sort_by == 'oldest':
-        query = query.order_by(Product.created_at.asc())
-    elif sort_by == 'price_asc':
-        query = query.order_by(Product.price.asc())
-    elif sort_by == 'price_desc':
-        query = query.order_by(Product.price.desc())
-    elif sort_by == 'name':
-        query = query.order_by(Product.name.asc())
-    else:  # newest (default)
-        query = query.order_by(Product.created_at.desc())
+    # 交易方式筛选
+    if filters['face_to_face']:
+        query = query.filter(Product.face_to_face_only == (filters['face_to_face'] == '1'))
     
-    # 执行查询
-    products = query.all()
-    
-    # 获取分类列表用于筛选
-    categories = Product.CATEGORIES
-    
-    # 获取成色选项
-    conditions = ['全新', '9成新', '8成新', '7成新', '6成新及以下']
-    
-    return render_template('products.html', 
-                         products=products,
-                         categories=categories,
-                         conditions=conditions,
-                         search_term=search_term,
-                         current_category=category,
-                         current_condition=condition,
-                         current_min_price=min_price,
-                         current_max_price=max_price,
-                         current_sort=sort_by)
+    return query
 
 @main.route('/<lang>/product/<int:product_id>')
+@page_cache.cached(PRODUCT_NAMESPACE)
 def product_detail(product_id, lang):
     # 验证并设置语言
     redirect_response = validate_and_set_language(lang)
@@ -174,6 +254,7 @@ def order_query(lang):
 
 
 @main.route('/<lang>/info', methods=['GET', 'POST'])
+@page_cache.cached(INFO_NAMESPACE)
 def info(lang):
     # 验证并设置语言
     redirect_response = validate_and_set_language(lang)
@@ -208,14 +289,16 @@ def info(lang):
     if current_lang == 'zh_CN':
         current_lang = 'zh'
     
-    # 获取站点信息数据
+    # 获取站点信息数据和渲染好的内容片段（按语言缓存）
     try:
-        site_info_data = get_all_site_info_data(current_lang)
+        site_info_data = get_site_info_data(current_lang)
+        site_info_sections = render_site_info_sections(current_lang, site_info_data)
     except Exception as e:
         # 如果获取数据失败，使用空字典
         site_info_data = {}
+        site_info_sections = None
     
-    return render_template('info.html', site_info_data=site_info_data)
+    return render_template('info.html', site_info_data=site_info_data, site_info_sections=site_info_sections)
 
 @main.route('/<lang>/contact', methods=['GET', 'POST'])
 def contact(lang):
@@ -6,9 +6,11 @@ Sara二手售卖网站 - 数据库模型
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
+from sqlalchemy import event
 import json
 import uuid
 from datetime import datetime
+from .db_types import JSONText, json_text, json_field, json_array_length
 
 db = SQLAlchemy()
 
@@ -27,13 +29,15 @@ class Category(db.Model):
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # 可用产品数量（反规范化计数，产品新增、修改、删除时在同一事务中更新）
+    available_product_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     
     # 关联产品
     products = db.relationship('Product', backref='category_obj', lazy='dynamic')
     
     def get_product_count(self):
-        """获取该分类下的产品数量"""
-        return self.products.filter(Product.stock_status == Product.STATUS_AVAILABLE).count()
+        """获取该分类下的可用产品数量"""
+        return self.available_product_count or 0
     
     def to_dict(self):
         """转换为字典格式"""
@@ -141,12 +145,19 @@ class Product(db.Model):
     quantity = db.Column(db.Integer, default=1, nullable=False)  # 库存数量
     low_stock_threshold = db.Column(db.Integer, default=1, nullable=False)  # 低库存警告阈值
     track_inventory = db.Column(db.Boolean, default=True, nullable=False)  # 是否启用库存跟踪
-    images = db.Column(db.Text)  # JSON格式存储图片URL列表
+    images = db.Column(JSONText)  # JSON格式存储图片URL列表
     cover_image = db.Column(db.String(500))  # 封面图片URL
-    specifications = db.Column(db.Text)  # JSON格式存储商品规格
+    specifications = db.Column(JSONText)  # JSON格式存储商品规格
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # 商品列表游标分页索引（库存状态 + 排序键 + ID）
+    __table_args__ = (
+        db.Index('idx_products_status_created', 'stock_status', 'created_at', 'id'),
+        db.Index('idx_products_status_price', 'stock_status', 'price', 'id'),
+        db.Index('idx_products_status_name', 'stock_status', 'name', 'id'),
+    )
+    
     # 分类常量
     CATEGORY_ELECTRONICS = 'electronics'
     CATEGORY_CLOTHING = 'clothing'
@@ -176,14 +187,31 @@ class Product(db.Model):
     # 图片相关常量
     MAX_IMAGES = 9  # 最大图片数量
     
+    def _get_json_column(self, column, default_type):
+        """
+        解析JSON文本列并按实例缓存解析结果
+        缓存记录解析时的原始文本对象，列被重新赋值或从数据库刷新后自动重新解析；
+        返回浅拷贝，调用方修改结果不会影响缓存
+        """
+        raw = getattr(self, column)
+        cache = self.__dict__.setdefault('_json_cache', {})
+        cached = cache.get(column)
+        if cached is None or cached[0] is not raw:
+            value = default_type()
+            if raw:
+                try:
+                    parsed = json.loads(raw)
+                    if isinstance(parsed, default_type):
+                        value = parsed
+                except json.JSONDecodeError:
+                    pass
+            cached = (raw, value)
+            cache[column] = cached
+        return default_type(cached[1])
+    
     def get_images(self):
         """获取图片URL列表"""
-        if self.images:
-            try:
-                return json.loads(self.images)
-            except json.JSONDecodeError:
-                return []
-        return []
+        return self._get_json_column('images', list)
     
     def set_images(self, image_list):
         """设置图片URL列表 - 限制最大数量"""
@@ -200,12 +228,7 @@ class Product(db.Model):
     
     def get_specifications(self):
         """获取商品规格信息"""
-        if self.specifications:
-            try:
-                return json.loads(self.specifications)
-            except json.JSONDecodeError:
-                return {}
-        return {}
+        return self._get_json_column('specifications', dict)
     
     def set_specifications(self, spec_dict):
         """设置商品规格信息"""
@@ -413,6 +436,10 @@ def get_inventory_stats():
     available_products = Product.query.filter(Product.stock_status == Product.STATUS_AVAILABLE).count()
     low_stock_count = len(get_low_stock_products())
     out_of_stock_count = len(get_out_of_stock_products())
+    # 图片列表为空的商品（数组长度在数据库中计算）
+    products_without_images = Product.query.filter(
+        db.or_(Product.images.is_(None), db.func.coalesce(json_array_length(Product.images), 0) == 0)
+    ).count()
     
     # 计算总库存值
     total_inventory_value = db.session.query(
@@ -427,10 +454,114 @@ def get_inventory_stats():
         'available_products': available_products,
         'low_stock_count': low_stock_count,
         'out_of_stock_count': out_of_stock_count,
+        'products_without_images': products_without_images,
         'total_inventory_value': float(total_inventory_value)
     }
 
 
+# 分类可用产品计数维护
+_COUNTED_PRODUCT_ATTRS = ('category_id', 'category_obj', 'stock_status')
+_PREVIOUS_COUNTS_KEY = 'category_count_previous'
+_EXPIRED_COUNTS_KEY = 'category_count_expired'
+
+
+def _counted_category(category_id, stock_status):
+    """产品计入的分类ID，无分类或不可用的产品不计入"""
+    if category_id is not None and stock_status == Product.STATUS_AVAILABLE:
+        return category_id
+    return None
+
+
+@event.listens_for(db.session, 'before_flush')
+def _remember_counted_categories(session, flush_context, instances):
+    """刷新前读取将被修改或删除的产品当前计入的分类（一次查询，只在分类或库存状态变化时执行）"""
+    product_ids = set()
+    for obj in session.deleted:
+        if isinstance(obj, Product) and obj.id is not None:
+            product_ids.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Product) and obj.id is not None:
+            state = db.inspect(obj)
+            if any(state.attrs[attr].history.has_changes() for attr in _COUNTED_PRODUCT_ATTRS):
+                product_ids.add(obj.id)
+
+    previous = session.info[_PREVIOUS_COUNTS_KEY] = {}
+    if product_ids:
+        rows = session.execute(
+            db.select(Product.id, Product.category_id, Product.stock_status).where(Product.id.in_(product_ids))
+        ).all()
+        previous.update((row.id, _counted_category(row.category_id, row.stock_status)) for row in rows)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _update_category_counts(session, flush_context):
+    """刷新后在同一事务中按计入分类的变化调整分类计数"""
+    previous = session.info.pop(_PREVIOUS_COUNTS_KEY, {})
+    deltas = {}
+
+    def add(category_id, delta):
+        if category_id is not None:
+            deltas[category_id] = deltas.get(category_id, 0) + delta
+
+    for obj in session.new:
+        if isinstance(obj, Product):
+            add(_counted_category(obj.category_id, obj.stock_status), 1)
+    for obj in session.dirty:
+        if isinstance(obj, Product) and obj.id in previous:
+            current = _counted_category(obj.category_id, obj.stock_status)
+            if current != previous[obj.id]:
+                add(previous[obj.id], -1)
+                add(current, 1)
+    for obj in session.deleted:
+        if isinstance(obj, Product) and obj.id in previous:
+            add(previous[obj.id], -1)
+
+    deltas = {category_id: delta for category_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    table = Category.__table__
+    session.connection().execute(
+        table.update().where(table.c.id == db.bindparam('category_id')).values(
+            available_product_count=table.c.available_product_count + db.bindparam('delta'),
+            updated_at=table.c.updated_at  # 计数变化不算分类本身的修改
+        ),
+        [{'category_id': category_id, 'delta': delta} for category_id, delta in deltas.items()]
+    )
+    session.info.setdefault(_EXPIRED_COUNTS_KEY, set()).update(deltas)
+
+
+@event.listens_for(db.session, 'after_flush_postexec')
+def _expire_category_counts(session, flush_context):
+    """已加载的分类对象重新读取计数"""
+    for category_id in session.info.pop(_EXPIRED_COUNTS_KEY, ()):
+        category = session.identity_map.get(db.inspect(Category).identity_key_from_primary_key((category_id,)))
+        if category is not None:
+            session.expire(category, ['available_product_count'])
+
+
+def rebuild_category_product_counts():
+    """用一次分组查询重建全部分类的可用产品计数（批量写入绕过ORM事件后调用），返回分类数量"""
+    counts = dict(db.session.query(Product.category_id, db.func.count(Product.id)).filter(
+        Product.category_id.isnot(None),
+        Product.stock_status == Product.STATUS_AVAILABLE
+    ).group_by(Product.category_id).all())
+
+    rows = [{'category_id': category_id, 'count': counts.get(category_id, 0)}
+            for category_id, in db.session.query(Category.id)]
+    if rows:
+        table = Category.__table__
+        db.session.execute(
+            table.update().where(table.c.id == db.bindparam('category_id')).values(
+                available_product_count=db.bindparam('count'),
+                updated_at=table.c.updated_at
+            ),
+            rows
+        )
+    db.session.commit()
+    return len(rows)
+
+
 class Order(db.Model):
     """订单模型 - 存储客户订单信息"""
     __tablename__ = 'orders'
@@ -440,7 +571,7 @@ class Order(db.Model):
     customer_name = db.Column(db.String(100), nullable=False)
     customer_email = db.Column(db.String(100), nullable=False)
     customer_phone = db.Column(db.String(50))
-    items = db.Column(db.Text, nullable=False)  # JSON格式存储订单商品
+    items = db.Column(JSONText, nullable=False)  # JSON格式存储订单商品
     total_amount = db.Column(db.Numeric(10, 2), nullable=False)
     delivery_method = db.Column(db.String(20), nullable=False)
     payment_method = db.Column(db.String(30), nullable=False)
@@ -450,6 +581,9 @@ class Order(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # 规范化的订单商品（与 items JSON 同步写入，用于统计分析）
+    order_items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
+    
     # 交付方式常量
     DELIVERY_PICKUP = 'pickup'
     DELIVERY_SHIPPING = 'shipping'
@@ -509,11 +643,13 @@ class Order(db.Model):
         return []
     
     def set_items(self, items_list):
-        """设置订单商品列表"""
+        """设置订单商品列表（同时重建规范化的订单商品行）"""
         if isinstance(items_list, list):
             self.items = json.dumps(items_list, ensure_ascii=False)
         else:
+            items_list = []
             self.items = json.dumps([])
+        self.order_items = [OrderItem.from_item(item) for item in items_list if isinstance(item, dict)]
     
     def get_delivery_display(self):
         """获取交付方式显示名称"""
@@ -613,6 +749,105 @@ class Order(db.Model):
         return f'<Order {self.id}: {self.customer_name}>'
 
 
+class OrderItem(db.Model):
+    """订单商品模型 - 订单商品的规范化存储，记录下单时的单价和分类快照"""
+    __tablename__ = 'order_items'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, index=True)  # 不设外键，产品删除后仍保留销售记录
+    name = db.Column(db.String(200), nullable=False, default='')
+    quantity = db.Column(db.Integer, nullable=False, default=1)
+    unit_price = db.Column(db.Numeric(10, 2), nullable=False, default=0)
+    category = db.Column(db.String(50), index=True)  # 下单时的产品分类
+    
+    @classmethod
+    def from_item(cls, item, category=None):
+        """根据订单 items JSON 中的一项创建订单商品行"""
+        return cls(**cls.row_from_item(item, category))
+    
+    @staticmethod
+    def row_from_item(item, category=None):
+        """订单 items JSON 中的一项转换为列值字典"""
+        try:
+            quantity = int(item.get('quantity', 1))
+        except (TypeError, ValueError):
+            quantity = 1
+        try:
+            unit_price = float(item.get('price', 0))
+        except (TypeError, ValueError):
+            unit_price = 0.0
+        try:
+            # 旧订单中的商品ID可能是字符串（如 "12"）
+            product_id = int(item.get('id'))
+        except (TypeError, ValueError):
+            product_id = None
+        
+        return {
+            'product_id': product_id,
+            'name': str(item.get('name', ''))[:200],
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'category': category
+        }
+    
+    def __repr__(self):
+        return f'<OrderItem {self.id}: order {self.order_id} product {self.product_id}>'
+
+
+@event.listens_for(OrderItem, 'before_insert')
+def _snapshot_order_item_category(mapper, connection, target):
+    """写入订单商品时记录产品当前分类"""
+    if target.category is None and target.product_id is not None:
+        target.category = connection.execute(
+            db.select(Product.category).where(Product.id == target.product_id)
+        ).scalar()
+
+
+def backfill_order_items(batch_size=1000):
+    """
+    为没有规范化商品行的历史订单补写 order_items，按订单ID分批处理，返回写入的行数
+    分类快照取产品的当前分类（已删除的产品为空）
+    """
+    total = 0
+    last_id = 0
+    while True:
+        orders = db.session.query(Order.id, Order.items).filter(
+            Order.id > last_id,
+            ~db.exists().where(OrderItem.order_id == Order.id)
+        ).order_by(Order.id).limit(batch_size).all()
+        if not orders:
+            break
+        last_id = orders[-1].id
+        
+        rows = []
+        for order_id, items_json in orders:
+            try:
+                items = json.loads(items_json) if items_json else []
+            except (TypeError, ValueError):
+                items = []
+            for item in items if isinstance(items, list) else []:
+                if isinstance(item, dict):
+                    row = OrderItem.row_from_item(item)
+                    row['order_id'] = order_id
+                    rows.append(row)
+        
+        # 每批一次查询产品分类
+        product_ids = {row['product_id'] for row in rows if row['product_id'] is not None}
+        categories = dict(
+            db.session.query(Product.id, Product.category).filter(Product.id.in_(product_ids))
+        ) if product_ids else {}
+        for row in rows:
+            row['category'] = categories.get(row['product_id'])
+        
+        if rows:
+            db.session.execute(OrderItem.__table__.insert(), rows)
+        db.session.commit()
+        total += len(rows)
+    
+    return total
+
+
 class Message(db.Model):
     """留言模型 - 存储客户留言和咨询"""
     __tablename__ = 'messages'
@@ -689,8 +924,8 @@ def get_product_by_id(product_id):
     return Product.query.get(product_id)
 
 
-def get_products_by_category(category=None, available_only=True):
-    """根据分类获取产品列表"""
+def get_products_by_category_query(category=None, available_only=True):
+    """按分类筛选产品的查询（新商品优先）"""
     query = Product.query
     
     if category:
@@ -699,14 +934,49 @@ def get_products_by_category(category=None, available_only=True):
     if available_only:
         query = query.filter(Product.stock_status == Product.STATUS_AVAILABLE)
     
-    return query.order_by(Product.created_at.desc()).all()
+    return query.order_by(Product.created_at.desc())
+
+
+def get_products_by_category(category=None, available_only=True):
+    """根据分类获取产品列表"""
+    return get_products_by_category_query(category, available_only).all()
 
 
-def search_products(keyword):
-    """搜索产品 - 改进的全文搜索"""
+def filter_products_by_specifications(query, specs):
+    """按商品规格筛选产品查询，specs 为 {规格键: 值}，在数据库中按JSON字段比较；键名无效时抛出 ValueError"""
+    for key, value in specs.items():
+        query = query.filter(json_field(Product.specifications, key) == str(value))
+    return query
+
+
+def search_products(keyword, limit=None):
+    """搜索产品 - 基于搜索后端的全文搜索，limit 限制返回数量（只加载排名靠前的产品）"""
     if not keyword or not keyword.strip():
         return []
     
+    from .search import search_engine
+    from .search_cache import search_cache, search_key
+    ranked_ids = search_cache.get_or_compute(search_key(keyword), lambda: search_engine.search(keyword))
+    if ranked_ids is None:
+        # 搜索后端不可用（例如脚本环境），回退到数据库扫描
+        return _search_products_sql(keyword, limit)
+    if limit is not None:
+        ranked_ids = ranked_ids[:limit]
+    if not ranked_ids:
+        return []
+    
+    # 只加载命中的产品，并按相关性顺序返回
+    products = Product.query.filter(Product.id.in_(ranked_ids)).all()
+    rank = {product_id: position for position, product_id in enumerate(ranked_ids)}
+    products.sort(key=lambda product: rank[product.id])
+    
+    return products
+
+
+def _search_products_sql(keyword, limit=None):
+    """搜索产品 - 数据库LIKE扫描（索引不可用时使用），相关性在SQL中计算和排序"""
+    from .search import relevance_expression
+    
     # 清理和分割关键词
     keywords = [k.strip().lower() for k in keyword.split() if k.strip()]
     if not keywords:
@@ -715,58 +985,23 @@ def search_products(keyword):
     # 构建搜索查询
     query = Product.query.filter(Product.stock_status == Product.STATUS_AVAILABLE)
     
-    # 为每个关键词构建搜索条件
-    search_conditions = []
+    # 所有关键词都要匹配（AND逻辑）
     for kw in keywords:
         # 搜索名称、描述、分类和规格
-        condition = (
+        query = query.filter(
             db.func.lower(Product.name).contains(kw) |
             db.func.lower(Product.description).contains(kw) |
             db.func.lower(Product.category).contains(kw) |
             db.func.lower(Product.condition).contains(kw) |
-            db.func.lower(Product.specifications).contains(kw)
+            db.func.lower(json_text(Product.specifications)).contains(kw)
         )
-        search_conditions.append(condition)
-    
-    # 所有关键词都要匹配（AND逻辑）
-    if search_conditions:
-        final_condition = search_conditions[0]
-        for condition in search_conditions[1:]:
-            final_condition = final_condition & condition
-        query = query.filter(final_condition)
-    
-    # 按相关性排序：优先显示名称匹配的结果
-    results = query.all()
-    
-    # 简单的相关性排序
-    def calculate_relevance(product):
-        score = 0
-        name_lower = product.name.lower()
-        desc_lower = (product.description or '').lower()
-        
-        for kw in keywords:
-            # 名称完全匹配加分最多
-            if kw == name_lower:
-                score += 100
-            # 名称包含关键词
-            elif kw in name_lower:
-                score += 50
-            # 描述包含关键词  
-            elif kw in desc_lower:
-                score += 20
-            # 分类匹配
-            elif kw in product.category.lower():
-                score += 30
-            # 规格匹配
-            elif product.specifications and kw in product.specifications.lower():
-                score += 15
-        
-        return score
     
-    # 按相关性分数排序
-    results.sort(key=calculate_relevance, reverse=True)
+    # 按相关性分数排序，同分时新商品优先
+    query = query.order_by(relevance_expression(keywords).desc(), Product.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
     
-    return results
+    return query.all()
 
 
 def get_order_by_number(order_number):
@@ -804,9 +1039,9 @@ def create_admin(username, email, password, is_super_admin=False):
 
 
 def get_site_setting(key, default_value=None):
-    """获取网站设置"""
-    setting = SiteSettings.query.filter(SiteSettings.key == key).first()
-    return setting.value if setting else default_value
+    """获取网站设置（读取进程内快照，修改提交后自动刷新）"""
+    from .site_settings import site_settings
+    return site_settings.get(key, default_value)
 
 
 def set_site_setting(key, value, description=None):
@@ -824,45 +1059,49 @@ def set_site_setting(key, value, description=None):
 
 # 销售分析相关函数
 def get_sales_stats(start_date=None, end_date=None):
-    """获取销售统计数据"""
-    from sqlalchemy import func, extract
-    
-    # 基础查询
-    query = Order.query
+    """获取销售统计数据（聚合在数据库中完成）"""
+    from sqlalchemy import func
     
     # 日期过滤
+    filters = []
     if start_date:
-        query = query.filter(Order.created_at >= start_date)
+        filters.append(Order.created_at >= start_date)
     if end_date:
-        query = query.filter(Order.created_at <= end_date)
+        filters.append(Order.created_at <= end_date)
+    completed_filter = Order.status.in_(['completed', 'paid'])
     
     # 完成的订单
-    completed_orders = query.filter(Order.status.in_(['completed', 'paid'])).all()
-    
-    # 计算统计数据
-    total_orders = len(completed_orders)
-    total_revenue = sum(float(order.total_amount) for order in completed_orders)
+    total_orders, total_revenue = db.session.query(
+        func.count(Order.id), func.coalesce(func.sum(Order.total_amount), 0)
+    ).filter(completed_filter, *filters).one()
+    total_revenue = float(total_revenue)
     avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
     
     # 按状态统计
-    status_stats = {}
-    for status_code, status_name in Order.ORDER_STATUSES:
-        count = query.filter(Order.status == status_code).count()
-        status_stats[status_name] = count
+    status_counts = dict(
+        db.session.query(Order.status, func.count(Order.id)).filter(*filters).group_by(Order.status).all()
+    )
+    status_stats = {
+        status_name: status_counts.get(status_code, 0)
+        for status_code, status_name in Order.ORDER_STATUSES
+    }
     
-    # 按分类统计销售额
+    # 按分类统计销售额（使用下单时的分类快照）
+    category_rows = db.session.query(
+        OrderItem.category,
+        func.sum(OrderItem.quantity),
+        func.sum(OrderItem.quantity * OrderItem.unit_price)
+    ).join(Order, OrderItem.order_id == Order.id).filter(
+        completed_filter, OrderItem.category.isnot(None), *filters
+    ).group_by(OrderItem.category).all()
+    
+    display_names = dict(Product.CATEGORIES)
+    display_names.update(db.session.query(Category.name, Category.display_name).all())
     category_stats = {}
-    for order in completed_orders:
-        items = order.get_items()
-        for item in items:
-            # 从产品获取分类信息
-            product = Product.query.get(item.get('id'))
-            if product:
-                category = product.get_category_display()
-                if category not in category_stats:
-                    category_stats[category] = {'count': 0, 'revenue': 0}
-                category_stats[category]['count'] += item.get('quantity', 1)
-                category_stats[category]['revenue'] += float(item.get('price', 0)) * item.get('quantity', 1)
+    for category, count, revenue in category_rows:
+        stats = category_stats.setdefault(display_names.get(category, category), {'count': 0, 'revenue': 0})
+        stats['count'] += int(count or 0)
+        stats['revenue'] += float(revenue or 0)
     
     return {
         'total_orders': total_orders,
@@ -914,36 +1153,25 @@ def get_monthly_sales_trend(months=12):
 
 def get_popular_products(limit=10):
     """获取热门产品排行"""
-    # 从订单中统计产品销量
-    product_sales = {}
-    
-    completed_orders = Order.query.filter(Order.status.in_(['completed', 'paid'])).all()
-    
-    for order in completed_orders:
-        items = order.get_items()
-        for item in items:
-            product_id = item.get('id')
-            quantity = item.get('quantity', 1)
-            
-            if product_id not in product_sales:
-                product_sales[product_id] = {
-                    'product_id': product_id,
-                    'name': item.get('name', ''),
-                    'total_sold': 0,
-                    'total_revenue': 0
-                }
-            
-            product_sales[product_id]['total_sold'] += quantity
-            product_sales[product_id]['total_revenue'] += float(item.get('price', 0)) * quantity
-    
-    # 排序并返回前N个
-    sorted_products = sorted(
-        product_sales.values(),
-        key=lambda x: x['total_sold'],
-        reverse=True
-    )
+    from sqlalchemy import func
+    
+    # 从订单商品中统计产品销量
+    total_sold = func.sum(OrderItem.quantity)
+    rows = db.session.query(
+        OrderItem.product_id,
+        func.max(OrderItem.name),
+        total_sold,
+        func.sum(OrderItem.quantity * OrderItem.unit_price)
+    ).join(Order, OrderItem.order_id == Order.id).filter(
+        Order.status.in_(['completed', 'paid'])
+    ).group_by(OrderItem.product_id).order_by(total_sold.desc()).limit(limit).all()
     
-    return sorted_products[:limit]
+    return [{
+        'product_id': product_id,
+        'name': name or '',
+        'total_sold': int(sold or 0),
+        'total_revenue': float(revenue or 0)
+    } for product_id, name, sold, revenue in rows]
 
 
 def get_customer_stats():
@@ -996,12 +1224,17 @@ def get_customer_stats():
 
 
 # 分类管理相关函数
-def get_all_categories(active_only=True):
-    """获取所有分类"""
+def get_categories_query(active_only=True):
+    """分类查询（按排序权重和创建时间排序）"""
     query = Category.query
     if active_only:
         query = query.filter(Category.is_active == True)
-    return query.order_by(Category.sort_order, Category.created_at).all()
+    return query.order_by(Category.sort_order, Category.created_at)
+
+
+def get_all_categories(active_only=True):
+    """获取所有分类"""
+    return get_categories_query(active_only).all()
 
 
 def get_category_by_id(category_id):
@@ -1291,7 +1524,7 @@ class SiteInfoItem(db.Model):
     section_id = db.Column(db.Integer, db.ForeignKey('site_info_sections.id'), nullable=False)
     key = db.Column(db.String(50), nullable=False)  # 项目标识符
     item_type = db.Column(db.String(20), nullable=False)  # 项目类型
-    content = db.Column(db.Text)  # 内容（JSON格式存储复杂数据）
+    content = db.Column(JSONText)  # 内容（JSON格式存储复杂数据）
     sort_order = db.Column(db.Integer, default=0)  # 排序权重
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -1350,10 +1583,11 @@ class SiteInfoItem(db.Model):
         type_dict = dict(self.ITEM_TYPES)
         return type_dict.get(self.item_type, self.item_type)
     
-    def to_dict(self, lang='zh'):
-        """转换为字典格式"""
+    def to_dict(self, lang='zh', translated_content=None):
+        """转换为字典格式，translated_content 为已预先加载的翻译内容（批量加载时避免逐项查询）"""
         # 获取翻译内容，如果没有则使用默认内容
-        translated_content = self.get_translated_content(lang)
+        if translated_content is None:
+            translated_content = self.get_translated_content(lang)
         default_content = self.get_content()
         
         # 合并翻译内容和默认内容
@@ -1383,7 +1617,7 @@ class SiteInfoTranslation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     item_id = db.Column(db.Integer, db.ForeignKey('site_info_items.id'), nullable=False)
     language = db.Column(db.String(5), nullable=False)  # 语言代码，如'zh', 'en'
-    content = db.Column(db.Text, nullable=False)  # 翻译内容（JSON格式）
+    content = db.Column(JSONText, nullable=False)  # 翻译内容（JSON格式）
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -1452,16 +1686,37 @@ def get_site_info_items_by_section(section_key, active_only=True, lang='zh'):
 
 
 def get_all_site_info_data(lang='zh'):
-    """获取所有站点信息数据"""
+    """获取所有站点信息数据：部分、信息项和指定语言的翻译各一次查询"""
     sections = get_site_info_sections(active_only=True)
+    section_ids = [section.id for section in sections]
+
+    items_by_section = {section_id: [] for section_id in section_ids}
+    if section_ids:
+        items = SiteInfoItem.query.filter(
+            SiteInfoItem.section_id.in_(section_ids),
+            SiteInfoItem.is_active == True
+        ).order_by(SiteInfoItem.sort_order).all()
+        for item in items:
+            items_by_section[item.section_id].append(item)
+    else:
+        items = []
+
+    translations = {}
+    if items:
+        rows = SiteInfoTranslation.query.filter(
+            SiteInfoTranslation.item_id.in_([item.id for item in items]),
+            SiteInfoTranslation.language == lang
+        ).all()
+        translations = {translation.item_id: translation.get_content() for translation in rows}
+
     result = {}
-    
     for section in sections:
         result[section.key] = {
             'section': section.to_dict(),
-            'items': [item.to_dict(lang=lang) for item in section.get_active_items()]
+            'items': [item.to_dict(lang=lang, translated_content=translations.get(item.id, {}))
+                      for item in items_by_section[section.id]]
         }
-    
+
     return result
 
 
@@ -0,0 +1,177 @@
+"""
+整页缓存
+匿名访客看到的店铺页面（首页、商品列表、商品详情、信息页）对同一语言完全相同，
+完整响应按 协议和主机 + 路径（含语言前缀）+ 规范化查询参数 缓存在应用缓存中；
+页面中的 canonical/og:url 等地址由 canonical_url() 按同样的规范化参数生成，与缓存键一致。
+命中时直接返回，不经过语言解析、数据库查询和模板渲染。
+页面中与会话相关的 CSRF 令牌缓存时替换为占位符，输出时替换为当前会话的令牌；
+需要压缩的页面同时缓存分段预压缩的结果，命中时只压缩令牌并拼接为 gzip 响应体（见 compression.py）。
+失效按页面划分命名空间：产品变更只清除该产品的详情页和列表页，分类变更清除全部页面，
+站点信息修改清除信息页。
+缓存后端不跨进程共享（memory）时失效只作用于本进程，其他工作进程的页面按
+PAGE_CACHE_LOCAL_TIMEOUT 的较短过期时间刷新；多进程部署应使用 sqlite 或 redis 后端
+"""
+
+import logging
+from functools import wraps
+from urllib.parse import urlencode
+from flask import request, session, g, current_app, make_response
+from flask_wtf.csrf import generate_csrf
+from .cache import cache, MISSING
+from .compression import compressor
+from .signals import product_changed, category_changed, init_model_signals
+
+logger = logging.getLogger(__name__)
+
+# 页面缓存命名空间：全部页面 / 列表页 / 信息页 / 单个商品详情页
+PAGES_NAMESPACE = 'pages'
+LISTINGS_NAMESPACE = 'pages:listings'
+INFO_NAMESPACE = 'pages:info'
+PRODUCT_NAMESPACE = 'pages:product:{product_id}'
+
+_CSRF_PLACEHOLDER = b'__page_cache_csrf_token__'
+
+# 带有此 WSGI environ 键的请求不读写整页缓存（启动预热使用，HTTP 请求无法设置）
+BYPASS_ENVIRON_KEY = 'page_cache.bypass'
+
+
+def normalize_query_string(args):
+    """规范化查询参数：忽略空值，按参数名和值排序"""
+    return urlencode(sorted((key, value) for key, value in args.items(multi=True) if value))
+
+
+def canonical_url():
+    """当前页面的规范地址（协议和主机 + 路径 + 规范化查询参数），与整页缓存键一致"""
+    query_string = normalize_query_string(request.args)
+    url = request.host_url.rstrip('/') + request.path
+    return f'{url}?{query_string}' if query_string else url
+
+
+class PageCache:
+    """匿名访客整页缓存"""
+
+    def __init__(self):
+        self.enabled = True
+        self.timeout = 300
+
+    def init_app(self, app):
+        """读取配置并注册产品/分类变更监听（在 cache.init_app 之后调用）"""
+        self.enabled = app.config.get('PAGE_CACHE_ENABLED', self.enabled)
+        self.timeout = app.config.get('PAGE_CACHE_TIMEOUT', self.timeout)
+        if not cache.backend.shared:
+            # 其他进程的商品变更无法清除本进程的页面，只能缩短过期时间
+            self.timeout = min(self.timeout, app.config.get('PAGE_CACHE_LOCAL_TIMEOUT', 10))
+
+        init_model_signals()
+        product_changed.connect(self._on_product_changed)
+        category_changed.connect(self._on_category_changed)
+
+    def _on_product_changed(self, sender, upserts=None, deleted=None, **extra):
+        product_ids = set(upserts or ()) | set(deleted or ())
+        cache.invalidate(LISTINGS_NAMESPACE, *(PRODUCT_NAMESPACE.format(product_id=product_id)
+                                               for product_id in product_ids))
+
+    def _on_category_changed(self, sender, **extra):
+        # 分类名称显示在所有页面上
+        cache.invalidate(PAGES_NAMESPACE)
+
+    @staticmethod
+    def _cacheable_request():
+        """只缓存匿名访客的GET请求；已登录管理员、有待显示的提示消息或预热请求不使用缓存"""
+        return (request.method == 'GET'
+                and not request.environ.get(BYPASS_ENVIRON_KEY)
+                and '_user_id' not in session
+                and '_flashes' not in session)
+
+    @staticmethod
+    def _remember_language(lang):
+        """命中时跳过了语言解析，仍需同步会话中的语言偏好"""
+        from .i18n import LANGUAGES
+
+        if lang == 'zh':
+            lang = 'zh_CN'
+        if lang in LANGUAGES and session.get('language') != lang:
+            session['language'] = lang
+
+    def _store(self, namespaces, key, response):
+        """
+        缓存成功的完整响应，会话相关的 CSRF 令牌替换为占位符；
+        需要压缩的页面按占位符分段，各段的 deflate 块一并缓存
+        """
+        body = response.get_data()
+        token = g.get(current_app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token'))
+        if token:
+            body = body.replace(token.encode('utf-8'), _CSRF_PLACEHOLDER)
+
+        compressed_segments = None
+        if compressor.should_compress(body, response.mimetype):
+            compressed_segments = [compressor.deflate_segment(segment)
+                                   for segment in body.split(_CSRF_PLACEHOLDER)]
+        cache.set(namespaces, key,
+                  (body, response.mimetype, response.headers.get('Content-Language'), compressed_segments),
+                  self.timeout)
+
+    @staticmethod
+    def _build_response(entry):
+        body, mimetype, content_language, compressed_segments = entry
+        token = generate_csrf().encode('utf-8') if _CSRF_PLACEHOLDER in body else b''
+
+        if compressed_segments is not None and request.accept_encodings['gzip'] > 0:
+            # 接受 gzip 的客户端直接使用预压缩的分段（即使也接受 brotli），只压缩令牌
+            segments = body.split(_CSRF_PLACEHOLDER)
+            compressed_token = compressor.deflate_segment(token)
+            parts, compressed_parts = [segments[0]], [compressed_segments[0]]
+            for segment, compressed in zip(segments[1:], compressed_segments[1:]):
+                parts += [token, segment]
+                compressed_parts += [compressed_token, compressed]
+            response = make_response(compressor.join_gzip_segments(parts, compressed_parts))
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = make_response(body.replace(_CSRF_PLACEHOLDER, token) if token else body)
+
+        if compressed_segments is not None:
+            response.vary.add('Accept-Encoding')
+        response.mimetype = mimetype
+        if content_language:
+            response.headers['Content-Language'] = content_language
+        return response
+
+    def cached(self, *namespaces):
+        """
+        整页缓存装饰器，namespaces 可以引用路由参数，例如 'pages:product:{product_id}'；
+        响应头 X-Page-Cache 标明是否命中
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                if not self.enabled or not self._cacheable_request():
+                    return f(*args, **kwargs)
+
+                page_namespaces = (PAGES_NAMESPACE,) + tuple(
+                    namespace.format(**kwargs) for namespace in namespaces
+                )
+                # 页面中的绝对地址取自请求的协议和主机，不同主机的页面分开缓存
+                key = f'{request.host_url}{request.path.lstrip("/")}?{normalize_query_string(request.args)}'
+
+                entry = cache.get(page_namespaces, key)
+                if entry is not MISSING:
+                    self._remember_language(kwargs.get('lang'))
+                    response = self._build_response(entry)
+                    response.headers['X-Page-Cache'] = 'HIT'
+                else:
+                    response = make_response(f(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        return response
+                    self._store(page_namespaces, key, response)
+                    response.headers['X-Page-Cache'] = 'MISS'
+
+                # 页面内容包含会话的 CSRF 令牌
+                response.vary.add('Cookie')
+                return response
+
+            return decorated_function
+        return decorator
+
+
+# 全局整页缓存实例
+page_cache = PageCache()
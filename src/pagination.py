@@ -0,0 +1,131 @@
+"""
+游标（keyset）分页
+按当前排序键和产品ID定位下一页，每页只读取 per_page + 1 行，
+与页码深度和目录规模无关
+"""
+
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from .models import db, Product
+
+# 排序方式 -> (排序列, 是否降序)；产品ID作为相同排序值时的次级键
+SORT_OPTIONS = {
+    'newest': (Product.created_at, True),
+    'oldest': (Product.created_at, False),
+    'price_asc': (Product.price, False),
+    'price_desc': (Product.price, True),
+    'name': (Product.name, False)
+}
+DEFAULT_SORT = 'newest'
+
+# 每页数量
+DEFAULT_PER_PAGE = 24
+MAX_PER_PAGE = 100
+
+
+class InvalidCursor(ValueError):
+    """游标格式错误或与排序方式不匹配"""
+
+
+class KeysetPage:
+    """一页查询结果"""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_more(self):
+        return self.next_cursor is not None
+
+
+def normalize_sort(sort_by):
+    """未知的排序方式回退为默认排序"""
+    return sort_by if sort_by in SORT_OPTIONS else DEFAULT_SORT
+
+
+def clamp_per_page(per_page):
+    """限制每页数量范围"""
+    if not per_page or per_page < 1:
+        return DEFAULT_PER_PAGE
+    return min(per_page, MAX_PER_PAGE)
+
+
+def _encode_value(value):
+    """排序值转为可JSON序列化的形式"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decode_value(column, value):
+    """从游标还原排序值"""
+    if value is None:
+        raise InvalidCursor('游标排序值为空')
+    try:
+        if column is Product.created_at:
+            return datetime.fromisoformat(value)
+        if column is Product.price:
+            return Decimal(value)
+    except (TypeError, ValueError, InvalidOperation):
+        raise InvalidCursor('游标排序值格式错误')
+    return str(value)
+
+
+def encode_cursor(product, sort_by):
+    """根据当前页最后一个产品生成下一页游标"""
+    column = SORT_OPTIONS[sort_by][0]
+    payload = [sort_by, _encode_value(getattr(product, column.key)), product.id]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort_by):
+    """解析游标，返回 (排序值, 产品ID)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, value, product_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (TypeError, ValueError):
+        raise InvalidCursor('游标格式错误')
+
+    if cursor_sort != sort_by or not isinstance(product_id, int):
+        raise InvalidCursor('游标与排序方式不匹配')
+    return _decode_value(SORT_OPTIONS[sort_by][0], value), product_id
+
+
+def apply_sort(query, sort_by):
+    """按排序方式排序（产品ID作为次级键保证顺序稳定）"""
+    column, descending = SORT_OPTIONS[sort_by]
+    if descending:
+        return query.order_by(column.desc(), Product.id.desc())
+    return query.order_by(column.asc(), Product.id.asc())
+
+
+def paginate_keyset(query, sort_by, cursor=None, per_page=DEFAULT_PER_PAGE):
+    """获取游标之后的一页产品，query 不应包含排序"""
+    sort_by = normalize_sort(sort_by)
+    per_page = clamp_per_page(per_page)
+    column, descending = SORT_OPTIONS[sort_by]
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_by)
+        if descending:
+            query = query.filter(db.or_(
+                column < value,
+                db.and_(column == value, Product.id < last_id)
+            ))
+        else:
+            query = query.filter(db.or_(
+                column > value,
+                db.and_(column == value, Product.id > last_id)
+            ))
+
+    # 多取一行判断是否还有下一页
+    rows = apply_sort(query, sort_by).limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = encode_cursor(items[-1], sort_by) if len(rows) > per_page else None
+    return KeysetPage(items, next_cursor)
@@ -0,0 +1,487 @@
+"""
+商品搜索引擎
+进程内倒排索引，覆盖商品名称、描述、分类、成色和规格，
+中文按二元组切分，启动时全量构建，产品变更提交后增量更新
+"""
+
+import re
+import json
+import math
+import threading
+import time
+import logging
+from collections import Counter
+from flask import current_app
+from .models import db, Product
+from .db_types import json_text
+from .signals import product_changed, snapshot_product, init_model_signals
+from .fuzzy import TrigramIndex
+
+logger = logging.getLogger(__name__)
+
+# 参与索引的字段
+INDEXED_FIELDS = ('name', 'description', 'category', 'condition', 'specifications')
+
+# 相关性字段权重（名称完全相等另加分）
+FIELD_WEIGHTS = (('name', 50), ('category', 30), ('description', 20), ('specifications', 15))
+
+# 关键词只部分命中某字段时的折算系数
+PARTIAL_MATCH_FACTOR = 0.8
+
+# 中日文字符：CJK统一表意文字（含扩展A区、兼容区）和假名
+_CJK_CHARS = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_CJK_RE = re.compile(f'[{_CJK_CHARS}]')
+_SEGMENT_RE = re.compile(f'[{_CJK_CHARS}]+|[^\\W{_CJK_CHARS}]+', re.UNICODE)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def strip_tags(text):
+    """去除富文本描述中的HTML标签"""
+    return _TAG_RE.sub(' ', text) if text else ''
+
+
+def is_cjk(token):
+    """判断词元是否为中日文词元"""
+    return bool(_CJK_RE.match(token))
+
+
+def tokenize(text):
+    """将文本切分为小写词元 - 拉丁字母/数字按单词切分，中文连续片段切分为二元组"""
+    if not text:
+        return []
+
+    tokens = []
+    for segment in _SEGMENT_RE.findall(text.lower()):
+        if not is_cjk(segment):
+            tokens.append(segment)
+        elif len(segment) == 1:
+            tokens.append(segment)
+        else:
+            tokens.extend(segment[i:i + 2] for i in range(len(segment) - 1))
+    return tokens
+
+
+def tokenize_segments(text):
+    """将文本切分为小写片段 - 拉丁单词和完整的中文连续片段（不切分二元组），供数据库全文后端构造查询"""
+    return _SEGMENT_RE.findall(text.lower()) if text else []
+
+
+def make_document(snapshot):
+    """将产品快照转换为索引文档（小写字段 + 各字段词元集合）"""
+    doc = {
+        'id': snapshot['id'],
+        'name': snapshot['name'].lower(),
+        'description': strip_tags(snapshot['description']).lower(),
+        'category': snapshot['category'].lower(),
+        'condition': snapshot['condition'].lower(),
+        'specifications': snapshot['specifications'].lower(),
+        'created_at': snapshot['created_at'],
+        'updated_at': snapshot['updated_at']
+    }
+    doc['field_terms'] = {field: set(tokenize(doc[field])) for field in INDEXED_FIELDS}
+    doc['terms'] = set().union(*doc['field_terms'].values())
+    doc['fuzzy_terms'] = {
+        term for term in doc['field_terms']['name'] | set(tokenize(_spec_values(doc['specifications'])))
+        if not is_cjk(term)
+    }
+    return doc
+
+
+def _spec_values(specifications):
+    """提取规格JSON中的值文本"""
+    if not specifications:
+        return ''
+    try:
+        spec_dict = json.loads(specifications)
+    except (ValueError, TypeError):
+        return specifications
+    if not isinstance(spec_dict, dict):
+        return ''
+    return ' '.join(str(value) for value in spec_dict.values())
+
+
+def advance_stamp(stamp, count_delta, upserted, removed):
+    """
+    推算本进程的变更提交后 (数量, 最近更新时间) 目录戳应有的值，下次同步时与数据库比较即可发现其他进程的写入。
+    upserted 为写入后仍在目录中的条目的更新时间，removed 为移出目录的条目原来的更新时间；
+    移出的恰好是最近更新的条目时无法推算，返回 None（下次同步时重建）
+    """
+    if stamp is None:
+        return None
+
+    count, last_updated = stamp
+    times = [updated_at for updated_at in upserted if updated_at is not None]
+    if last_updated is not None:
+        if last_updated in removed and not any(updated_at >= last_updated for updated_at in times):
+            return None
+        times.append(last_updated)
+    return count + count_delta, max(times, default=None)
+
+
+def calculate_relevance(doc, keywords):
+    """计算文档与关键词的相关性分数"""
+    score = 0
+
+    for kw in keywords:
+        # 名称完全匹配加分最多
+        if kw == doc['name']:
+            score += 100
+            continue
+
+        tokens = set(tokenize(kw))
+        best = 0
+        for field, weight in FIELD_WEIGHTS:
+            if kw in doc[field]:
+                # 字段完整包含关键词
+                best = max(best, weight)
+            elif tokens:
+                # 部分命中（如中文二元组只命中一部分）按覆盖率折算
+                covered = len(tokens & doc['field_terms'][field]) / len(tokens)
+                best = max(best, weight * covered * PARTIAL_MATCH_FACTOR)
+        score += best
+
+    return score
+
+
+def relevance_expression(keywords):
+    """
+    生成与 calculate_relevance 对应的SQL相关性分数表达式，便于数据库 ORDER BY ... LIMIT
+    每个关键词取命中的最高字段权重；部分命中的覆盖率折算只在进程内索引中计算
+    """
+    score = db.literal(0)
+    for kw in keywords:
+        whens = [(db.func.lower(Product.name) == kw, 100)]
+        for field, weight in FIELD_WEIGHTS:
+            column = getattr(Product, field)
+            if field == 'specifications':
+                column = json_text(column)
+            whens.append((db.func.lower(column).contains(kw), weight))
+        score = score + db.case(*whens, else_=0)
+    return score
+
+
+class SearchIndex:
+    """商品倒排索引"""
+
+    # 词元扩展缓存上限
+    EXPAND_CACHE_SIZE = 2048
+
+    # 中文关键词至少需要命中的二元组比例
+    MIN_CJK_COVERAGE = 0.6
+
+    def __init__(self):
+        self.app = None
+        self.ready = False
+        self.sync_interval = 30
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()  # 同一时间只有一个线程检查/重建
+        self._docs = {}  # product_id -> 文档（小写字段）
+        self._postings = {}  # 词元 -> 产品ID集合
+        self._expand_cache = {}  # 查询词元 -> 包含它的索引词元
+        self._fuzzy = TrigramIndex()  # 名称和规格值词表，用于拼写容错
+        self._stamp = None
+        self._last_sync = 0.0
+
+    def init_app(self, app):
+        """绑定应用、注册变更监听并构建索引"""
+        self.app = app
+        self.sync_interval = app.config.get('SEARCH_INDEX_SYNC_INTERVAL', 30)
+
+        init_model_signals()
+        product_changed.connect(self._on_product_changed)
+
+        with app.app_context():
+            self.rebuild()
+
+    def rebuild(self):
+        """从数据库全量重建索引（在锁外构建，完成后整体替换，构建期间搜索照常使用旧索引）"""
+        start_time = time.time()
+        # 先取目录戳再读取商品，读取期间其他进程的写入会在下次同步时发现
+        stamp = self._catalog_stamp()
+        rows = db.session.query(
+            Product.id, Product.name, Product.description, Product.category,
+            Product.category_id, Product.condition, Product.specifications,
+            Product.stock_status, Product.price, Product.face_to_face_only,
+            Product.created_at, Product.updated_at
+        ).filter(Product.stock_status == Product.STATUS_AVAILABLE).yield_per(1000)
+
+        docs = {}
+        postings = {}
+        fuzzy = TrigramIndex()
+        for row in rows:
+            doc = make_document(snapshot_product(row))
+            docs[doc['id']] = doc
+            for term in doc['terms']:
+                postings.setdefault(term, set()).add(doc['id'])
+            fuzzy.add_terms(doc['fuzzy_terms'])
+
+        with self._lock:
+            self._docs = docs
+            self._postings = postings
+            self._fuzzy = fuzzy
+            self._expand_cache = {}
+            self._stamp = stamp
+            self._last_sync = time.monotonic()
+            self.ready = True
+
+        logger.info(f'搜索索引构建完成: {len(docs)}个商品, {len(postings)}个词元, 耗时{(time.time() - start_time) * 1000:.1f}ms')
+
+    def add_document(self, snapshot):
+        """添加或更新单个产品"""
+        with self._lock:
+            self.remove_document(snapshot['id'])
+            if snapshot['stock_status'] != Product.STATUS_AVAILABLE:
+                return
+
+            doc = make_document(snapshot)
+            self._docs[doc['id']] = doc
+            for term in doc['terms']:
+                if term not in self._postings:
+                    self._postings[term] = set()
+                    self._expand_cache.clear()
+                self._postings[term].add(doc['id'])
+            self._fuzzy.add_terms(doc['fuzzy_terms'])
+
+    def remove_document(self, product_id):
+        """从索引中移除单个产品"""
+        with self._lock:
+            doc = self._docs.pop(product_id, None)
+            if not doc:
+                return
+
+            for term in doc['terms']:
+                ids = self._postings.get(term)
+                if ids is None:
+                    continue
+                ids.discard(product_id)
+                if not ids:
+                    del self._postings[term]
+                    self._expand_cache.clear()
+            self._fuzzy.remove_terms(doc['fuzzy_terms'])
+
+    def _on_product_changed(self, sender, upserts=None, deleted=None, **extra):
+        """产品变更提交后增量更新索引"""
+        if not self.ready:
+            return
+
+        upserts = upserts or {}
+        with self._lock:
+            count = len(self._docs)
+            previous = {product_id: self._docs[product_id]
+                        for product_id in set(deleted or ()) | set(upserts) if product_id in self._docs}
+            for product_id in deleted or ():
+                self.remove_document(product_id)
+            for snapshot in upserts.values():
+                self.add_document(snapshot)
+
+            # 按本进程的变更推算目录戳，同步时仍能发现同一期间其他进程的写入
+            self._stamp = advance_stamp(
+                self._stamp, len(self._docs) - count,
+                [snapshot['updated_at'] for product_id, snapshot in upserts.items() if product_id in self._docs],
+                [doc['updated_at'] for product_id, doc in previous.items() if product_id not in self._docs]
+            )
+
+    def _catalog_stamp(self):
+        """获取目录版本戳（可用商品数量 + 最近更新时间）"""
+        count, last_updated = db.session.query(
+            db.func.count(Product.id),
+            db.func.max(Product.updated_at)
+        ).filter(Product.stock_status == Product.STATUS_AVAILABLE).one()
+        return count, last_updated
+
+    def _sync_if_stale(self):
+        """
+        定期检查其他进程写入的变更，必要时重建索引；
+        不持有索引锁调用，其他线程正在检查或重建时直接返回，继续使用当前索引
+        """
+        if not self.sync_interval or time.monotonic() - self._last_sync < self.sync_interval:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return
+
+        try:
+            stamp = self._catalog_stamp()
+            self._last_sync = time.monotonic()
+            with self._lock:
+                stale = stamp != self._stamp
+            if stale:
+                logger.info('检测到商品目录变化，重建搜索索引')
+                self.rebuild()
+        finally:
+            self._sync_lock.release()
+
+    def _expand(self, token):
+        """查找包含查询词元的所有索引词元（子串匹配）"""
+        terms = self._expand_cache.get(token)
+        if terms is None:
+            if len(self._expand_cache) >= self.EXPAND_CACHE_SIZE:
+                self._expand_cache.clear()
+            terms = [term for term in self._postings if token in term]
+            self._expand_cache[token] = terms
+        return terms
+
+    def _match_keyword(self, keyword):
+        """获取匹配单个关键词的产品ID集合"""
+        tokens = list(dict.fromkeys(tokenize(keyword)))
+        matched = None
+
+        # 拉丁词元必须全部命中（子串匹配）
+        for token in tokens:
+            if is_cjk(token):
+                continue
+            ids = set()
+            for term in self._expand(token):
+                ids |= self._postings[term]
+            matched = ids if matched is None else matched & ids
+            if not matched:
+                return set()
+
+        # 中文二元组按覆盖率匹配，允许“苹果笔记本”命中“苹果 MacBook 笔记本”
+        cjk_tokens = [token for token in tokens if is_cjk(token)]
+        if cjk_tokens:
+            hits = Counter()
+            for token in cjk_tokens:
+                # 单字扩展为包含它的词元，二元组直接查倒排表
+                terms = self._expand(token) if len(token) == 1 else [token]
+                ids = set()
+                for term in terms:
+                    ids |= self._postings.get(term, set())
+                hits.update(ids)
+
+            required = max(1, math.ceil(len(cjk_tokens) * self.MIN_CJK_COVERAGE))
+            cjk_ids = {pid for pid, count in hits.items() if count >= required}
+            matched = cjk_ids if matched is None else matched & cjk_ids
+
+        return matched or set()
+
+    def _match_all(self, keywords):
+        """获取匹配全部关键词的产品ID集合（AND逻辑，调用方持有锁）"""
+        candidates = None
+        for kw in keywords:
+            if not tokenize(kw):
+                continue
+            ids = self._match_keyword(kw)
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        return candidates or set()
+
+    def _rank(self, keywords):
+        """匹配全部关键词并按相关性排序（调用方持有锁）"""
+        candidates = self._match_all(keywords)
+        if not candidates:
+            return []
+
+        # 只对候选集计算相关性，同分时新商品优先
+        return sorted(
+            candidates,
+            key=lambda pid: (calculate_relevance(self._docs[pid], keywords), pid),
+            reverse=True
+        )
+
+    def _correct_keywords(self, keywords):
+        """将索引中不存在的拉丁词元替换为最接近的名称/规格词，无可纠正时返回None"""
+        corrected = []
+        changed = False
+        for kw in keywords:
+            for token in tokenize(kw):
+                if is_cjk(token) or self._expand(token):
+                    continue
+                matches = self._fuzzy.lookup(token, limit=1)
+                if matches:
+                    kw = kw.replace(token, matches[0][0])
+                    changed = True
+            corrected.append(kw)
+        return corrected if changed else None
+
+    def _lookup(self, keyword, find):
+        """用 find（_rank 或 _match_all）查询关键词，没有结果时尝试拼写纠正（如 macbok -> macbook）"""
+        keywords = [k.strip().lower() for k in keyword.split() if k.strip()]
+
+        self._sync_if_stale()
+
+        with self._lock:
+            found = find(keywords)
+            if not found:
+                corrected = self._correct_keywords(keywords)
+                if corrected:
+                    found = find(corrected)
+        return found
+
+    def search(self, keyword):
+        """搜索产品，返回按相关性排序的产品ID列表；索引未就绪时返回None"""
+        if not self.ready:
+            return None
+        if not keyword or not keyword.strip():
+            return []
+        return self._lookup(keyword, self._rank)
+
+    def match(self, keyword):
+        """只匹配不排序，返回升序的产品ID列表（筛选用，不计算相关性）；索引未就绪时返回None"""
+        if not self.ready:
+            return None
+        if not keyword or not keyword.strip():
+            return []
+        return sorted(self._lookup(keyword, self._match_all))
+
+    def get_stats(self):
+        """获取索引统计信息"""
+        with self._lock:
+            return {
+                'ready': self.ready,
+                'documents': len(self._docs),
+                'terms': len(self._postings)
+            }
+
+
+class SearchEngine:
+    """搜索入口 - 根据配置选择搜索后端"""
+
+    # 可选后端：memory（进程内倒排索引）、database（数据库原生全文索引）
+    BACKEND_MEMORY = 'memory'
+    BACKEND_DATABASE = 'database'
+
+    def init_app(self, app):
+        """根据 SEARCH_BACKEND 配置初始化搜索后端"""
+        backend_name = app.config.get('SEARCH_BACKEND', self.BACKEND_MEMORY)
+        backend = None
+
+        if backend_name == self.BACKEND_DATABASE:
+            from .fulltext import create_fulltext_backend
+            with app.app_context():
+                backend = create_fulltext_backend(db.engine)
+                if backend is not None and not backend.install():
+                    backend = None
+            if backend is None:
+                logger.warning('数据库全文搜索不可用，改用进程内索引')
+
+        if backend is None:
+            search_index.init_app(app)
+            backend = search_index
+
+        app.extensions['search_backend'] = backend
+
+    def get_backend(self):
+        """获取当前应用的搜索后端"""
+        return current_app.extensions.get('search_backend')
+
+    def search(self, keyword):
+        """搜索产品，返回按相关性排序的产品ID列表；后端不可用时返回None"""
+        backend = self.get_backend()
+        if backend is None:
+            return None
+        return backend.search(keyword)
+
+    def match(self, keyword):
+        """匹配产品（不排序），返回产品ID列表；后端不可用时返回None"""
+        backend = self.get_backend()
+        if backend is None:
+            return None
+        return backend.match(keyword)
+
+
+# 全局搜索索引实例
+search_index = SearchIndex()
+
+# 全局搜索入口
+search_engine = SearchEngine()
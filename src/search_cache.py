@@ -0,0 +1,128 @@
+"""
+搜索结果缓存
+按规范化的查询、筛选条件和排序缓存结果（产品ID列表等），LRU淘汰 + TTL过期，
+产品变更提交后整体失效；TTL用于兜底多进程部署下其他进程的写入
+"""
+
+import re
+import threading
+import time
+import logging
+from collections import OrderedDict
+from .signals import product_changed, init_model_signals
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def search_key(keyword):
+    """搜索关键词结果（排序后的产品ID列表）的缓存键"""
+    return ('search', normalize_query(keyword))
+
+
+def match_key(keyword):
+    """搜索关键词匹配集合（不排序的产品ID列表，列表页筛选用）的缓存键"""
+    return ('match', normalize_query(keyword))
+
+
+def normalize_query(text):
+    """规范化查询文本：去除首尾空白、合并连续空白并转为小写"""
+    return _WHITESPACE_RE.sub(' ', (text or '').strip()).lower()
+
+
+class SearchResultCache:
+    """LRU + TTL 搜索结果缓存"""
+
+    def __init__(self, max_size=512, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # 键 -> (过期时间, 结果)
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def init_app(self, app):
+        """读取配置并注册产品变更监听"""
+        self.max_size = app.config.get('SEARCH_CACHE_SIZE', self.max_size)
+        self.ttl = app.config.get('SEARCH_CACHE_TTL', self.ttl)
+        self.clear()
+
+        init_model_signals()
+        product_changed.connect(self._on_product_changed)
+
+    @property
+    def enabled(self):
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, key):
+        """读取缓存，未命中或已过期返回 None"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """读取缓存，未命中时调用 compute() 计算并写入（结果为 None 时不缓存）"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def _on_product_changed(self, sender, **extra):
+        """产品变更提交后缓存失效"""
+        with self._lock:
+            if self._entries:
+                self._invalidations += 1
+            self._entries.clear()
+
+    def get_stats(self):
+        """获取缓存统计"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations
+            }
+
+
+# 全局搜索结果缓存实例
+search_cache = SearchResultCache()
@@ -0,0 +1,267 @@
+"""
+批量序列化
+列表接口直接查询所需列（不构建ORM实例），分类显示名一次查询预取，
+逐行生成与 to_dict 相同结构的字典后整体编码为JSON；
+安装了 orjson 时使用其解析和编码（可选依赖），否则回退到标准库 json
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from operator import itemgetter
+from flask import current_app, stream_with_context
+from sqlalchemy.orm import Query
+from .models import db, Product, Category
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# 流式读取时每批从数据库获取的行数
+STREAM_BATCH_SIZE = 500
+
+
+def _default(value):
+    """标准库和 orjson 都不能直接编码的类型"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'无法序列化的类型: {type(value).__name__}')
+
+
+def dumps(data):
+    """编码为JSON字节串，键排序与应用的 JSON 配置一致"""
+    sort_keys = current_app.json.sort_keys
+    if orjson is not None:
+        option = orjson.OPT_SORT_KEYS if sort_keys else 0
+        return orjson.dumps(data, default=_default, option=option)
+    return json.dumps(
+        data, default=_default, sort_keys=sort_keys, ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+
+
+def json_response(data, status=200):
+    """一次编码生成JSON响应（替代 jsonify）"""
+    return current_app.response_class(dumps(data), status=status, mimetype='application/json')
+
+
+def ndjson_response(records):
+    """逐条编码的流式NDJSON响应（每行一个JSON对象），records 在请求上下文中惰性迭代"""
+    def generate():
+        for record in records:
+            yield dumps(record) + b'\n'
+
+    return current_app.response_class(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+
+def _parse_json(raw, default_type):
+    """解析JSON文本列，无效或类型不符时返回空值"""
+    if raw:
+        try:
+            value = _loads(raw)
+            if isinstance(value, default_type):
+                return value
+        except ValueError:
+            pass
+    return default_type()
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+class InvalidFields(ValueError):
+    """请求了不存在的字段"""
+
+    def __init__(self, message, allowed=()):
+        super().__init__(message)
+        self.allowed = allowed
+
+
+def parse_fields(value, allowed):
+    """解析逗号分隔的 ?fields= 参数，未指定时返回 None（全部字段）"""
+    if not value:
+        return None
+
+    fields = []
+    for field in value.split(','):
+        field = field.strip()
+        if field and field not in fields:
+            fields.append(field)
+
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise InvalidFields(f"未知字段: {', '.join(unknown)}", allowed)
+    return fields or None
+
+
+class ModelSerializer:
+    """
+    按列值序列化模型：请求的字段决定查询的列，大文本列未被请求时不会从数据库读取
+    FIELDS 为 输出字段 -> 所需列名；同名的 get_<字段> 方法计算派生值，否则直接输出列值
+    """
+
+    model = None
+    FIELDS = {}
+
+    def __init__(self, fields=None):
+        self.fields = list(self.FIELDS) if fields is None else list(fields)
+
+        keys = []
+        for field in self.fields:
+            for key in self.FIELDS[field]:
+                if key not in keys:
+                    keys.append(key)
+        self.keys = tuple(keys)
+        self.columns = tuple(getattr(self.model, key) for key in keys)
+        self._getters = [
+            (field, getattr(self, f'get_{field}', None) or itemgetter(field))
+            for field in self.fields
+        ]
+
+    def prepare(self, row):
+        """序列化前对整行的预处理（如解析共享的JSON列）"""
+        return row
+
+    def serialize(self, values):
+        """序列化一行，values 为按 keys 顺序的列值"""
+        row = self.prepare(dict(zip(self.keys, values)))
+        return {field: getter(row) for field, getter in self._getters}
+
+    def values(self, instance):
+        """模型实例的列值（与 keys 顺序一致）"""
+        return tuple(getattr(instance, key) for key in self.keys)
+
+    def rows(self, query):
+        """只查询所需的列"""
+        return query.with_entities(*self.columns)
+
+    def serialize_all(self, items):
+        """批量序列化，items 可以是查询（只查询所需列）或模型实例列表"""
+        if isinstance(items, Query):
+            return [self.serialize(row) for row in self.rows(items)]
+        return [self.serialize(self.values(item)) for item in items]
+
+
+class ProductSerializer(ModelSerializer):
+    """产品序列化器：全部字段时与 Product.to_dict 结果相同"""
+
+    model = Product
+    FIELDS = {
+        'id': ('id',),
+        'name': ('name',),
+        'description': ('description',),
+        'price': ('price',),
+        'category': ('category',),
+        'category_display': ('category_id', 'category'),
+        'condition': ('condition',),
+        'stock_status': ('stock_status',),
+        'status_display': ('stock_status',),
+        'face_to_face_only': ('face_to_face_only',),
+        'images': ('images',),
+        'cover_image': ('cover_image', 'images'),
+        'image_count': ('images',),
+        'specifications': ('specifications',),
+        'is_available': ('stock_status', 'track_inventory', 'quantity'),
+        'created_at': ('created_at',),
+        'updated_at': ('updated_at',)
+    }
+
+    def __init__(self, fields=None):
+        super().__init__(fields)
+        self.status_names = dict(Product.STOCK_STATUSES)
+        self.legacy_category_names = dict(Product.CATEGORIES)
+        self.category_names = None
+
+    def prefetch(self):
+        """一次查询加载全部分类显示名（分类表很小）"""
+        self.category_names = dict(db.session.query(Category.id, Category.display_name).all())
+
+    def prepare(self, row):
+        if 'images' in row:
+            row['images'] = _parse_json(row['images'], list)
+        return row
+
+    def get_price(self, row):
+        return float(row['price'])
+
+    def get_category_display(self, row):
+        if self.category_names is None:
+            self.prefetch()
+        display_name = self.category_names.get(row['category_id'])
+        if display_name is not None:
+            return display_name
+        return self.legacy_category_names.get(row['category'], row['category'])
+
+    def get_status_display(self, row):
+        return self.status_names.get(row['stock_status'], row['stock_status'])
+
+    def get_cover_image(self, row):
+        images = row['images']
+        return row['cover_image'] or (images[0] if images else None)
+
+    def get_image_count(self, row):
+        return len(row['images'])
+
+    def get_specifications(self, row):
+        return _parse_json(row['specifications'], dict)
+
+    def get_is_available(self, row):
+        return row['stock_status'] == Product.STATUS_AVAILABLE and (not row['track_inventory'] or row['quantity'] > 0)
+
+    def get_created_at(self, row):
+        return _isoformat(row['created_at'])
+
+    def get_updated_at(self, row):
+        return _isoformat(row['updated_at'])
+
+
+class CategorySerializer(ModelSerializer):
+    """分类序列化器：可用商品数量读取分类上的计数列，列表只需一次查询"""
+
+    model = Category
+    FIELDS = {
+        'id': ('id',),
+        'name': ('name',),
+        'display_name': ('display_name',),
+        'description': ('description',),
+        'slug': ('slug',),
+        'icon': ('icon',),
+        'sort_order': ('sort_order',),
+        'is_active': ('is_active',),
+        'product_count': ('available_product_count',),
+        'created_at': ('created_at',),
+        'updated_at': ('updated_at',)
+    }
+
+    def get_product_count(self, row):
+        return row['available_product_count'] or 0
+
+    def get_created_at(self, row):
+        return _isoformat(row['created_at'])
+
+    def get_updated_at(self, row):
+        return _isoformat(row['updated_at'])
+
+
+def serialize_products(products, fields=None):
+    """批量序列化产品，products 可以是查询（只查询所需列）或产品实例列表"""
+    return ProductSerializer(fields).serialize_all(products)
+
+
+def iter_serialized_products(query, fields=None, batch_size=STREAM_BATCH_SIZE):
+    """按批读取查询结果并逐行序列化（内存占用与结果总数无关）"""
+    serializer = ProductSerializer(fields)
+    for row in serializer.rows(query).yield_per(batch_size):
+        yield serializer.serialize(row)
+
+
+def serialize_categories(categories, fields=None):
+    """批量序列化分类，categories 可以是查询或分类实例列表"""
+    return CategorySerializer(fields).serialize_all(categories)
@@ -0,0 +1,120 @@
+"""
+模型变更信号
+在数据库事务提交后广播产品、分类和网站设置变更，供搜索索引、缓存等进程内结构增量更新
+"""
+
+from blinker import Namespace
+from sqlalchemy import event
+from .models import db, Product, Category, SiteSettings
+
+_signals = Namespace()
+
+# 产品变更信号：事务提交后发送
+# 参数: upserts - {product_id: 快照字典}，deleted - 被删除的产品ID集合
+product_changed = _signals.signal('product-changed')
+
+# 分类变更信号：事务提交后发送，参数同上
+category_changed = _signals.signal('category-changed')
+
+# 网站设置变更信号：事务提交后发送，参数同上
+site_settings_changed = _signals.signal('site-settings-changed')
+
+_PENDING_KEY = 'pending_model_changes'
+_listeners_installed = False
+
+
+def snapshot_product(product):
+    """生成产品的纯数据快照（不依赖会话，可在提交后安全使用）"""
+    return {
+        'id': product.id,
+        'name': product.name or '',
+        'description': product.description or '',
+        'category': product.category or '',
+        'category_id': product.category_id,
+        'condition': product.condition or '',
+        'specifications': product.specifications or '',
+        'stock_status': product.stock_status,
+        'price': float(product.price) if product.price is not None else 0.0,
+        'face_to_face_only': bool(product.face_to_face_only),
+        'created_at': product.created_at,
+        'updated_at': product.updated_at
+    }
+
+
+def snapshot_category(category):
+    """生成分类的纯数据快照"""
+    return {
+        'id': category.id,
+        'name': category.name,
+        'display_name': category.display_name,
+        'slug': category.slug,
+        'is_active': bool(category.is_active),
+        'updated_at': category.updated_at
+    }
+
+
+def snapshot_site_setting(setting):
+    """生成网站设置的纯数据快照"""
+    return {'id': setting.id, 'key': setting.key, 'value': setting.value}
+
+
+# 受跟踪的模型：模型类 -> (信号, 快照函数)
+TRACKED_MODELS = {
+    Product: (product_changed, snapshot_product),
+    Category: (category_changed, snapshot_category),
+    SiteSettings: (site_settings_changed, snapshot_site_setting)
+}
+
+
+def _get_pending(session, model):
+    """获取会话中某个模型待广播的变更"""
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    return pending.setdefault(model, {'upserts': {}, 'deleted': set()})
+
+
+def _after_flush(session, flush_context):
+    """刷新后记录受跟踪模型的变更快照"""
+    for obj in list(session.new) + list(session.dirty):
+        tracked = TRACKED_MODELS.get(type(obj))
+        if tracked is None or obj.id is None:
+            continue
+        pending = _get_pending(session, type(obj))
+        pending['upserts'][obj.id] = tracked[1](obj)
+        pending['deleted'].discard(obj.id)
+
+    for obj in session.deleted:
+        if type(obj) not in TRACKED_MODELS or obj.id is None:
+            continue
+        pending = _get_pending(session, type(obj))
+        pending['upserts'].pop(obj.id, None)
+        pending['deleted'].add(obj.id)
+
+
+def _after_commit(session):
+    """提交后广播变更"""
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+
+    for model, changes in pending.items():
+        if not changes['upserts'] and not changes['deleted']:
+            continue
+        signal = TRACKED_MODELS[model][0]
+        signal.send(session, upserts=changes['upserts'], deleted=changes['deleted'])
+
+
+def _after_rollback(session):
+    """回滚后丢弃未提交的变更"""
+    session.info.pop(_PENDING_KEY, None)
+
+
+def init_model_signals():
+    """注册会话事件监听（只注册一次）"""
+    global _listeners_installed
+    if _listeners_installed:
+        return
+
+    event.listen(db.session, 'after_flush', _after_flush)
+    event.listen(db.session, 'after_commit', _after_commit)
+    event.listen(db.session, 'after_rollback', _after_rollback)
+    _listeners_installed = True
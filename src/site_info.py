@@ -0,0 +1,40 @@
+"""
+站点信息页面缓存
+/info 页面的站点信息数据和渲染后的内容片段按语言缓存在应用缓存的 site_info 命名空间中，
+管理员添加、编辑或删除信息项后失效（同时清除整页缓存中的信息页）；
+进程内缓存后端的失效不会到达其他工作进程，条目按 cache.capped_timeout() 的较短时间过期
+"""
+
+from flask import render_template
+from flask_wtf.csrf import generate_csrf
+from markupsafe import Markup
+from .cache import cache
+from .models import get_all_site_info_data
+from .page_cache import INFO_NAMESPACE
+
+SITE_INFO_NAMESPACE = 'site_info'
+
+# 片段中联系表单的 CSRF 令牌与会话相关，缓存时用占位符代替，输出时替换为当前会话的令牌
+_CSRF_PLACEHOLDER = '__site_info_csrf_token__'
+
+
+def get_site_info_data(lang):
+    """按语言缓存的站点信息数据"""
+    return cache.get_or_set(SITE_INFO_NAMESPACE, f'data:{lang}', lambda: get_all_site_info_data(lang),
+                            cache.capped_timeout())
+
+
+def render_site_info_sections(lang, site_info_data):
+    """渲染 /info 页面的站点信息部分，渲染结果按语言缓存"""
+    html = cache.get_or_set(
+        SITE_INFO_NAMESPACE, f'html:{lang}',
+        lambda: render_template('_site_info_sections.html', site_info_data=site_info_data,
+                                csrf_token=lambda: _CSRF_PLACEHOLDER),
+        cache.capped_timeout()
+    )
+    return Markup(html.replace(_CSRF_PLACEHOLDER, generate_csrf()))
+
+
+def invalidate_site_info():
+    """站点信息修改后使缓存的数据、片段和整页缓存的信息页失效"""
+    cache.invalidate(SITE_INFO_NAMESPACE, INFO_NAMESPACE)
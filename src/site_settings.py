@@ -0,0 +1,83 @@
+"""
+网站设置快照
+site_settings 表很小但读取频繁（每个需要 API Key 的请求都要读取 api_key_hash），
+整张表加载为进程内字典，后续读取不再查询数据库。
+设置修改提交后本进程的快照立即失效；其他进程每 SITE_SETTINGS_CHECK_INTERVAL 秒
+从数据库读取一次版本戳（记录数 + 最近更新时间），发现变化后重新加载。
+版本戳存放在所有进程共享的数据库中，不依赖应用缓存后端是否跨进程共享
+"""
+
+import threading
+import time
+import logging
+from .models import db, SiteSettings
+from .signals import site_settings_changed, init_model_signals
+
+logger = logging.getLogger(__name__)
+
+
+class SiteSettingsSnapshot:
+    """网站设置进程内快照"""
+
+    def __init__(self, check_interval=1):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._values = None
+        self._version = None
+        self._checked_at = 0.0
+        self.loads = 0
+
+    def init_app(self, app):
+        """读取配置并注册设置变更监听"""
+        self.check_interval = app.config.get('SITE_SETTINGS_CHECK_INTERVAL', self.check_interval)
+        self.invalidate()
+
+        init_model_signals()
+        site_settings_changed.connect(self._on_changed)
+
+    def invalidate(self):
+        """丢弃本进程的快照"""
+        with self._lock:
+            self._values = None
+
+    def _on_changed(self, sender, **extra):
+        self.invalidate()
+
+    @staticmethod
+    def _stamp():
+        """读取设置表的版本戳（记录数 + 最近更新时间）"""
+        return tuple(db.session.query(
+            db.func.count(SiteSettings.id),
+            db.func.max(SiteSettings.updated_at)
+        ).one())
+
+    def _current_values(self):
+        """返回有效的快照，版本戳变化或快照失效时重新加载"""
+        now = time.monotonic()
+        with self._lock:
+            values, version = self._values, self._version
+            check = now - self._checked_at >= self.check_interval
+            if check:
+                self._checked_at = now
+
+        if values is not None and check:
+            if self._stamp() != version:
+                values = None
+        if values is not None:
+            return values
+
+        # 先读版本戳再加载，加载期间发生的修改会在下次检查时发现
+        version = self._stamp()
+        values = dict(db.session.query(SiteSettings.key, SiteSettings.value).all())
+        with self._lock:
+            self._values, self._version, self._checked_at = values, version, now
+            self.loads += 1
+        return values
+
+    def get(self, key, default_value=None):
+        """获取设置值"""
+        return self._current_values().get(key, default_value)
+
+
+# 全局网站设置快照
+site_settings = SiteSettingsSnapshot()
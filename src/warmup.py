@@ -0,0 +1,146 @@
+"""
+启动预热
+部署后每个进程的首批请求需要编译模板、加载翻译目录、配置ORM映射并填充空的缓存。
+warm_up() 在启动时预先完成这些工作并记录每一步的耗时：
+- WARMUP_ON_STARTUP 为真时由 create_app 调用
+- 使用 gunicorn --preload（见 gunicorn.conf.py）时只在主进程预热一次，
+  预热结果通过 fork 复制给各工作进程，fork 后由 init_worker_process() 重建数据库连接池、
+  缓存后端连接并启动后台线程（PRELOAD_APP 为真时主进程不启动后台线程）
+预热后冻结启动对象（freeze_startup_objects），垃圾回收不再反复扫描它们
+"""
+
+import gc
+import time
+import logging
+from sqlalchemy.orm import configure_mappers
+
+logger = logging.getLogger(__name__)
+
+# 站点信息和商品列表按这些语言预热（与 URL 中的语言前缀一致）
+WARMUP_LANGUAGES = ('en', 'zh_CN')
+
+
+def _configure_mappers(app):
+    """配置全部ORM映射（首次查询时才会执行的关系解析）"""
+    from .models import db
+
+    configure_mappers()
+    return len(db.Model.registry.mappers)
+
+
+def _compile_templates(app):
+    """编译全部模板（Jinja 缓存编译结果）"""
+    names = app.jinja_env.list_templates(extensions=('html', 'xml', 'txt'))
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def _load_translations(app):
+    """加载每种语言的翻译目录"""
+    from flask_babel import force_locale, get_translations
+
+    with app.test_request_context():
+        for lang in WARMUP_LANGUAGES:
+            with force_locale(lang):
+                get_translations()
+    return len(WARMUP_LANGUAGES)
+
+
+def _load_categories(app):
+    """加载分类列表（/api/categories 的序列化结果）"""
+    from .api.routes import serialized_categories
+
+    with app.test_request_context():
+        return len(serialized_categories(None))
+
+
+def _load_site_info(app):
+    """加载每种语言的站点信息数据和渲染片段"""
+    from flask_babel import force_locale
+    from .site_info import get_site_info_data, render_site_info_sections
+
+    for lang in WARMUP_LANGUAGES:
+        # 信息页按 get_locale().language 缓存（zh_CN -> zh）
+        cache_lang = lang.split('_')[0]
+        with app.test_request_context(f'/{lang}/info'):
+            with force_locale(lang):
+                render_site_info_sections(cache_lang, get_site_info_data(cache_lang))
+    return len(WARMUP_LANGUAGES)
+
+
+def _load_product_pages(app):
+    """
+    以匿名访客身份请求每种语言的商品列表第一页，填充列表数据和商品卡片片段缓存；
+    不写入整页缓存，页面中的绝对地址来自真实请求的主机，而不是测试客户端的 localhost
+    """
+    from .page_cache import BYPASS_ENVIRON_KEY
+
+    client = app.test_client()
+    for lang in WARMUP_LANGUAGES:
+        # 每个请求使用新的应用上下文，否则 Flask-Babel 会沿用 g 中上一个请求的语言
+        with app.app_context():
+            response = client.get(f'/{lang}/products', environ_base={BYPASS_ENVIRON_KEY: True})
+        if response.status_code != 200:
+            raise RuntimeError(f'/{lang}/products 返回 {response.status_code}')
+    return len(WARMUP_LANGUAGES)
+
+
+WARMUP_STEPS = (
+    ('mappers', _configure_mappers),
+    ('templates', _compile_templates),
+    ('translations', _load_translations),
+    ('categories', _load_categories),
+    ('site_info', _load_site_info),
+    ('product_pages', _load_product_pages),
+)
+
+
+def warm_up(app):
+    """
+    依次执行预热步骤，返回 [{'step', 'seconds', 'result'}]；
+    单个步骤失败只记录警告，不影响启动
+    """
+    from .models import db
+
+    report = []
+    started = time.perf_counter()
+    with app.app_context():
+        for name, step in WARMUP_STEPS:
+            step_started = time.perf_counter()
+            try:
+                result = step(app)
+            except Exception as e:
+                db.session.rollback()
+                logger.warning(f'预热步骤 {name} 失败: {str(e)}')
+                result = None
+            seconds = round(time.perf_counter() - step_started, 4)
+            report.append({'step': name, 'seconds': seconds, 'result': result})
+        db.session.remove()
+
+    total = time.perf_counter() - started
+    summary = ', '.join(f"{item['step']}={item['seconds'] * 1000:.0f}ms" for item in report)
+    logger.info(f'启动预热完成，耗时 {total * 1000:.0f}ms: {summary}')
+    app.extensions['warmup_report'] = report
+    return report
+
+
+def freeze_startup_objects():
+    """
+    回收垃圾后冻结现有对象：启动期间创建的模块、模板和缓存对象不再参与垃圾回收扫描，
+    减少之后每次完整回收的耗时；fork 前调用还能避免子进程回收时写入共享内存页
+    """
+    gc.collect()
+    gc.freeze()
+
+
+def init_worker_process(app):
+    """fork 后在工作进程中调用：丢弃继承的数据库和缓存连接，启动后台线程"""
+    from .models import db
+    from .cache import cache
+    from .email_queue import email_queue
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+    cache.reset_after_fork()
+    email_queue.restart_after_fork()
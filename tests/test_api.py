@@ -0,0 +1,247 @@
+"""
+公开API测试
+"""
+import json
+import pytest
+from src.models import db, Product, Category, init_default_categories
+from src.serializers import serialize_products
+
+
+def add_products():
+    """创建测试产品：关联分类、仅旧分类字段、无图片各一个"""
+    init_default_categories()
+    electronics = Category.query.filter_by(name='electronics').first()
+
+    phone = Product(name='Phone', price=30, category='electronics', category_id=electronics.id,
+                    condition='全新', stock_status='available')
+    phone.set_images(['https://example.com/1.jpg', 'https://example.com/2.jpg'])
+    phone.set_specifications({'brand': 'Apple'})
+    jacket = Product(name='Jacket', price=40, category='clothing', condition='9成新',
+                     stock_status='available', quantity=0)
+    sold = Product(name='Sold', price=10, category='other', condition='9成新', stock_status='sold')
+    db.session.add_all([phone, jacket, sold])
+    db.session.commit()
+    return [phone, jacket, sold]
+
+
+class TestSerializers:
+    """批量序列化测试"""
+
+    def test_matches_to_dict(self, client):
+        """测试批量序列化结果与 to_dict 一致（查询和实例两种输入）"""
+        with client.application.app_context():
+            products = add_products()
+            expected = [product.to_dict() for product in products]
+
+            assert serialize_products(products) == expected
+            assert serialize_products(Product.query.order_by(Product.id)) == expected
+
+
+class TestProductsAPI:
+    """产品接口测试"""
+
+    def test_list_products(self, client):
+        """测试产品列表只返回可用商品"""
+        with client.application.app_context():
+            add_products()
+
+        response = client.get('/api/products')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/json'
+        data = json.loads(response.get_data(as_text=True))
+        assert [product['name'] for product in data] == ['Phone', 'Jacket']
+        assert data[0]['category_display'] == '电子产品'
+        assert data[0]['cover_image'] == 'https://example.com/1.jpg'
+        assert data[1]['is_available'] is False
+
+    def test_categories_product_count(self, client):
+        """测试分类列表的可用商品数量"""
+        with client.application.app_context():
+            add_products()
+
+        data = client.get('/api/categories').get_json()
+        counts = {category['name']: category['product_count'] for category in data}
+        assert counts['electronics'] == 1
+        assert counts['clothing'] == 0
+
+    def test_stream_products_ndjson(self, client):
+        """测试流式NDJSON输出（查询参数和Accept头两种方式）"""
+        with client.application.app_context():
+            add_products()
+        expected = client.get('/api/products').get_json()
+
+        for kwargs in ({'query_string': {'stream': '1'}}, {'headers': {'Accept': 'application/x-ndjson'}}):
+            response = client.get('/api/products', **kwargs)
+            assert response.status_code == 200
+            assert response.mimetype == 'application/x-ndjson'
+            lines = response.get_data(as_text=True).splitlines()
+            assert [json.loads(line) for line in lines] == expected
+
+    def test_sparse_fieldsets(self, client):
+        """测试 ?fields= 只返回并只查询请求的字段"""
+        from sqlalchemy import event
+
+        with client.application.app_context():
+            add_products()
+
+            statements = []
+            def capture(conn, cursor, statement, *args):
+                statements.append(statement)
+            event.listen(db.engine, 'before_cursor_execute', capture)
+            try:
+                response = client.get('/api/products?fields=id,name,cover_image')
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', capture)
+
+        assert response.get_json() == [
+            {'id': 1, 'name': 'Phone', 'cover_image': 'https://example.com/1.jpg'},
+            {'id': 2, 'name': 'Jacket', 'cover_image': None}
+        ]
+        product_query = next(statement for statement in statements if 'FROM products' in statement)
+        assert 'description' not in product_query
+        assert 'specifications' not in product_query
+
+        assert client.get('/api/products/1?fields=price').get_json() == {'price': 30.0}
+        categories = client.get('/api/categories?fields=name,product_count').get_json()
+        assert {'name': 'electronics', 'product_count': 1} in categories
+
+        response = client.get('/api/products?fields=id,password')
+        assert response.status_code == 400
+        assert 'password' in response.get_json()['error']
+
+    def test_filter_by_specifications(self, client):
+        """测试 ?spec.<键>=<值> 在数据库中按规格筛选"""
+        with client.application.app_context():
+            add_products()
+
+        data = client.get('/api/products?spec.brand=Apple&fields=name').get_json()
+        assert data == [{'name': 'Phone'}]
+        assert client.get('/api/products?spec.brand=Sony').get_json() == []
+
+        lines = client.get('/api/products?spec.brand=Apple&stream=1&fields=name').get_data(as_text=True).splitlines()
+        assert [json.loads(line) for line in lines] == [{'name': 'Phone'}]
+
+        # 任意键名作为参数绑定，不会拼接进SQL
+        assert client.get("/api/products?spec.brand')--=x").get_json() == []
+        assert client.get('/api/products?spec.=x').status_code == 400
+
+    def test_filter_by_non_ascii_specification_key(self, client):
+        """测试中文规格键名可以筛选，规格不是合法JSON的商品不会导致查询出错"""
+        with client.application.app_context():
+            phone = Product(name='Phone', price=30, category='electronics', condition='全新', stock_status='available')
+            phone.set_specifications({'品牌': '苹果', '屏幕 尺寸': '6.1"'})
+            broken = Product(name='Broken', price=10, category='other', condition='9成新',
+                             stock_status='available', specifications='{not json')
+            db.session.add_all([phone, broken])
+            db.session.commit()
+
+        assert client.get('/api/products?spec.品牌=苹果&fields=name').get_json() == [{'name': 'Phone'}]
+        assert client.get('/api/products?spec.屏幕 尺寸=6.1"&fields=name').get_json() == [{'name': 'Phone'}]
+        assert client.get('/api/products?spec.brand=Apple').get_json() == []
+
+
+class TestConditionalRequests:
+    """目录接口条件请求测试"""
+
+    def test_etag_not_modified(self, client, monkeypatch):
+        """测试 If-None-Match 命中时返回304且不执行序列化，目录变更后ETag变化"""
+        from src.api import routes
+
+        with client.application.app_context():
+            product_id = add_products()[0].id
+
+        response = client.get('/api/products')
+        etag = response.headers['ETag']
+        assert response.last_modified is not None
+        assert client.get('/api/products?fields=id').headers['ETag'] != etag
+
+        monkeypatch.setattr(routes, 'serialize_products', lambda *args: pytest.fail('不应执行序列化'))
+        response = client.get('/api/products', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+        monkeypatch.undo()
+
+        with client.application.app_context():
+            product = db.session.get(Product, product_id)
+            product.price = 25
+            db.session.commit()
+
+        response = client.get('/api/products', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_not_found_has_no_etag(self, client):
+        """测试404响应不附加ETag"""
+        response = client.get('/api/products/999')
+        assert response.status_code == 404
+        assert 'ETag' not in response.headers
+
+
+class TestAPIKeySettings:
+    """API Key 与网站设置快照测试"""
+
+    def test_api_key_checks_use_snapshot(self, client):
+        """测试验证API Key不查询数据库，生成和撤销后立即生效"""
+        from sqlalchemy import event
+        from src.api_auth import APIKeyManager
+        from src.models import set_site_setting
+        from src.site_settings import site_settings
+
+        with client.application.app_context():
+            loads = site_settings.loads
+            api_key = APIKeyManager.generate_api_key()
+            APIKeyManager.set_api_key(api_key)
+            assert APIKeyManager.verify_api_key(api_key)
+
+            statements = []
+            def capture(conn, cursor, statement, *args):
+                statements.append(statement)
+            event.listen(db.engine, 'before_cursor_execute', capture)
+            try:
+                for _ in range(3):
+                    assert APIKeyManager.is_api_key_configured()
+                    assert APIKeyManager.verify_api_key(api_key)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', capture)
+            assert statements == []
+
+            new_key = APIKeyManager.generate_api_key()
+            APIKeyManager.set_api_key(new_key)
+            assert not APIKeyManager.verify_api_key(api_key)
+            assert APIKeyManager.verify_api_key(new_key)
+
+            set_site_setting('api_key_hash', '', 'API Key哈希值')
+            db.session.commit()
+            assert not APIKeyManager.is_api_key_configured()
+            assert site_settings.loads == loads + 3
+
+    def test_snapshot_sees_changes_from_other_process(self, client):
+        """测试其他进程提交的设置修改（本进程收不到变更信号）在检查间隔后生效"""
+        from datetime import datetime, timedelta
+        from sqlalchemy import text
+        from src.models import set_site_setting
+        from src.site_settings import SiteSettingsSnapshot
+
+        with client.application.app_context():
+            set_site_setting('api_key_hash', 'OLD', 'API Key哈希值')
+            db.session.commit()
+
+            # 模拟另一个工作进程的快照：不注册变更信号，每次读取都检查版本戳
+            worker = SiteSettingsSnapshot(check_interval=0)
+            assert worker.get('api_key_hash') == 'OLD'
+
+            # 另一个进程直接写数据库，不经过本进程的 ORM 会话和信号
+            with db.engine.begin() as conn:
+                conn.execute(
+                    text('UPDATE site_settings SET value = :value, updated_at = :updated_at WHERE key = :key'),
+                    {'value': 'REVOKED', 'key': 'api_key_hash',
+                     'updated_at': datetime.utcnow() + timedelta(seconds=1)}
+                )
+            db.session.rollback()
+
+            assert worker.get('api_key_hash') == 'REVOKED'
+            assert worker.loads == 2
+
+            # 版本戳未变化时不重新加载
+            assert worker.get('api_key_hash') == 'REVOKED'
+            assert worker.loads == 2
@@ -0,0 +1,219 @@
+"""
+应用缓存测试
+"""
+from src.models import db, Product, Category, init_default_categories
+from src.cache import cache, Cache, MemoryBackend, SQLiteBackend, RedisBackend, MISSING
+
+
+class FakeRedis:
+    """Redis 客户端的本地替身，只实现缓存后端用到的命令"""
+
+    def __init__(self):
+        self.data = {}
+        self.writes = 0
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        self.writes += 1
+        if nx and key in self.data:
+            return None
+        self.data[key] = value.encode('utf-8') if isinstance(value, str) else value
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def scan_iter(self, match):
+        return [key for key in self.data if key.startswith(match.rstrip('*'))]
+
+
+class TestBackends:
+    """缓存后端测试"""
+
+    def test_memory_lru_and_ttl(self):
+        """测试进程内后端按LRU淘汰并统计淘汰次数，过期条目不可读"""
+        backend = MemoryBackend(max_entries=2)
+        backend.set('a', 1, 60)
+        backend.set('b', 2, 60)
+        assert backend.get('a') == 1
+        backend.set('c', 3, 60)
+
+        assert backend.get('b') is MISSING
+        assert backend.get('a') == 1
+        assert backend.get_stats()['evictions'] == 1
+
+        backend.set('d', None, -1)
+        assert backend.get('d') is MISSING
+
+    def test_sqlite_shared_between_instances(self, tmp_path):
+        """测试两个 SQLite 后端实例（模拟两个worker）共享条目和命名空间版本"""
+        path = str(tmp_path / 'cache.db')
+        first, second = SQLiteBackend(path), SQLiteBackend(path)
+
+        first.set('key', {'value': [1, 2]}, 60)
+        assert second.get('key') == {'value': [1, 2]}
+        assert first.get_version('products') == second.get_version('products')
+
+        version = first.get_version('products')
+        second.bump_version('products')
+        assert first.get_version('products') != version
+
+        second.delete('key')
+        assert first.get('key') is MISSING
+
+    def test_sqlite_reconnects_after_fork(self, tmp_path):
+        """测试 fork 出的子进程重建连接后读写共享文件，不使用继承的连接"""
+        import os
+
+        backend = SQLiteBackend(str(tmp_path / 'cache.db'))
+        backend.set('parent', 1, 60)
+        inherited = backend._connection()
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                backend.reset_connections()
+                ok = backend._connection() is not inherited and backend.get('parent') == 1
+                backend.set('child', 2, 60)
+            except Exception:
+                ok = False
+            os._exit(0 if ok else 1)
+
+        _, status = os.waitpid(pid, 0)
+        assert os.WEXITSTATUS(status) == 0
+        assert backend.get('child') == 2
+
+    def test_redis_with_fake_client(self):
+        """测试 Redis 后端使用替身客户端读写并按前缀清空"""
+        client = FakeRedis()
+        backend = RedisBackend(client, prefix='test:')
+        backend.set('key', [1, 2, 3], 60)
+        assert backend.get('key') == [1, 2, 3]
+
+        version = backend.get_version('products')
+        writes = client.writes
+        assert backend.get_version('products') == version
+        # 版本已存在时只读取，不再写入
+        assert client.writes == writes
+
+        backend.clear()
+        assert client.data == {}
+
+
+class BrokenBackend:
+    """所有操作都抛出异常的后端（模拟 Redis 不可达）"""
+
+    name = 'broken'
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError('cache backend unavailable')
+        return fail
+
+
+class TestCache:
+    """缓存前端测试"""
+
+    def test_backend_errors_fail_open(self):
+        """测试后端出错时按未命中处理，写入和失效不抛出异常"""
+        app_cache = Cache()
+        app_cache.backend = BrokenBackend()
+
+        assert app_cache.get('products', 'key') is MISSING
+        app_cache.set('products', 'key', 1)
+        app_cache.delete('products', 'key')
+        app_cache.invalidate('products')
+        app_cache.clear()
+        assert app_cache.get_or_set('products', 'key', lambda: 42) == 42
+
+        stats = app_cache.get_stats()
+        assert stats['namespaces']['products']['errors'] == 6
+        assert stats['misses'] == 2
+
+    def test_backend_creation_falls_back_to_memory(self, monkeypatch):
+        """测试后端初始化失败（不只是缺少依赖包）时回退到进程内缓存"""
+        from types import SimpleNamespace
+
+        def fail(url, prefix=''):
+            raise ValueError('invalid redis url')
+        monkeypatch.setattr(RedisBackend, 'from_url', fail)
+
+        app = SimpleNamespace(config={'CACHE_BACKEND': 'redis'}, instance_path='/tmp')
+        assert isinstance(Cache()._create_backend(app), MemoryBackend)
+
+    def test_memoize_and_invalidate_namespace(self):
+        """测试 memoize 缓存返回值，命名空间失效只影响该命名空间"""
+        app_cache = Cache()
+        calls = []
+
+        @app_cache.memoize(('categories', 'products'))
+        def compute(value):
+            calls.append(value)
+            return value * 2
+
+        assert compute(2) == 4
+        assert compute(2) == 4
+        assert calls == [2]
+
+        app_cache.invalidate('orders')
+        compute(2)
+        assert calls == [2]
+
+        app_cache.invalidate('products')
+        compute(2)
+        assert calls == [2, 2]
+
+        stats = app_cache.get_stats()
+        assert stats['hits'] == 2
+        assert stats['misses'] == 2
+        assert stats['namespaces']['products']['invalidations'] == 1
+
+    def test_capped_timeout_without_shared_backend(self, tmp_path):
+        """测试进程内后端的过期时间不超过 local_timeout，共享后端不受限制"""
+        app_cache = Cache()
+        app_cache.local_timeout = 10
+        assert app_cache.capped_timeout() == 10
+        assert app_cache.capped_timeout(5) == 5
+
+        app_cache.backend = SQLiteBackend(str(tmp_path / 'cache.db'))
+        assert app_cache.capped_timeout() == 300
+        assert app_cache.capped_timeout(600) == 600
+
+    def test_product_change_invalidates_categories_endpoint(self, client):
+        """测试分类接口结果被缓存，产品变更提交后失效"""
+        with client.application.app_context():
+            init_default_categories()
+
+        def electronics_count():
+            data = client.get('/api/categories?fields=name,product_count').get_json()
+            return next(item['product_count'] for item in data if item['name'] == 'electronics')
+
+        assert electronics_count() == 0
+        hits = cache.get_stats()['hits']
+        assert electronics_count() == 0
+        assert cache.get_stats()['hits'] == hits + 1
+
+        with client.application.app_context():
+            electronics = Category.query.filter_by(name='electronics').first()
+            db.session.add(Product(name='Phone', price=10, category='electronics', category_id=electronics.id,
+                                   condition='全新', stock_status='available'))
+            db.session.commit()
+
+        assert electronics_count() == 1
+
+    def test_categories_endpoint_expires_early_without_shared_backend(self, client, monkeypatch):
+        """测试进程内缓存后端上分类接口结果按 CACHE_LOCAL_TIMEOUT 过期（其他进程的写入无法使本进程失效）"""
+        timeouts = []
+        backend_set = cache.backend.set
+
+        def record_set(key, value, timeout):
+            timeouts.append(timeout)
+            backend_set(key, value, timeout)
+        monkeypatch.setattr(cache.backend, 'set', record_set)
+        monkeypatch.setattr(cache, 'local_timeout', 10)
+
+        assert client.get('/api/categories').status_code == 200
+        assert timeouts == [10]
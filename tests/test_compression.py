@@ -0,0 +1,86 @@
+"""
+响应压缩测试
+"""
+import gzip
+import json
+from src.models import db, Product
+from src.compression import compressor
+
+
+def add_products(count):
+    """创建测试产品"""
+    for index in range(count):
+        db.session.add(Product(name=f'Product {index}', price=10 + index, category='electronics',
+                               condition='9成新', stock_status='available'))
+    db.session.commit()
+
+
+class TestCompression:
+    """gzip 压缩测试"""
+
+    def test_gzip_json_and_reuse_cached_body(self, client):
+        """测试JSON响应按协商压缩，相同响应体复用压缩结果"""
+        with client.application.app_context():
+            add_products(20)
+
+        plain = client.get('/api/products')
+        assert 'Content-Encoding' not in plain.headers
+        assert 'Accept-Encoding' in plain.headers['Vary']
+
+        hits = compressor.cache.get_stats()['hits']
+        for _ in range(2):
+            response = client.get('/api/products', headers={'Accept-Encoding': 'gzip, deflate'})
+            assert response.headers['Content-Encoding'] == 'gzip'
+            assert gzip.decompress(response.data) == plain.data
+        assert compressor.cache.get_stats()['hits'] == hits + 1
+
+    def test_small_responses_not_compressed(self, client):
+        """测试小于阈值的响应不压缩"""
+        response = client.get('/api/products', headers={'Accept-Encoding': 'gzip'})
+        assert response.data == b'[]'
+        assert 'Content-Encoding' not in response.headers
+
+    def test_streamed_response_compressed_incrementally(self, client):
+        """测试流式响应逐块压缩"""
+        with client.application.app_context():
+            add_products(5)
+
+        response = client.get('/api/products?stream=1', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Content-Length' not in response.headers
+        lines = gzip.decompress(response.data).decode('utf-8').splitlines()
+        assert [json.loads(line)['name'] for line in lines] == [f'Product {index}' for index in range(5)]
+
+    def test_cached_pages_served_from_precompressed_segments(self, app):
+        """测试整页缓存命中时使用预压缩的分段，不同会话的令牌不产生新的压缩缓存条目"""
+        import re
+
+        with app.app_context():
+            add_products(5)
+
+        def fetch(client, **headers):
+            response = client.get('/en/products', headers=headers)
+            assert response.status_code == 200
+            return response
+
+        def masked(body):
+            token = re.search(rb'name="csrf-token" content="([^"]+)"', body).group(1)
+            assert token != b'__page_cache_csrf_token__'
+            return body.replace(token, b'TOKEN')
+
+        first = app.test_client()
+        plain = fetch(first)
+        entries = compressor.cache.get_stats()['entries']
+
+        for visitor in (first, app.test_client(), app.test_client()):
+            response = fetch(visitor, **{'Accept-Encoding': 'gzip'})
+            assert response.headers['X-Page-Cache'] == 'HIT'
+            assert response.headers['Content-Encoding'] == 'gzip'
+            assert 'Accept-Encoding' in response.headers['Vary']
+            assert masked(gzip.decompress(response.data)) == masked(plain.data)
+        assert compressor.cache.get_stats()['entries'] == entries
+
+        # 不接受 gzip 的客户端得到未压缩的页面
+        response = fetch(app.test_client())
+        assert 'Content-Encoding' not in response.headers
+        assert masked(response.data) == masked(plain.data)
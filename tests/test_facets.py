@@ -0,0 +1,93 @@
+"""
+分面统计测试
+"""
+from src.models import db, Product
+from src.facets import facet_engine
+
+
+def add_product(name, price, category='electronics', condition='9成新', face_to_face_only=False, **kwargs):
+    """创建测试产品"""
+    product = Product(
+        name=name,
+        price=price,
+        category=category,
+        condition=condition,
+        face_to_face_only=face_to_face_only,
+        stock_status=kwargs.pop('stock_status', 'available'),
+        **kwargs
+    )
+    db.session.add(product)
+    return product
+
+
+def base_query():
+    """可用商品基础查询"""
+    return Product.query.filter(Product.stock_status == Product.STATUS_AVAILABLE)
+
+
+class TestFacetEngine:
+    """FacetEngine 测试"""
+
+    def test_counts_exclude_own_filter(self, client):
+        """测试每个分面应用其他筛选条件但不应用自身"""
+        with client.application.app_context():
+            add_product('Phone', 30)
+            add_product('Laptop', 600, condition='全新')
+            add_product('Jacket', 40, category='clothing', face_to_face_only=True)
+            add_product('Sold Phone', 20, stock_status='sold')
+            db.session.commit()
+
+            facets = facet_engine.get_facets(base_query(), {'category': 'electronics'})
+            assert facets['category'] == {'electronics': 2, 'clothing': 1}
+            assert facets['condition'] == {'9成新': 1, '全新': 1}
+            assert facets['price'] == {'0-50': 1, '500+': 1}
+            assert facets['face_to_face_only'] == {'0': 2}
+
+            facets = facet_engine.get_facets(base_query(), {'max_price': 100, 'face_to_face': '0'})
+            assert facets['category'] == {'electronics': 1}
+            assert facets['price'] == {'0-50': 1, '500+': 1}
+            assert facets['face_to_face_only'] == {'0': 1, '1': 1}
+
+    def test_cache_invalidated_on_product_change(self, client):
+        """测试产品变更后缓存失效"""
+        with client.application.app_context():
+            add_product('Phone', 30)
+            db.session.commit()
+
+            assert facet_engine.get_facets(base_query(), {})['category'] == {'electronics': 1}
+            facet_engine.get_facets(base_query(), {})
+            assert facet_engine.get_stats()['hits'] >= 1
+
+            add_product('Jacket', 40, category='clothing')
+            db.session.commit()
+            assert facet_engine.get_facets(base_query(), {})['category'] == {'electronics': 1, 'clothing': 1}
+
+    def test_cache_expires_for_writes_from_other_process(self, client, monkeypatch):
+        """测试其他进程的写入（本进程收不到变更信号）在缓存过期后反映到计数中"""
+        import time
+
+        with client.application.app_context():
+            add_product('Phone', 30)
+            db.session.commit()
+            assert facet_engine.get_facets(base_query(), {})['category'] == {'electronics': 1}
+
+            # 另一个进程直接写数据库
+            with db.engine.begin() as conn:
+                conn.execute(db.text("UPDATE products SET stock_status = 'sold'"))
+            db.session.rollback()
+            assert facet_engine.get_facets(base_query(), {})['category'] == {'electronics': 1}
+
+            now = time.monotonic()
+            monkeypatch.setattr(time, 'monotonic', lambda: now + facet_engine.ttl + 1)
+            assert facet_engine.get_facets(base_query(), {})['category'] == {}
+
+    def test_products_page_shows_counts(self, client):
+        """测试商品列表页显示筛选计数"""
+        with client.application.app_context():
+            add_product('Phone', 30)
+            add_product('Tablet', 80, face_to_face_only=True)
+            db.session.commit()
+
+        html = client.get('/en/products').get_data(as_text=True)
+        assert '电子产品 (2)' in html
+        assert '$0-50 (1)' in html
@@ -2,8 +2,10 @@
 模型测试
 """
 import pytest
-from src.models import db, Product, Order, Message, Admin
+from src.models import db, Product, Order, OrderItem, Message, Admin, backfill_order_items
 from src.models import get_sales_stats, get_popular_products, get_customer_stats
+from src.models import filter_products_by_specifications, get_inventory_stats
+from src.models import Category, init_default_categories, rebuild_category_product_counts
 
 
 class TestProduct:
@@ -36,6 +38,52 @@ class TestProduct:
             
             assert sample_product.get_specifications() == specs
     
+    def test_json_columns_parsed_once(self, client, sample_product, monkeypatch):
+        """测试JSON列解析结果按实例缓存，列重新赋值后失效"""
+        import json
+        from src import models
+
+        calls = []
+        real_loads = json.loads
+        monkeypatch.setattr(models.json, 'loads', lambda text: calls.append(text) or real_loads(text))
+
+        with client.application.app_context():
+            for _ in range(3):
+                sample_product.get_images()
+                sample_product.get_cover_image()
+                sample_product.get_image_count()
+            assert len(calls) == 1
+            
+            # 修改返回值不影响缓存
+            sample_product.get_images().append('https://example.com/other.jpg')
+            assert sample_product.get_images() == ['https://example.com/image1.jpg']
+            
+            sample_product.add_image('https://example.com/image2.jpg')
+            assert sample_product.get_image_count() == 2
+            
+            sample_product.specifications = '{"brand": "Other"}'
+            assert sample_product.get_specifications() == {'brand': 'Other'}
+    
+    def test_json_columns_queried_in_database(self, client):
+        """测试规格字段筛选和图片数量统计在数据库中计算"""
+        with client.application.app_context():
+            for name, brand, images in [('A', 'Apple', ['a.jpg']), ('B', 'Sony', []), ('C', 'Apple', [])]:
+                product = Product(name=name, price=10, category='electronics', condition='全新')
+                product.set_specifications({'brand': brand})
+                product.set_images(images)
+                db.session.add(product)
+            db.session.commit()
+            
+            products = filter_products_by_specifications(Product.query, {'brand': 'Apple'}).all()
+            assert sorted(product.name for product in products) == ['A', 'C']
+            assert filter_products_by_specifications(Product.query, {'brand': 'Apple', 'color': 'red'}).all() == []
+            assert get_inventory_stats()['products_without_images'] == 2
+            
+            # 任意键名作为参数绑定，不会拼接进SQL
+            assert filter_products_by_specifications(Product.query, {"brand') OR 1=1 --": 'x'}).all() == []
+            with pytest.raises(ValueError):
+                filter_products_by_specifications(Product.query, {'': 'x'})
+    
     def test_product_availability(self, client, sample_product):
         """测试产品可用性"""
         with client.application.app_context():
@@ -63,6 +111,49 @@ class TestProduct:
             assert sample_product.stock_status == 'available'
 
 
+class TestCategoryCounts:
+    """分类可用产品计数测试"""
+
+    def test_counts_follow_product_changes(self, client):
+        """测试产品新增、换分类、售出、删除时计数在同一事务中更新，重建结果一致"""
+        with client.application.app_context():
+            init_default_categories()
+            electronics = Category.query.filter_by(name='electronics').first()
+            other = Category.query.filter_by(name='other').first()
+
+            def counts():
+                return electronics.get_product_count(), other.get_product_count()
+
+            phone = Product(name='Phone', price=10, category='electronics', category_id=electronics.id,
+                            condition='全新', stock_status='available', quantity=1)
+            novel = Product(name='Novel', price=5, category='other', category_obj=other, condition='全新')
+            db.session.add_all([phone, novel])
+            db.session.commit()
+            assert counts() == (1, 1)
+
+            phone.category_id = other.id
+            db.session.commit()
+            assert counts() == (0, 2)
+
+            phone.reduce_stock()
+            db.session.commit()
+            assert counts() == (0, 1)
+
+            db.session.delete(novel)
+            db.session.commit()
+            assert counts() == (0, 0)
+
+            # 中途回滚的修改不影响计数
+            phone.stock_status = 'available'
+            db.session.flush()
+            db.session.rollback()
+            assert counts() == (0, 0)
+
+            db.session.execute(db.text("UPDATE categories SET available_product_count = 7"))
+            rebuild_category_product_counts()
+            assert counts() == (0, 0)
+
+
 class TestOrder:
     """订单模型测试"""
     
@@ -202,6 +293,60 @@ class TestAnalytics:
             assert stats['total_revenue'] == 815.00
             assert stats['avg_order_value'] == 815.00
     
+    def test_order_items_dual_written_and_aggregated(self, client, sample_product, sample_order):
+        """测试订单商品行同步写入，分类和热门产品统计按订单商品聚合"""
+        with client.application.app_context():
+            db.session.add(sample_product)
+            db.session.commit()
+            sample_order.status = 'completed'
+            db.session.add(sample_order)
+            db.session.commit()
+            
+            assert len(sample_order.order_items) == 1
+            assert sample_order.order_items[0].category == 'electronics'
+            
+            # 分类快照不随产品后续修改而变化
+            sample_product.category = 'other'
+            db.session.commit()
+            stats = get_sales_stats()
+            assert stats['category_stats'] == {'电子产品': {'count': 1, 'revenue': 800.0}}
+            
+            popular = get_popular_products(5)
+            assert popular == [{'product_id': 1, 'name': '测试笔记本电脑', 'total_sold': 1, 'total_revenue': 800.0}]
+    
+    def test_backfill_order_items(self, client, sample_product, sample_order):
+        """测试历史订单的订单商品分批补写"""
+        with client.application.app_context():
+            db.session.add(sample_product)
+            db.session.add(sample_order)
+            db.session.commit()
+            OrderItem.query.delete()
+            db.session.commit()
+            
+            assert backfill_order_items(batch_size=1) == 1
+            assert backfill_order_items(batch_size=1) == 0
+            item = OrderItem.query.one()
+            assert (item.product_id, item.quantity, float(item.unit_price), item.category) == (1, 1, 800.0, 'electronics')
+    
+    def test_order_item_string_product_id(self, client, sample_product):
+        """测试旧订单中字符串形式的商品ID转换为整数，计入分类统计"""
+        with client.application.app_context():
+            db.session.add(sample_product)
+            db.session.commit()
+            
+            assert OrderItem.row_from_item({'id': str(sample_product.id), 'price': 800})['product_id'] == sample_product.id
+            assert OrderItem.row_from_item({'id': 'abc'})['product_id'] is None
+            assert OrderItem.row_from_item({})['product_id'] is None
+            
+            order = Order(customer_name='测试用户', customer_email='test@example.com', total_amount=800,
+                          delivery_method='pickup', payment_method='cash', status='completed')
+            order.set_items([{'id': str(sample_product.id), 'name': sample_product.name, 'price': 800, 'quantity': 1}])
+            db.session.add(order)
+            db.session.commit()
+            
+            assert order.order_items[0].category == 'electronics'
+            assert get_sales_stats()['category_stats'] == {'电子产品': {'count': 1, 'revenue': 800.0}}
+    
     def test_popular_products_empty(self, client):
         """测试空数据时的热门产品"""
         with client.application.app_context():
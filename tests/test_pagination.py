@@ -0,0 +1,85 @@
+"""
+游标分页测试
+"""
+from datetime import datetime, timedelta
+from src.models import db, Product
+from src.pagination import paginate_keyset, encode_cursor, InvalidCursor
+import pytest
+
+
+def add_products(count, price=None):
+    """批量创建测试产品（部分产品价格相同以测试次级排序）"""
+    base_time = datetime(2024, 1, 1)
+    products = []
+    for i in range(count):
+        products.append(Product(
+            name=f'Item {i:02d}',
+            price=price if price is not None else 10 + i % 3,
+            category='electronics',
+            condition='9成新',
+            stock_status='available',
+            created_at=base_time + timedelta(hours=i // 2)
+        ))
+    db.session.add_all(products)
+    db.session.commit()
+    return products
+
+
+class TestKeysetPagination:
+    """paginate_keyset 测试"""
+
+    @pytest.mark.parametrize('sort_by', ['newest', 'oldest', 'price_asc', 'price_desc', 'name'])
+    def test_pages_cover_all_products_once(self, client, sort_by):
+        """测试逐页遍历不重复、不遗漏，且顺序与整体排序一致"""
+        with client.application.app_context():
+            add_products(11)
+            query = Product.query.filter(Product.stock_status == Product.STATUS_AVAILABLE)
+
+            seen = []
+            cursor = None
+            while True:
+                page = paginate_keyset(query, sort_by, cursor, per_page=4)
+                seen.extend(p.id for p in page.items)
+                if not page.has_more:
+                    break
+                cursor = page.next_cursor
+
+            expected = paginate_keyset(query, sort_by, per_page=100).items
+            assert seen == [p.id for p in expected]
+            assert len(seen) == 11
+
+    def test_cursor_must_match_sort(self, client):
+        """测试游标与排序方式不匹配时报错"""
+        with client.application.app_context():
+            product = add_products(1)[0]
+            cursor = encode_cursor(product, 'price_asc')
+            query = Product.query
+
+            with pytest.raises(InvalidCursor):
+                paginate_keyset(query, 'newest', cursor)
+            with pytest.raises(InvalidCursor):
+                paginate_keyset(query, 'newest', 'not-a-cursor')
+
+
+class TestProductsFeed:
+    """商品列表JSON接口测试"""
+
+    def test_feed_pages_and_html(self, client):
+        """测试接口返回下一页游标和商品卡片HTML"""
+        with client.application.app_context():
+            add_products(5, price=20)
+
+        data = client.get('/en/products/feed?sort=price_asc&per_page=3').get_json()
+        assert [p['name'] for p in data['products']] == ['Item 00', 'Item 01', 'Item 02']
+        assert data['has_more'] is True
+        assert 'Item 00' in data['html']
+
+        data = client.get(f"/en/products/feed?sort=price_asc&per_page=3&cursor={data['next_cursor']}").get_json()
+        assert [p['name'] for p in data['products']] == ['Item 03', 'Item 04']
+        assert data['has_more'] is False
+        assert data['next_cursor'] is None
+
+    def test_feed_rejects_invalid_cursor(self, client):
+        """测试无效游标返回400"""
+        response = client.get('/en/products/feed?cursor=bogus')
+        assert response.status_code == 400
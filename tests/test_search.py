@@ -0,0 +1,538 @@
+"""
+搜索索引测试
+"""
+import pytest
+from src.models import db, Product, search_products
+from src.search import search_index, tokenize
+
+
+def make_product(name, description='', category='electronics', specifications=None, **kwargs):
+    """创建测试产品"""
+    product = Product(
+        name=name,
+        description=description,
+        price=kwargs.pop('price', 100.00),
+        category=category,
+        condition=kwargs.pop('condition', '9成新'),
+        stock_status=kwargs.pop('stock_status', 'available'),
+        **kwargs
+    )
+    if specifications:
+        product.set_specifications(specifications)
+    return product
+
+
+class TestTokenize:
+    """分词测试"""
+
+    def test_tokenize_lowercases_words(self):
+        """测试英文分词并转为小写"""
+        assert tokenize('MacBook Pro-2020') == ['macbook', 'pro', '2020']
+
+    def test_tokenize_cjk_bigrams(self):
+        """测试中文切分为二元组，中英文混合分段"""
+        assert tokenize('苹果MacBook笔记本') == ['苹果', 'macbook', '笔记', '记本']
+        assert tokenize('9成新') == ['9', '成新']
+        assert tokenize('新') == ['新']
+
+    def test_tokenize_empty(self):
+        """测试空文本"""
+        assert tokenize('') == []
+        assert tokenize(None) == []
+
+
+class TestSearchIndex:
+    """倒排索引测试"""
+
+    def test_index_updates_on_create(self, client, sample_product):
+        """测试创建产品后索引增量更新"""
+        with client.application.app_context():
+            db.session.add(sample_product)
+            db.session.commit()
+
+            assert search_index.search('笔记本') == [sample_product.id]
+
+    def test_index_updates_on_edit(self, client):
+        """测试编辑产品后索引增量更新"""
+        with client.application.app_context():
+            product = make_product('Nintendo Switch')
+            db.session.add(product)
+            db.session.commit()
+
+            product.name = 'Sony PlayStation'
+            db.session.commit()
+
+            assert search_index.search('switch') == []
+            assert search_index.search('playstation') == [product.id]
+
+    def test_index_updates_on_delete_and_sold(self, client):
+        """测试删除或售出产品后从索引移除"""
+        with client.application.app_context():
+            kept = make_product('iPhone 12')
+            sold = make_product('iPhone 13')
+            db.session.add_all([kept, sold])
+            db.session.commit()
+
+            sold.reduce_stock(1)
+            db.session.commit()
+            assert search_index.search('iphone') == [kept.id]
+
+            db.session.delete(kept)
+            db.session.commit()
+            assert search_index.search('iphone') == []
+
+    def test_rollback_does_not_update_index(self, client):
+        """测试回滚的变更不会进入索引"""
+        with client.application.app_context():
+            product = make_product('Kindle Paperwhite')
+            db.session.add(product)
+            db.session.flush()
+            db.session.rollback()
+
+            assert search_index.search('kindle') == []
+
+    def test_rebuild_from_database(self, client):
+        """测试从数据库全量重建"""
+        with client.application.app_context():
+            product = make_product('Canon Camera')
+            db.session.add(product)
+            db.session.commit()
+
+            search_index.rebuild()
+            assert search_index.search('canon') == [product.id]
+            assert search_index.get_stats()['documents'] == 1
+
+    def test_sync_detects_other_process_writes_after_local_writes(self, client, monkeypatch):
+        """测试本进程的写入不触发重建，同期其他进程的写入仍会在同步时发现"""
+        from datetime import datetime, timedelta
+
+        rebuilds = []
+        rebuild = search_index.rebuild
+        monkeypatch.setattr(search_index, 'sync_interval', 30)
+        monkeypatch.setattr(search_index, 'rebuild', lambda: rebuilds.append(1) or rebuild())
+        with client.application.app_context():
+            sold = make_product('iPhone 13')
+            db.session.add(sold)
+            db.session.commit()
+            kept = make_product('iPhone 12')
+            db.session.add(kept)
+            db.session.commit()
+            sold.reduce_stock(1)
+            db.session.commit()
+
+            monkeypatch.setattr(search_index, '_last_sync', 0.0)
+            assert search_index.search('iphone') == [kept.id]
+            assert rebuilds == []
+
+            # 本进程再写入一次，同时另一个进程直接写数据库上架了一件商品
+            kept.name = 'iPhone 12 Pro'
+            db.session.commit()
+            with db.engine.begin() as conn:
+                conn.execute(
+                    db.text('UPDATE products SET stock_status = :status, updated_at = :updated_at WHERE id = :id'),
+                    {'status': 'available', 'id': sold.id, 'updated_at': datetime.utcnow() - timedelta(days=1)}
+                )
+            db.session.rollback()
+
+            monkeypatch.setattr(search_index, '_last_sync', 0.0)
+            assert sorted(search_index.search('iphone')) == sorted([kept.id, sold.id])
+            assert rebuilds == [1]
+
+
+class TestSearchProducts:
+    """search_products 测试"""
+
+    def test_relevance_ranking(self, client):
+        """测试名称匹配优先于描述和规格匹配"""
+        with client.application.app_context():
+            spec_match = make_product('Laptop Bag', specifications={'fits': 'macbook'})
+            desc_match = make_product('USB-C Charger', description='<p>Works with MacBook</p>')
+            name_match = make_product('MacBook Air')
+            db.session.add_all([spec_match, desc_match, name_match])
+            db.session.commit()
+
+            results = search_products('macbook')
+            assert [p.id for p in results] == [name_match.id, desc_match.id, spec_match.id]
+
+    def test_all_keywords_must_match(self, client):
+        """测试多个关键词为AND逻辑"""
+        with client.application.app_context():
+            db.session.add_all([make_product('Apple Watch'), make_product('Apple iPad')])
+            db.session.commit()
+
+            results = search_products('apple ipad')
+            assert [p.name for p in results] == ['Apple iPad']
+
+    def test_html_tags_not_indexed(self, client):
+        """测试富文本中的HTML标签不会被搜索到"""
+        with client.application.app_context():
+            db.session.add(make_product('Desk Lamp', description='<strong>bright</strong>'))
+            db.session.commit()
+
+            assert search_products('strong') == []
+            assert len(search_products('bright')) == 1
+
+    def test_chinese_compound_query(self, client):
+        """测试中文复合查询命中分散的词，并按覆盖率排序"""
+        with client.application.app_context():
+            full = make_product('苹果笔记本电脑')
+            partial = make_product('苹果 MacBook 笔记本')
+            unrelated = make_product('苹果手机')
+            db.session.add_all([full, partial, unrelated])
+            db.session.commit()
+
+            results = search_products('苹果笔记本')
+            assert [p.id for p in results] == [full.id, partial.id]
+
+    def test_single_chinese_character(self, client):
+        """测试单个汉字查询"""
+        with client.application.app_context():
+            product = make_product('全新耳机')
+            db.session.add(product)
+            db.session.commit()
+
+            assert [p.id for p in search_products('耳')] == [product.id]
+
+    def test_sql_fallback_ranks_and_limits_in_database(self, client):
+        """测试数据库回退路径在SQL中按相关性排序并限制数量"""
+        from src.models import _search_products_sql
+
+        with client.application.app_context():
+            spec_match = make_product('Laptop Bag', specifications={'fits': 'macbook'})
+            desc_match = make_product('USB-C Charger', description='Works with MacBook')
+            exact_match = make_product('MacBook')
+            name_match = make_product('MacBook Air')
+            db.session.add_all([spec_match, desc_match, exact_match, name_match])
+            db.session.commit()
+
+            results = _search_products_sql('macbook')
+            assert [p.id for p in results] == [exact_match.id, name_match.id, desc_match.id, spec_match.id]
+            assert [p.id for p in _search_products_sql('MacBook', limit=2)] == [exact_match.id, name_match.id]
+            assert [p.id for p in search_products('macbook', limit=1)] == [exact_match.id]
+
+    def test_empty_keyword(self, client):
+        """测试空关键词"""
+        with client.application.app_context():
+            assert search_products('') == []
+            assert search_products('   ') == []
+
+    def test_listing_uses_match_set_without_ranking(self, client, monkeypatch):
+        """测试商品列表搜索只取匹配集合，不计算相关性，集合作为一个参数传给SQL"""
+        from src import search
+        from src.db_types import in_json_list
+
+        with client.application.app_context():
+            watch, ipad = make_product('Apple Watch'), make_product('Apple iPad')
+            db.session.add_all([watch, ipad, make_product('Nintendo Switch')])
+            db.session.commit()
+
+            monkeypatch.setattr(search, 'calculate_relevance', lambda *args: pytest.fail('不应计算相关性'))
+            assert search_index.match('aple') == [watch.id, ipad.id]
+            html = client.get('/en/products?search=apple').get_data(as_text=True)
+            assert 'Apple Watch' in html and 'Apple iPad' in html and 'Nintendo Switch' not in html
+
+            # 超过 SQLite 参数个数上限的ID列表
+            ids = list(range(1, 40001))
+            assert Product.query.filter(in_json_list(Product.id, ids)).count() == 3
+
+
+class TestSQLiteFTSBackend:
+    """SQLite FTS5 全文搜索后端测试"""
+
+    def test_install_backfills_and_ranks(self, client):
+        """测试安装时回填已有数据并按bm25排序"""
+        from src.fulltext import SQLiteFTSBackend
+
+        with client.application.app_context():
+            desc_match = make_product('USB-C Charger', description='Works with MacBook')
+            name_match = make_product('MacBook Air')
+            db.session.add_all([desc_match, name_match])
+            db.session.commit()
+
+            backend = SQLiteFTSBackend()
+            assert backend.install() is True
+            assert backend.search('macbook') == [name_match.id, desc_match.id]
+            assert sorted(backend.match('macbook')) == [desc_match.id, name_match.id]
+
+    def test_triggers_keep_index_in_sync(self, client):
+        """测试触发器在写入时同步影子表"""
+        from src.fulltext import SQLiteFTSBackend
+
+        with client.application.app_context():
+            backend = SQLiteFTSBackend()
+            backend.install()
+
+            product = make_product('Nintendo Switch')
+            db.session.add(product)
+            db.session.commit()
+            assert backend.search('switch') == [product.id]
+            assert backend.search('swi') == [product.id]
+
+            product.name = 'Sony PlayStation'
+            db.session.commit()
+            assert backend.search('switch') == []
+
+            product.stock_status = 'sold'
+            db.session.commit()
+            assert backend.search('playstation') == []
+
+            db.session.delete(product)
+            db.session.commit()
+            count = db.session.execute(db.text('SELECT count(*) FROM products_fts')).scalar()
+            assert count == 0
+
+    def test_cjk_substring_matches(self, client):
+        """测试中文片段在任意位置匹配，与进程内索引的结果一致"""
+        from src.fulltext import SQLiteFTSBackend
+
+        with client.application.app_context():
+            backend = SQLiteFTSBackend()
+            backend.install()
+
+            laptop = make_product('苹果笔记本电脑 MacBook')
+            phone = make_product('华为手机', description='附赠笔记本')
+            db.session.add_all([laptop, phone])
+            db.session.commit()
+
+            assert backend.search('苹果笔记本') == [laptop.id]
+            assert backend.search('笔记本') == [laptop.id, phone.id]
+            assert backend.search('电脑') == [laptop.id]
+            assert backend.search('笔记本 macbook') == [laptop.id]
+            assert backend.search('平板') == []
+
+    def test_reinstall_replaces_outdated_tokenizer(self, client):
+        """测试影子表分词器变化时重建并回填"""
+        from src.fulltext import SQLiteFTSBackend
+
+        with client.application.app_context():
+            product = make_product('苹果笔记本电脑')
+            db.session.add(product)
+            db.session.commit()
+
+            old_backend = SQLiteFTSBackend()
+            old_backend.tokenizer = SQLiteFTSBackend.UNICODE_TOKENIZER
+            old_backend.install()
+            assert old_backend.search('笔记本') == []
+
+            backend = SQLiteFTSBackend()
+            assert backend.install() is True
+            assert backend.search('笔记本') == [product.id]
+
+    def test_uninstalled_backend_returns_none(self):
+        """测试未安装的后端返回None以便回退"""
+        from src.fulltext import SQLiteFTSBackend
+
+        assert SQLiteFTSBackend().search('anything') is None
+
+
+class TestAutocompleteIndex:
+    """搜索建议索引测试"""
+
+    def test_name_substring_suggestions(self, client, sample_product):
+        """测试名称子串匹配并返回商品信息"""
+        with client.application.app_context():
+            db.session.add(sample_product)
+            db.session.commit()
+
+        response = client.get('/api/search/suggestions?q=笔记本')
+        data = response.get_json()
+        assert data[0]['text'] == '测试笔记本电脑'
+        assert data[0]['price'] == '$800.00'
+        assert data[0]['category'] == '电子产品'
+
+    def test_description_and_category_suggestions(self, client):
+        """测试描述匹配和分类计数"""
+        with client.application.app_context():
+            db.session.add_all([
+                make_product('USB-C Charger', description='Works with MacBook'),
+                make_product('Sony Camera', category='electronics'),
+                make_product('Old Camera', category='electronics', stock_status='sold')
+            ])
+            db.session.commit()
+
+        data = client.get('/api/search/suggestions?q=macb').get_json()
+        assert [s['text'] for s in data] == ['USB-C Charger']
+
+        data = client.get('/api/search/suggestions?q=电子').get_json()
+        assert data == [{'text': '电子产品', 'type': 'category', 'category': None, 'count': 2}]
+
+    def test_suggestions_follow_product_changes(self, client):
+        """测试产品变更后建议增量刷新"""
+        from src.autocomplete import autocomplete_index
+
+        with client.application.app_context():
+            product = make_product('Nintendo Switch')
+            db.session.add(product)
+            db.session.commit()
+            assert [s['text'] for s in autocomplete_index.suggest('switch')] == ['Nintendo Switch']
+            assert autocomplete_index.get_category_count('electronics') == 1
+
+            product.name = 'Nintendo Switch OLED'
+            db.session.commit()
+            assert [s['text'] for s in autocomplete_index.suggest('oled')] == ['Nintendo Switch OLED']
+
+            db.session.delete(product)
+            db.session.commit()
+            assert autocomplete_index.suggest('switch') == []
+            assert autocomplete_index.get_category_count('electronics') == 0
+
+    def test_suggestions_sync_writes_from_other_process(self, client, monkeypatch):
+        """测试其他进程的写入（本进程收不到变更信号）在同步间隔后生效"""
+        from datetime import datetime, timedelta
+        from src.autocomplete import autocomplete_index
+
+        monkeypatch.setattr(autocomplete_index, 'sync_interval', 30)
+        with client.application.app_context():
+            product = make_product('Nintendo Switch')
+            db.session.add(product)
+            db.session.commit()
+            monkeypatch.setattr(autocomplete_index, '_last_sync', 0.0)
+            assert [s['text'] for s in autocomplete_index.suggest('switch')] == ['Nintendo Switch']
+
+            # 另一个进程卖出商品，直接写数据库
+            with db.engine.begin() as conn:
+                conn.execute(
+                    db.text('UPDATE products SET stock_status = :status, updated_at = :updated_at WHERE id = :id'),
+                    {'status': 'sold', 'id': product.id, 'updated_at': datetime.utcnow() + timedelta(seconds=1)}
+                )
+            db.session.rollback()
+
+            # 同步间隔内继续使用当前索引
+            assert [s['text'] for s in autocomplete_index.suggest('switch')] == ['Nintendo Switch']
+
+            monkeypatch.setattr(autocomplete_index, '_last_sync', 0.0)
+            assert autocomplete_index.suggest('switch') == []
+            assert autocomplete_index.get_category_count('electronics') == 0
+
+    def test_suggestions_sync_after_local_writes(self, client, monkeypatch):
+        """测试本进程的商品和分类写入不触发重建，同期其他进程的写入仍会在同步时发现"""
+        from datetime import datetime, timedelta
+        from src.autocomplete import autocomplete_index
+        from src.models import Category
+
+        rebuilds = []
+        rebuild = autocomplete_index.rebuild
+        monkeypatch.setattr(autocomplete_index, 'sync_interval', 30)
+        monkeypatch.setattr(autocomplete_index, 'rebuild', lambda: rebuilds.append(1) or rebuild())
+        with client.application.app_context():
+            lite = make_product('Nintendo Switch Lite')
+            db.session.add(lite)
+            db.session.commit()
+            product = make_product('Nintendo Switch')
+            db.session.add_all([product, Category(name='games', display_name='Games', slug='games')])
+            db.session.commit()
+            lite.reduce_stock(1)
+            db.session.commit()
+
+            monkeypatch.setattr(autocomplete_index, '_last_sync', 0.0)
+            assert [s['text'] for s in autocomplete_index.suggest('switch')] == ['Nintendo Switch']
+            assert rebuilds == []
+
+            # 本进程再写入一次，同时另一个进程直接写数据库重新上架了一件商品
+            product.name = 'Nintendo Switch OLED'
+            db.session.commit()
+            with db.engine.begin() as conn:
+                conn.execute(
+                    db.text('UPDATE products SET stock_status = :status, updated_at = :updated_at WHERE id = :id'),
+                    {'status': 'available', 'id': lite.id, 'updated_at': datetime.utcnow() - timedelta(days=1)}
+                )
+            db.session.rollback()
+
+            monkeypatch.setattr(autocomplete_index, '_last_sync', 0.0)
+            assert sorted(s['text'] for s in autocomplete_index.suggest('switch')) == [
+                'Nintendo Switch Lite', 'Nintendo Switch OLED'
+            ]
+            assert rebuilds == [1]
+
+
+class TestFuzzySearch:
+    """拼写容错测试"""
+
+    def test_edit_distance(self):
+        """测试编辑距离（换位计一次）"""
+        from src.fuzzy import edit_distance
+
+        assert edit_distance('macbok', 'macbook', 2) == 1
+        assert edit_distance('iphnoe', 'iphone', 2) == 1
+        assert edit_distance('camera', 'keyboard', 2) == 3
+
+    def test_trigram_lookup(self):
+        """测试三元组索引查找相近词"""
+        from src.fuzzy import TrigramIndex
+
+        index = TrigramIndex()
+        index.add_terms(['macbook', 'iphone', 'ipad'])
+        assert index.lookup('macbok') == [('macbook', 1)]
+        assert index.lookup('zzzzzz') == []
+
+        index.remove_terms(['macbook'])
+        assert index.lookup('macbok') == []
+
+    def test_misspelled_queries(self, client):
+        """测试拼写错误的查询返回相近商品"""
+        with client.application.app_context():
+            macbook = make_product('MacBook Air')
+            iphone = make_product('iPhone 12', specifications={'brand': 'Apple'})
+            phone = make_product('Galaxy S21', specifications={'brand': 'Samsung'})
+            db.session.add_all([macbook, iphone, phone])
+            db.session.commit()
+
+            assert [p.id for p in search_products('macbok')] == [macbook.id]
+            assert [p.id for p in search_products('iphnoe 12')] == [iphone.id]
+            assert [p.id for p in search_products('samsnug')] == [phone.id]
+            assert search_products('qwxyz') == []
+
+
+class TestSearchResultCache:
+    """搜索结果缓存测试"""
+
+    def test_lru_and_ttl(self, monkeypatch):
+        """测试容量淘汰和过期"""
+        import time
+        from src.search_cache import SearchResultCache
+
+        cache = SearchResultCache(max_size=2, ttl=10)
+        cache.set('a', [1])
+        cache.set('b', [2])
+        assert cache.get('a') == [1]
+        cache.set('c', [3])  # 淘汰最久未使用的 b
+        assert cache.get('b') is None
+        assert cache.get('c') == [3]
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, 'monotonic', lambda: now + 11)
+        assert cache.get('a') is None
+
+        stats = cache.get_stats()
+        assert (stats['hits'], stats['misses'], stats['evictions']) == (2, 2, 1)
+
+    def test_normalized_query_hits_cache(self, client):
+        """测试大小写和空白不同的查询命中同一缓存"""
+        from src.search_cache import search_cache
+
+        with client.application.app_context():
+            db.session.add(make_product('iPhone 12'))
+            db.session.commit()
+
+            assert len(search_products('iphone')) == 1
+            hits = search_cache.get_stats()['hits']
+            assert len(search_products('  IPHONE ')) == 1
+            assert search_cache.get_stats()['hits'] == hits + 1
+
+    def test_product_change_invalidates(self, client):
+        """测试产品变更后缓存失效，列表页和搜索返回最新结果"""
+        with client.application.app_context():
+            db.session.add(make_product('Nintendo Switch'))
+            db.session.commit()
+
+        assert 'Nintendo Switch' in client.get('/en/products?search=switch').get_data(as_text=True)
+
+        with client.application.app_context():
+            product = Product.query.first()
+            product.name = 'Sony PlayStation'
+            db.session.commit()
+
+            assert search_products('switch') == []
+
+        html = client.get('/en/products?search=switch').get_data(as_text=True)
+        assert 'Nintendo Switch' not in html
@@ -240,4 +240,164 @@ class TestAdminViews:
         """测试销售分析页面"""
         response = client.get('/admin/analytics')
         assert response.status_code == 200
-        assert '销售分析' in response.get_data(as_text=True)
\ No newline at end of file
+        assert '销售分析' in response.get_data(as_text=True)
+
+class TestSiteInfoView:
+    """信息页面测试"""
+
+    def test_info_page_cached_until_item_deleted(self, client, sample_admin):
+        """测试信息页面数据批量加载并按语言缓存，删除信息项后失效"""
+        from sqlalchemy import event
+        from src.models import SiteInfoItem, init_default_site_info, get_all_site_info_data
+
+        with client.application.app_context():
+            init_default_site_info()
+            item = SiteInfoItem.query.filter_by(key='email').first()
+            item.translations.delete()
+            item.set_content({'value': 'owner@example.test'})
+            db.session.commit()
+            item_id = item.id
+
+            statements = []
+            def capture(conn, cursor, statement, *args):
+                statements.append(statement)
+            event.listen(db.engine, 'before_cursor_execute', capture)
+            try:
+                get_all_site_info_data('en')
+                assert len(statements) == 3
+
+                first = client.get('/en/info')
+                del statements[:]
+                second = client.get('/en/info')
+                assert not [statement for statement in statements if 'site_info' in statement]
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', capture)
+
+        assert 'owner@example.test' in first.get_data(as_text=True)
+        assert '__site_info_csrf_token__' not in first.get_data(as_text=True)
+
+        client.application.config['WTF_CSRF_ENABLED'] = False
+        with client.application.app_context():
+            db.session.add(sample_admin)
+            db.session.commit()
+        client.post('/admin/login', data={'username': 'testadmin', 'password': 'testpassword'})
+        response = client.post(f'/admin/site-info/item/delete/{item_id}')
+        assert response.get_json()['success'] is True
+        assert 'owner@example.test' not in client.get('/en/info').get_data(as_text=True)
+
+    def test_site_info_expires_early_without_shared_backend(self, client, monkeypatch):
+        """测试进程内缓存后端上站点信息按 CACHE_LOCAL_TIMEOUT 过期（其他进程的修改无法使本进程失效）"""
+        from src.cache import cache
+        from src.site_info import get_site_info_data, render_site_info_sections
+
+        timeouts = []
+        backend_set = cache.backend.set
+
+        def record_set(key, value, timeout):
+            timeouts.append(timeout)
+            backend_set(key, value, timeout)
+        monkeypatch.setattr(cache.backend, 'set', record_set)
+        monkeypatch.setattr(cache, 'local_timeout', 10)
+
+        with client.application.test_request_context('/en/info'):
+            render_site_info_sections('en', get_site_info_data('en'))
+        assert timeouts == [10, 10]
+
+
+class TestPageCache:
+    """整页缓存测试"""
+
+    def test_pages_cached_and_purged_selectively(self, client):
+        """测试匿名访客页面命中缓存，产品变更只清除该产品的详情页和列表页"""
+        with client.application.app_context():
+            phone = Product(name='Phone', price=10, category='electronics', condition='全新', stock_status='available')
+            lamp = Product(name='Lamp', price=20, category='home', condition='全新', stock_status='available')
+            db.session.add_all([phone, lamp])
+            db.session.commit()
+            phone_id, lamp_id = phone.id, lamp.id
+
+        def cache_status(url):
+            response = client.get(url)
+            assert response.status_code == 200
+            assert 'Cookie' in response.vary
+            assert '__page_cache_csrf_token__' not in response.get_data(as_text=True)
+            return response.headers['X-Page-Cache']
+
+        urls = [f'/en/product/{phone_id}', f'/en/product/{lamp_id}', '/en/products?sort=price_asc&category=']
+        assert [cache_status(url) for url in urls] == ['MISS', 'MISS', 'MISS']
+        assert [cache_status(url) for url in urls] == ['HIT', 'HIT', 'HIT']
+        # 规范化查询参数：忽略空值
+        assert cache_status('/en/products?sort=price_asc') == 'HIT'
+        assert cache_status('/zh_CN/products?sort=price_asc') == 'MISS'
+
+        with client.application.app_context():
+            db.session.get(Product, phone_id).price = 15
+            db.session.commit()
+
+        assert [cache_status(url) for url in urls] == ['MISS', 'HIT', 'MISS']
+        assert '15' in client.get(f'/en/product/{phone_id}').get_data(as_text=True)
+
+    def test_pages_keyed_by_host_with_normalized_canonical_url(self, client):
+        """测试不同主机的页面分开缓存，页面中的规范地址使用规范化查询参数"""
+        response = client.get('/en/products?sort=price_asc&category=', headers={'Host': 'evil.example'})
+        assert response.headers['X-Page-Cache'] == 'MISS'
+        assert 'evil.example' in response.get_data(as_text=True)
+
+        response = client.get('/en/products?category=&sort=price_asc')
+        assert response.headers['X-Page-Cache'] == 'MISS'
+        html = response.get_data(as_text=True)
+        assert 'evil.example' not in html
+        assert '<link rel="canonical" href="http://localhost/en/products?sort=price_asc" />' in html
+        assert client.get('/en/products?sort=price_asc').headers['X-Page-Cache'] == 'HIT'
+
+    def test_short_timeout_without_shared_backend(self, client, monkeypatch, tmp_path):
+        """测试进程内缓存后端使用较短的过期时间，共享后端使用 PAGE_CACHE_TIMEOUT"""
+        from src.cache import cache, MemoryBackend, SQLiteBackend
+        from src.page_cache import PageCache
+
+        app = client.application
+        monkeypatch.setitem(app.config, 'PAGE_CACHE_TIMEOUT', 300)
+        monkeypatch.setitem(app.config, 'PAGE_CACHE_LOCAL_TIMEOUT', 10)
+
+        monkeypatch.setattr(cache, 'backend', MemoryBackend())
+        memory_pages = PageCache()
+        memory_pages.init_app(app)
+        assert memory_pages.timeout == 10
+
+        monkeypatch.setattr(cache, 'backend', SQLiteBackend(str(tmp_path / 'cache.db')))
+        shared_pages = PageCache()
+        shared_pages.init_app(app)
+        assert shared_pages.timeout == 300
+
+
+class TestFragmentCache:
+    """模板片段缓存测试"""
+
+    def test_product_card_rendered_once_until_updated(self, client, monkeypatch):
+        """测试未变化的商品卡片来自缓存，商品更新后重新渲染，不同语言分别缓存"""
+        from flask import render_template
+        from flask_babel import force_locale
+        from src.cache import cache
+
+        with client.application.app_context():
+            product = Product(name='Phone', price=10, category='electronics', condition='全新', stock_status='available')
+            db.session.add(product)
+            db.session.commit()
+
+            with client.application.test_request_context('/en/products'):
+                first = render_template('_product_card.html', products=[product])
+                assert 'Phone' in first and '<div class="product-card' in first
+
+                monkeypatch.setattr(Product, 'get_category_display', lambda self: pytest.fail('不应重新渲染'))
+                assert render_template('_product_card.html', products=[product]) == first
+                monkeypatch.undo()
+
+                product.name = 'Tablet'
+                db.session.commit()
+                assert 'Tablet' in render_template('_product_card.html', products=[product])
+
+                # 不同语言使用不同的缓存键
+                misses = cache.get_stats()['namespaces']['fragments']['misses']
+                with force_locale('zh_CN'):
+                    render_template('_product_card.html', products=[product])
+                assert cache.get_stats()['namespaces']['fragments']['misses'] == misses + 1
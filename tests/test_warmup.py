@@ -0,0 +1,50 @@
+"""
+启动预热测试
+"""
+from src import create_app
+from src.email_queue import email_queue
+from src.models import db, Product, init_default_categories, init_default_site_info
+from src.warmup import warm_up, WARMUP_STEPS, init_worker_process
+
+
+class TestWarmup:
+    """启动预热测试"""
+
+    def test_warm_up_reports_steps_and_fills_caches(self, client):
+        """测试预热执行全部步骤并记录耗时，之后的首个请求复用商品卡片片段，但不命中预热时的整页缓存"""
+        from src.cache import cache
+
+        app = client.application
+        with app.app_context():
+            init_default_categories()
+            init_default_site_info()
+            db.session.add(Product(name='Phone', price=10, category='electronics',
+                                   condition='全新', stock_status='available'))
+            db.session.commit()
+
+        report = warm_up(app)
+        assert [item['step'] for item in report] == [name for name, _ in WARMUP_STEPS]
+        assert all(item['result'] is not None and item['seconds'] >= 0 for item in report)
+        assert app.extensions['warmup_report'] == report
+
+        misses = cache.get_stats()['namespaces']['fragments']['misses']
+        assert client.get('/en/products').headers['X-Page-Cache'] == 'MISS'
+        assert client.get('/zh_CN/products').headers['X-Page-Cache'] == 'MISS'
+        assert cache.get_stats()['namespaces']['fragments']['misses'] == misses
+
+    def test_preloaded_app_starts_worker_thread_after_fork(self, monkeypatch):
+        """测试预加载时主进程不启动邮件队列线程，由 fork 后的工作进程启动并重建缓存连接"""
+        from src.cache import cache
+        from src.config import config
+
+        calls = []
+        monkeypatch.setattr(email_queue, 'start_worker', lambda: calls.append('start'))
+        monkeypatch.setattr(email_queue, 'restart_after_fork', lambda: calls.append('restart'))
+        monkeypatch.setattr(cache, 'reset_after_fork', lambda: calls.append('cache'))
+
+        monkeypatch.setattr(config['testing'], 'PRELOAD_APP', True)
+        app = create_app('testing')
+        assert calls == []
+
+        init_worker_process(app)
+        assert calls == ['cache', 'restart']